@@ -0,0 +1,366 @@
+import asyncio
+import codecs
+import csv
+import io
+import json
+import time
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, List, Tuple
+from urllib.parse import unquote_plus, urlsplit
+
+from .s3_client import S3Client, S3Error
+
+try:
+    import pyarrow.parquet as parquet
+except ImportError:  # Parquet inventories are skipped
+    parquet = None
+
+OTHER_PREFIXES = "(altri prefissi)"
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+
+
+class _Node:
+    __slots__ = ("objects", "size_bytes", "children")
+
+    def __init__(self) -> None:
+        self.objects = 0
+        self.size_bytes = 0
+        self.children: Dict[str, "_Node"] | None = None
+
+    def child(self, prefix: str, limit: int) -> "_Node":
+        if self.children is None:
+            self.children = {}
+        node = self.children.get(prefix)
+        if node is None:
+            if len(self.children) >= limit:
+                prefix = OTHER_PREFIXES
+                node = self.children.get(prefix)
+            if node is None:
+                node = self.children[prefix] = _Node()
+        return node
+
+    def to_dict(self, prefix: str) -> dict:
+        data = {"prefix": prefix, "objects": self.objects, "size_bytes": self.size_bytes}
+        if self.children:
+            data["prefixes"] = sorted(
+                (node.to_dict(name) for name, node in self.children.items()),
+                key=lambda item: item["size_bytes"],
+                reverse=True,
+            )
+        return data
+
+
+class PrefixTree:
+    """Objects and bytes per key prefix, ``depth`` levels of ``/``-separated folders deep.
+
+    Each level keeps at most ``max_prefixes`` distinct prefixes; keys beyond
+    that are counted under ``OTHER_PREFIXES`` so a bucket with random key
+    names cannot blow up the tree.
+    """
+
+    def __init__(self, depth: int = 2, max_prefixes: int = 200) -> None:
+        self.depth = max(1, depth)
+        self.max_prefixes = max(1, max_prefixes)
+        self.root = _Node()
+
+    def add(self, key: str, size: int) -> None:
+        node = self.root
+        node.objects += 1
+        node.size_bytes += size
+        path = ""
+        for part in key.split("/")[:-1][: self.depth]:
+            path += part + "/"
+            node = node.child(path, self.max_prefixes)
+            node.objects += 1
+            node.size_bytes += size
+
+    def to_dict(self) -> dict:
+        return self.root.to_dict("")
+
+
+def parse_inventory_location(location: str) -> Tuple[str, str]:
+    """``s3://bucket/prefix`` (or ``bucket/prefix``) of an inventory configuration, as ``(bucket, prefix)``."""
+    if "://" not in location:
+        location = f"s3://{location}"
+    parts = urlsplit(location)
+    prefix = parts.path.strip("/")
+    return parts.netloc, f"{prefix}/" if prefix else ""
+
+
+async def _gunzip_lines(chunks: AsyncIterator[bytes], compressed: bool) -> AsyncIterator[str]:
+    inflate = zlib.decompressobj(16 + zlib.MAX_WBITS) if compressed else None
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+    async for chunk in chunks:
+        text = pending + decoder.decode(inflate.decompress(chunk) if inflate else chunk)
+        lines = text.split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line
+    if inflate is not None:
+        pending += decoder.decode(inflate.flush())
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+class BucketInventory:
+    """Per-prefix breakdown of each bucket, rebuilt in the background and cached on disk.
+
+    A bucket with an S3 Inventory configuration (``inventories`` maps it to
+    the ``s3://destination/prefix`` the reports are delivered to) is read
+    from its latest ``manifest.json``: gzipped CSV files are streamed,
+    Parquet files need pyarrow. Other buckets are listed in full. Either way
+    the result is reduced to a ``PrefixTree`` and written to ``directory``,
+    and rebuilt once it is older than ``interval`` seconds (an inventory
+    only when a newer manifest has been delivered), so readers never
+    trigger a listing.
+    """
+
+    def __init__(
+        self,
+        client: S3Client,
+        directory: Path,
+        buckets: Callable[[], List[str]],
+        endpoint: Callable[[], str | None] = lambda: None,
+        inventories: Callable[[], Dict[str, str]] = dict,
+        interval: float = 86400.0,
+        depth: int = 2,
+        max_prefixes: int = 200,
+        concurrency: int = 1,
+    ) -> None:
+        self.client = client
+        self.directory = directory
+        self.buckets = buckets
+        self.endpoint = endpoint
+        self.inventories = inventories
+        self.interval = interval
+        self.depth = depth
+        self.max_prefixes = max_prefixes
+        self.concurrency = max(1, concurrency)
+        self.refreshes = 0
+        self.last_error: str | None = None
+        self._snapshots: Dict[str, dict] = {}
+        self._running: set[str] = set()
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self.load()
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def load(self) -> None:
+        for path in sorted(self.directory.glob("*.json")):
+            try:
+                snapshot = json.loads(path.read_text(encoding="utf-8"))
+                self._snapshots[snapshot["bucket"]] = snapshot
+            except (OSError, ValueError, KeyError, TypeError) as exc:
+                self.last_error = f"Inventario non leggibile ({path.name}): {exc}"
+
+    def snapshot(self, bucket: str) -> dict | None:
+        return self._snapshots.get(bucket)
+
+    def breakdown(self, bucket: str, prefix: str = "") -> dict | None:
+        """Cached totals of ``bucket`` and the prefixes directly below ``prefix``; None if ``prefix`` is unknown."""
+        snapshot = self._snapshots.get(bucket)
+        if snapshot is None:
+            return None
+        node = snapshot["tree"]
+        while node["prefix"] != prefix:
+            node = next(
+                (child for child in node.get("prefixes", []) if prefix.startswith(child["prefix"])),
+                None,
+            )
+            if node is None:
+                return None
+        children = [
+            {"prefix": child["prefix"], "objects": child["objects"], "size_bytes": child["size_bytes"], "has_children": "prefixes" in child}
+            for child in node.get("prefixes", [])
+        ]
+        info = {key: value for key, value in snapshot.items() if key != "tree"}
+        return {**info, "prefix": prefix, "objects": node["objects"], "size_bytes": node["size_bytes"], "prefixes": children}
+
+    def top_prefixes(self, bucket: str, limit: int = 5) -> List[dict]:
+        snapshot = self._snapshots.get(bucket)
+        if snapshot is None:
+            return []
+        return [
+            {"prefix": child["prefix"], "objects": child["objects"], "size_bytes": child["size_bytes"]}
+            for child in snapshot["tree"].get("prefixes", [])[:limit]
+        ]
+
+    def stats(self) -> dict:
+        return {
+            "interval": self.interval,
+            "running": sorted(self._running),
+            "buckets": {
+                bucket: {
+                    "source": snapshot["source"],
+                    "generated_at": snapshot["generated_at"],
+                    "objects": snapshot["objects"],
+                    "last_error": snapshot.get("last_error"),
+                }
+                for bucket, snapshot in self._snapshots.items()
+            },
+            "refreshes": self.refreshes,
+            "last_error": self.last_error,
+        }
+
+    async def refresh_once(self, force: bool = False) -> None:
+        if not self.client.available:
+            return
+        endpoint = self.endpoint()
+        inventories = self.inventories()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def refresh(bucket: str) -> None:
+            async with semaphore:
+                await self._refresh(bucket, endpoint, inventories.get(bucket), force)
+
+        await asyncio.gather(*(refresh(bucket) for bucket in self.buckets() if bucket not in self._running))
+
+    async def _loop(self) -> None:
+        # Checked more often than ``interval`` so newly configured buckets are not left waiting.
+        period = min(self.interval, 900.0)
+        while True:
+            started = time.monotonic()
+            try:
+                await self.refresh_once()
+            except Exception as exc:  # pragma: no cover - keep the loop alive
+                self.last_error = f"Errore aggiornamento inventario: {exc}"
+            duration = time.monotonic() - started
+            await asyncio.sleep(max(period - duration, duration))
+
+    async def _refresh(self, bucket: str, endpoint: str | None, inventory: str | None, force: bool) -> None:
+        previous = self._snapshots.get(bucket)
+        if not force and previous is not None and time.time() - previous["refreshed_at"] < self.interval:
+            return
+        self._running.add(bucket)
+        started = time.monotonic()
+        tree = PrefixTree(self.depth, self.max_prefixes)
+        snapshot: dict = {"bucket": bucket, "source": "listing", "depth": tree.depth}
+        try:
+            if inventory:
+                manifest_bucket, manifest_key = await self._latest_manifest(inventory, endpoint)
+                if not force and previous is not None and previous.get("manifest") == f"{manifest_bucket}/{manifest_key}":
+                    previous["refreshed_at"] = time.time()  # nothing newer delivered yet
+                    return
+                snapshot.update(source="inventory", manifest=f"{manifest_bucket}/{manifest_key}")
+                snapshot["inventory_created_at"] = await self._read_inventory(manifest_bucket, manifest_key, endpoint, tree)
+            else:
+                await self.client.scan(bucket, endpoint, on_object=tree.add)
+        except (S3Error, ValueError, KeyError, OSError, zlib.error) as exc:
+            message = str(exc) or type(exc).__name__
+            if previous is not None:
+                previous["last_error"] = message
+                previous["refreshed_at"] = time.time()  # retried at the next interval, not every check
+            else:
+                self.last_error = f"{bucket}: {message}"
+            return
+        finally:
+            self._running.discard(bucket)
+        now = time.time()
+        data = tree.to_dict()
+        snapshot.update(
+            generated_at=_iso(now),
+            refreshed_at=now,
+            duration=round(time.monotonic() - started, 1),
+            objects=data["objects"],
+            size_bytes=data["size_bytes"],
+            tree=data,
+        )
+        self._snapshots[bucket] = snapshot
+        self.refreshes += 1
+        self._save(snapshot)
+
+    def _save(self, snapshot: dict) -> None:
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self.directory / f"{snapshot['bucket']}.json"
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(snapshot), encoding="utf-8")
+            tmp_path.replace(path)
+        except OSError as exc:
+            self.last_error = f"Inventario non salvato: {exc}"
+
+    async def _latest_manifest(self, location: str, endpoint: str | None) -> Tuple[str, str]:
+        # Reports land in <prefix><date>/manifest.json; dated folders sort chronologically.
+        bucket, prefix = parse_inventory_location(location)
+        manifests: List[str] = []
+
+        def collect(key: str, _size: int) -> None:
+            if key.endswith("/manifest.json") and "/hive/" not in f"/{key[len(prefix):]}":
+                manifests.append(key)
+
+        await self.client.scan(bucket, endpoint, prefix=prefix, on_object=collect)
+        if not manifests:
+            raise ValueError(f"Nessun manifest.json in s3://{bucket}/{prefix}")
+        return bucket, max(manifests)
+
+    async def _read_inventory(self, bucket: str, manifest_key: str, endpoint: str | None, tree: PrefixTree) -> str | None:
+        manifest = json.loads(await self.client.get_object(bucket, manifest_key, endpoint))
+        file_format = (manifest.get("fileFormat") or "CSV").upper()
+        files = [item["key"] for item in manifest.get("files") or []]
+        if file_format == "CSV":
+            columns = [name.strip() for name in (manifest.get("fileSchema") or "").split(",")]
+            for key in files:
+                await self._read_csv(bucket, key, endpoint, columns, tree)
+        elif file_format == "PARQUET":
+            if parquet is None:
+                raise ValueError("Inventario Parquet: installa pyarrow")
+            for key in files:
+                self._read_parquet(await self.client.get_object(bucket, key, endpoint), tree)
+        else:
+            raise ValueError(f"Formato inventario non supportato: {file_format}")
+        created = manifest.get("creationTimestamp")
+        return _iso(int(created) / 1000) if created else None
+
+    async def _read_csv(self, bucket: str, key: str, endpoint: str | None, columns: List[str], tree: PrefixTree) -> None:
+        if "Key" not in columns or "Size" not in columns:
+            raise ValueError("L'inventario CSV deve includere i campi Key e Size")
+        key_index, size_index = columns.index("Key"), columns.index("Size")
+        latest_index = columns.index("IsLatest") if "IsLatest" in columns else None
+        marker_index = columns.index("IsDeleteMarker") if "IsDeleteMarker" in columns else None
+        needed = max(index for index in (key_index, size_index, latest_index, marker_index) if index is not None) + 1
+        lines = _gunzip_lines(self.client.iter_object(bucket, key, endpoint), key.endswith(".gz"))
+        async for line in lines:
+            if not line:
+                continue
+            row = next(csv.reader([line]))
+            if len(row) < needed:
+                continue  # truncated or malformed line
+            if latest_index is not None and row[latest_index] != "true":
+                continue
+            if marker_index is not None and row[marker_index] == "true":
+                continue
+            try:
+                size = int(row[size_index] or 0)
+            except ValueError:
+                continue  # malformed size
+            # Keys in CSV inventories are form-encoded: spaces come as "+", a literal "+" as "%2B".
+            tree.add(unquote_plus(row[key_index]), size)
+
+    @staticmethod
+    def _read_parquet(data: bytes, tree: PrefixTree) -> None:
+        table = parquet.ParquetFile(io.BytesIO(data))
+        names = set(table.schema_arrow.names)
+        columns = [name for name in ("key", "size", "is_latest", "is_delete_marker") if name in names]
+        for batch in table.iter_batches(columns=columns):
+            for row in batch.to_pylist():
+                if row.get("is_latest") is False or row.get("is_delete_marker"):
+                    continue
+                tree.add(row["key"], int(row.get("size") or 0))
@@ -0,0 +1,81 @@
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Tuple
+
+PROJECT_LABEL = "com.docker.compose.project"
+SERVICE_LABEL = "com.docker.compose.service"
+DEPENDS_ON_LABEL = "com.docker.compose.depends_on"
+ONEOFF_LABEL = "com.docker.compose.oneoff"
+
+# A dependency on a container that is "healthy" is stronger than one that is merely started.
+_CONDITION_STRENGTH = {"service_started": 0, "service_completed_successfully": 1, "service_healthy": 2}
+
+
+@dataclass
+class StackContainer:
+    name: str
+    service: str
+    depends_on: Dict[str, str] = field(default_factory=dict)
+
+
+def parse_depends_on(value: str | None) -> Dict[str, str]:
+    """Reads the ``depends_on`` label Compose writes on containers (``svc:condition:restart,...``)."""
+    dependencies: Dict[str, str] = {}
+    for item in (value or "").split(","):
+        service, _, rest = item.strip().partition(":")
+        if not service:
+            continue
+        condition = rest.partition(":")[0] or "service_started"
+        dependencies[service] = condition if condition in _CONDITION_STRENGTH else "service_started"
+    return dependencies
+
+
+def stack_container(name: str, labels: Dict[str, str]) -> Tuple[str, StackContainer] | None:
+    """Project name and container for containers created by ``docker compose up`` (not ``run``)."""
+    project = labels.get(PROJECT_LABEL)
+    if not project or labels.get(ONEOFF_LABEL, "False").lower() == "true":
+        return None
+    service = labels.get(SERVICE_LABEL) or name
+    return project, StackContainer(name, service, parse_depends_on(labels.get(DEPENDS_ON_LABEL)))
+
+
+def stack_dependencies(
+    containers: Iterable[StackContainer], action: str
+) -> Tuple[Dict[str, List[str]], Dict[str, str]]:
+    """Container-level dependencies for ``action`` plus what each dependency must reach first.
+
+    start/restart follow ``depends_on``; stop runs in reverse, so dependents
+    stop before what they depend on. Services missing from the stack (not
+    created, or scaled to zero) are ignored.
+    """
+    containers = list(containers)
+    by_service: Dict[str, List[str]] = {}
+    for container in containers:
+        by_service.setdefault(container.service, []).append(container.name)
+    dependencies: Dict[str, set] = {container.name: set() for container in containers}
+    wait_for: Dict[str, str] = {}
+    for container in containers:
+        for service, condition in container.depends_on.items():
+            for dependency in by_service.get(service, []):
+                if dependency == container.name:
+                    continue
+                if action == "stop":
+                    dependencies[dependency].add(container.name)
+                    continue
+                dependencies[container.name].add(dependency)
+                if _CONDITION_STRENGTH[condition] > _CONDITION_STRENGTH.get(wait_for.get(dependency, ""), 0):
+                    wait_for[dependency] = condition
+    return {name: sorted(deps) for name, deps in dependencies.items() if deps}, wait_for
+
+
+def dependency_waves(names: Iterable[str], dependencies: Dict[str, List[str]]) -> List[List[str]]:
+    """Groups containers into waves: every container only depends on earlier waves."""
+    remaining = {name: set(dependencies.get(name, [])) for name in names}
+    waves: List[List[str]] = []
+    while remaining:
+        wave = sorted(name for name, deps in remaining.items() if not deps & remaining.keys())
+        if not wave:
+            raise ValueError(", ".join(sorted(remaining)))
+        waves.append(wave)
+        for name in wave:
+            del remaining[name]
+    return waves
@@ -0,0 +1,276 @@
+import asyncio
+import json
+import os
+import re
+import signal
+import time
+from collections import deque
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, List, Tuple
+
+from .docker_engine import DockerEngineClient, DockerEngineError
+from .status_engine import sse_message
+
+# Longer lines are cut here; the rest of the line is discarded.
+MAX_LINE_BYTES = 16 * 1024
+_READ_CHUNK = 16 * 1024
+_RELATIVE_SINCE = re.compile(r"^(\d+(?:\.\d+)?)\s*([smhd])$")
+_SINCE_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+LogLine = Tuple[str, str, str]  # stream, timestamp, text
+
+
+def parse_since(value: str) -> float:
+    """Unix seconds from ``1700000000``, an ISO 8601 date or a relative ``15m``/``2h``/``1d``."""
+    value = value.strip()
+    relative = _RELATIVE_SINCE.match(value)
+    if relative:
+        return time.time() - float(relative.group(1)) * _SINCE_UNITS[relative.group(2)]
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+class LogFilter:
+    """Substring (or regular expression) match on the text of a log line, plus stream selection."""
+
+    def __init__(
+        self,
+        pattern: str | None = None,
+        regex: bool = False,
+        ignore_case: bool = False,
+        streams: Iterable[str] = ("stdout", "stderr"),
+    ) -> None:
+        self.streams = frozenset(streams)
+        self._regex = None
+        self._needle = None
+        if pattern and regex:
+            try:
+                self._regex = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+            except re.error as exc:
+                raise ValueError(f"Espressione regolare non valida: {exc}") from exc
+        elif pattern:
+            self._needle = pattern.lower() if ignore_case else pattern
+        self._ignore_case = ignore_case
+
+    def match(self, stream: str, text: str) -> bool:
+        if stream not in self.streams:
+            return False
+        if self._regex is not None:
+            return self._regex.search(text) is not None
+        if self._needle is not None:
+            return self._needle in (text.lower() if self._ignore_case else text)
+        return True
+
+
+class _LineSplitter:
+    def __init__(self) -> None:
+        self._pending = b""
+        self._skipping = False
+
+    def feed(self, data: bytes) -> List[bytes]:
+        lines = []
+        *complete, self._pending = (self._pending + data).split(b"\n")
+        for line in complete:
+            if self._skipping:
+                self._skipping = False  # tail of a line already emitted cut
+                continue
+            lines.append(line[:MAX_LINE_BYTES])
+        if len(self._pending) > MAX_LINE_BYTES and not self._skipping:
+            lines.append(self._pending[:MAX_LINE_BYTES])
+            self._skipping = True
+        if self._skipping:
+            self._pending = b""
+        return lines
+
+    def flush(self) -> List[bytes]:
+        pending, self._pending = self._pending, b""
+        return [pending] if pending and not self._skipping else []
+
+
+def _decode(stream: str, raw: bytes) -> LogLine:
+    # `timestamps=1` prefixes every line with its RFC 3339 time and a space.
+    text = raw.rstrip(b"\r").decode("utf-8", errors="replace")
+    timestamp, _, rest = text.partition(" ")
+    if timestamp[:4].isdigit() and timestamp.endswith("Z"):
+        return stream, timestamp, rest
+    return stream, "", text
+
+
+async def api_log_lines(
+    client: DockerEngineClient,
+    container: str,
+    follow: bool,
+    since: float | None,
+    tail: int | None,
+    streams: Iterable[str],
+) -> AsyncIterator[LogLine]:
+    streams = set(streams)
+    inspect = await client.inspect(container)
+    tty = bool((inspect.get("Config") or {}).get("Tty"))
+    params = {
+        "follow": "1" if follow else "0",
+        "stdout": "1" if "stdout" in streams else "0",
+        "stderr": "1" if "stderr" in streams else "0",
+        "timestamps": "1",
+        "tail": "all" if tail is None else str(tail),
+    }
+    if since is not None:
+        params["since"] = f"{since:.9f}"
+    splitters = {"stdout": _LineSplitter(), "stderr": _LineSplitter()}
+    buffer = b""
+    async for chunk in client.logs(container, params):
+        if tty:
+            frames = [("stdout", chunk)]
+        else:
+            # Without a TTY the daemon multiplexes: 8-byte header (stream, 0, 0, 0, big-endian size), payload.
+            buffer += chunk
+            frames = []
+            while len(buffer) >= 8:
+                size = int.from_bytes(buffer[4:8], "big")
+                if len(buffer) < 8 + size:
+                    break
+                frames.append(("stderr" if buffer[0] == 2 else "stdout", buffer[8:8 + size]))
+                buffer = buffer[8 + size:]
+        for stream, payload in frames:
+            for line in splitters[stream].feed(payload):
+                yield _decode(stream, line)
+    for stream, splitter in splitters.items():
+        for line in splitter.flush():
+            yield _decode(stream, line)
+
+
+async def cli_log_lines(
+    container: str,
+    follow: bool,
+    since: float | None,
+    tail: int | None,
+    buffer: int = 1000,
+) -> AsyncIterator[LogLine]:
+    command = ["docker", "logs", "--timestamps", "--tail", "all" if tail is None else str(tail)]
+    if since is not None:
+        command += ["--since", f"{since:.9f}"]
+    if follow:
+        command.append("--follow")
+    process = await asyncio.create_subprocess_exec(
+        *command, container, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, start_new_session=True
+    )
+    queue: asyncio.Queue = asyncio.Queue(maxsize=buffer)
+
+    async def pump(stream: str, reader: asyncio.StreamReader) -> None:
+        splitter = _LineSplitter()
+        while True:
+            chunk = await reader.read(_READ_CHUNK)
+            if not chunk:
+                break
+            for line in splitter.feed(chunk):
+                await queue.put(_decode(stream, line))
+        for line in splitter.flush():
+            await queue.put(_decode(stream, line))
+
+    async def pump_all() -> None:
+        await asyncio.gather(pump("stdout", process.stdout), pump("stderr", process.stderr))
+        await queue.put(None)
+
+    pumps = asyncio.create_task(pump_all())
+    try:
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            yield item
+        await pumps
+        if await process.wait() != 0:
+            raise DockerEngineError(f"docker logs terminato con codice {process.returncode}")
+    finally:
+        if process.returncode is None:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            await process.wait()
+        pumps.cancel()
+
+
+class LogTail:
+    """Filters a container's log lines on the server before anything is sent.
+
+    ``collect`` keeps only the last ``limit`` matching lines. ``events``
+    streams matches through a queue of ``buffer`` lines: when the client
+    reads slower than the service logs, newer matches are dropped and the
+    count is reported in a ``dropped`` event instead of being buffered.
+    """
+
+    def __init__(self, lines: AsyncIterator[LogLine], log_filter: LogFilter, buffer: int = 1000) -> None:
+        self.lines = lines
+        self.filter = log_filter
+        self.buffer = buffer
+        self.scanned = 0
+        self.matched = 0
+        self.dropped = 0
+
+    def summary(self) -> Dict[str, int]:
+        return {"scanned": self.scanned, "matched": self.matched, "dropped": self.dropped}
+
+    async def collect(self, limit: int) -> List[dict]:
+        kept: deque = deque(maxlen=limit)
+        async for stream, timestamp, text in self.lines:
+            self.scanned += 1
+            if self.filter.match(stream, text):
+                self.matched += 1
+                kept.append({"stream": stream, "time": timestamp, "text": text})
+        self.dropped = self.matched - len(kept)
+        return list(kept)
+
+    async def events(self, header: dict):
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.buffer)
+        done = asyncio.Event()
+        failure: List[str] = []
+
+        async def produce() -> None:
+            try:
+                async for stream, timestamp, text in self.lines:
+                    self.scanned += 1
+                    if not self.filter.match(stream, text):
+                        continue
+                    self.matched += 1
+                    try:
+                        queue.put_nowait((self.matched, stream, timestamp, text))
+                    except asyncio.QueueFull:
+                        self.dropped += 1
+            except (DockerEngineError, OSError) as exc:
+                failure.append(str(exc))
+            finally:
+                done.set()
+
+        producer = asyncio.create_task(produce())
+        reported = 0
+        try:
+            yield sse_message("tail", json.dumps(header, ensure_ascii=False).encode("utf-8"))
+            while True:
+                if queue.empty() and done.is_set():
+                    break
+                getter = asyncio.ensure_future(queue.get())
+                waiter = asyncio.ensure_future(done.wait())
+                finished, _ = await asyncio.wait({getter, waiter}, return_when=asyncio.FIRST_COMPLETED)
+                waiter.cancel()
+                if getter not in finished:
+                    getter.cancel()
+                    continue
+                seq, stream, timestamp, text = getter.result()
+                if self.dropped > reported:
+                    yield sse_message("dropped", json.dumps({"count": self.dropped - reported}).encode("utf-8"))
+                    reported = self.dropped
+                payload = json.dumps({"seq": seq, "stream": stream, "time": timestamp, "text": text}, ensure_ascii=False)
+                yield sse_message("line", payload.encode("utf-8"), seq)
+            if failure:
+                yield sse_message("failure", json.dumps({"detail": failure[0]}, ensure_ascii=False).encode("utf-8"))
+            yield sse_message("end", json.dumps(self.summary()).encode("utf-8"))
+        finally:
+            producer.cancel()
+            try:
+                await producer
+            except asyncio.CancelledError:
+                pass
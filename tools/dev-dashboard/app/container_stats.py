@@ -0,0 +1,284 @@
+import asyncio
+import json
+import os
+import re
+import signal
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List
+
+from .compose_stacks import stack_container
+from .docker_engine import DockerEngineClient, DockerEngineError
+from .timeseries import TimeSeriesStore
+
+_SIZE = re.compile(r"^([\d.]+)\s*([kKMGTP]?i?B)?$")
+_SIZE_UNITS = {
+    "B": 1,
+    "kB": 1e3,
+    "KB": 1e3,
+    "MB": 1e6,
+    "GB": 1e9,
+    "TB": 1e12,
+    "KiB": 1024,
+    "MiB": 1024**2,
+    "GiB": 1024**3,
+    "TiB": 1024**4,
+}
+_SUMMED = ("cpu", "memory_bytes", "block_read_bps", "block_write_bps")
+
+
+def parse_size(text: str) -> float | None:
+    """Sizes as printed by ``docker stats`` (``12.3MiB``, ``1.2MB``, ``0B``)."""
+    match = _SIZE.match(text.strip())
+    if not match:
+        return None
+    return float(match.group(1)) * _SIZE_UNITS.get(match.group(2) or "B", 1)
+
+
+def api_reading(payload: dict) -> dict:
+    cpu = payload.get("cpu_stats") or {}
+    cpu_usage = cpu.get("cpu_usage") or {}
+    memory = payload.get("memory_stats") or {}
+    used = memory.get("usage")
+    if used is not None:
+        detail = memory.get("stats") or {}
+        # Same figure as `docker stats`: reclaimable page cache does not count as used.
+        cache = detail.get("inactive_file", detail.get("total_inactive_file", detail.get("cache", 0)))
+        used = max(0, used - cache)
+    block_read = block_write = 0
+    for item in (payload.get("blkio_stats") or {}).get("io_service_bytes_recursive") or []:
+        operation = (item.get("op") or "").lower()
+        if operation == "read":
+            block_read += item.get("value", 0)
+        elif operation == "write":
+            block_write += item.get("value", 0)
+    return {
+        "cpu_total": cpu_usage.get("total_usage"),
+        "system_total": cpu.get("system_cpu_usage"),
+        "online_cpus": cpu.get("online_cpus") or len(cpu_usage.get("percpu_usage") or []) or 1,
+        "memory_bytes": used,
+        "block_read": block_read,
+        "block_write": block_write,
+    }
+
+
+def cli_reading(row: dict) -> dict:
+    used, _, _ = (row.get("MemUsage") or "").partition("/")
+    block_read, _, block_write = (row.get("BlockIO") or "").partition("/")
+    try:
+        cpu = float((row.get("CPUPerc") or "").rstrip("%"))
+    except ValueError:
+        cpu = None
+    return {
+        "cpu": cpu,
+        "memory_bytes": parse_size(used),
+        "block_read": parse_size(block_read),
+        "block_write": parse_size(block_write),
+    }
+
+
+class ContainerStatsSampler:
+    """Samples CPU, memory and block I/O of the running containers into a ``TimeSeriesStore``.
+
+    Every ``interval`` seconds the running containers returned by ``targets``
+    are read through the Engine API (at most ``concurrency`` requests at once)
+    or, without the socket, with a single ``docker stats --no-stream``. CPU
+    and I/O rates come from the difference with the previous sample. A tick
+    that takes longer than half the interval stretches the pause before the
+    next one, so sampling never keeps the daemon busy more than half the time.
+    Per-stack series are the sum of the stack's containers.
+    """
+
+    def __init__(
+        self,
+        store: TimeSeriesStore,
+        targets: Callable[[], Awaitable[List[dict] | None]],
+        client: DockerEngineClient | None = None,
+        interval: float = 30.0,
+        concurrency: int = 2,
+        timeout: float = 10.0,
+        history_points: int = 60,
+    ) -> None:
+        self.store = store
+        self.targets = targets
+        self.client = client
+        self.interval = interval
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.history_points = history_points
+        self.backend: str | None = None
+        self.samples = 0
+        self.last_sample_at: str | None = None
+        self.last_duration: float | None = None
+        self.last_error: str | None = None
+        self._previous: Dict[str, dict] = {}
+        self._stacks: Dict[str, str | None] = {}
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def sample_once(self) -> None:
+        rows = await self.targets()
+        if rows is None:
+            raise DockerEngineError("Elenco container non disponibile")
+        running = {
+            row["name"]: row
+            for row in rows
+            if row.get("state") == "running" or (row.get("status") or "").startswith("Up")
+        }
+        readings = None
+        if self.client is not None and self.client.available:
+            readings = await self._sample_api(running)
+        if readings is None:
+            readings = await self._sample_cli(running)
+        self._record(running, readings, time.time())
+
+    def overview(self) -> dict:
+        containers = {}
+        for key in self.store.keys("container:"):
+            name = key[len("container:"):]
+            if name not in self._stacks:
+                continue  # stopped since: its series stays available from history()
+            containers[name] = {"stack": self._stacks.get(name), **(self.store.latest(key) or {})}
+        stacks = {
+            key[len("stack:"):]: self.store.series(key, max_points=self.history_points)
+            for key in self.store.keys("stack:")
+        }
+        return {"containers": containers, "stacks": stacks, "sampler": self.stats()}
+
+    def history(self, container: str | None = None, stack: str | None = None, since: float | None = None) -> dict:
+        """Full-resolution series; with ``container`` and/or ``stack`` only the named ones."""
+        everything = container is None and stack is None
+        return {
+            "containers": {
+                key[len("container:"):]: self.store.series(key, since=since)
+                for key in self.store.keys("container:")
+                if everything or key == f"container:{container}"
+            },
+            "stacks": {
+                key[len("stack:"):]: self.store.series(key, since=since)
+                for key in self.store.keys("stack:")
+                if everything or key == f"stack:{stack}"
+            },
+        }
+
+    def stats(self) -> dict:
+        return {
+            "interval": self.interval,
+            "running": self._task is not None and not self._task.done(),
+            "backend": self.backend,
+            "samples": self.samples,
+            "last_sample_at": self.last_sample_at,
+            "last_duration": self.last_duration,
+            "last_error": self.last_error,
+            **self.store.stats(),
+        }
+
+    async def _loop(self) -> None:
+        while True:
+            started = time.monotonic()
+            try:
+                await self.sample_once()
+                self.last_error = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # DockerEngineError, odd stats payloads, dropped sockets, ...
+                self.last_error = str(exc) or type(exc).__name__
+            self.last_duration = round(time.monotonic() - started, 3)
+            await asyncio.sleep(max(self.interval - self.last_duration, self.last_duration))
+
+    async def _sample_api(self, running: Dict[str, dict]) -> Dict[str, dict] | None:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        unreachable = False
+
+        async def read(name: str, row: dict) -> dict | None:
+            nonlocal unreachable
+            async with semaphore:
+                try:
+                    payload = await asyncio.wait_for(
+                        self.client.container_stats(row.get("id") or name), self.timeout
+                    )
+                except asyncio.TimeoutError:
+                    return None
+                except DockerEngineError as exc:
+                    if exc.status_code is None:
+                        unreachable = True
+                    return None  # removed or stopped in the meantime
+            return api_reading(payload)
+
+        results = await asyncio.gather(*(read(name, row) for name, row in running.items()))
+        if unreachable and not any(results):
+            return None
+        self.backend = "api"
+        return {name: reading for name, reading in zip(running, results) if reading is not None}
+
+    async def _sample_cli(self, running: Dict[str, dict]) -> Dict[str, dict]:
+        self.backend = "cli"
+        if not running:
+            return {}
+        process = await asyncio.create_subprocess_exec(
+            "docker", "stats", "--no-stream", "--format", "{{json .}}", *running,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True,
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), self.timeout + 5)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            await process.wait()
+            raise
+        if process.returncode != 0 and not stdout:
+            raise DockerEngineError(stderr.decode("utf-8", errors="replace").strip() or "docker stats non riuscito")
+        readings = {}
+        for line in stdout.decode("utf-8", errors="replace").splitlines():
+            if line.strip():
+                row = json.loads(line)
+                readings[row.get("Name", "")] = cli_reading(row)
+        return readings
+
+    def _record(self, running: Dict[str, dict], readings: Dict[str, dict], now: float) -> None:
+        stack_totals: Dict[str, Dict[str, float]] = {}
+        previous, self._previous = self._previous, {}
+        for name, raw in readings.items():
+            if name not in running:
+                continue
+            before = previous.get(name) or {}
+            values = {"cpu": raw.get("cpu"), "memory_bytes": raw.get("memory_bytes")}
+            if values["cpu"] is None and before.get("cpu_total") is not None and raw.get("cpu_total") is not None:
+                cpu_delta = raw["cpu_total"] - before["cpu_total"]
+                system_delta = (raw.get("system_total") or 0) - (before.get("system_total") or 0)
+                if system_delta > 0 and cpu_delta >= 0:
+                    values["cpu"] = round(cpu_delta / system_delta * raw["online_cpus"] * 100, 2)
+            elapsed = now - before["at"] if before else 0
+            for counter, rate in (("block_read", "block_read_bps"), ("block_write", "block_write_bps")):
+                if elapsed > 0 and raw.get(counter) is not None and raw[counter] >= (before.get(counter) or 0):
+                    values[rate] = round((raw[counter] - (before.get(counter) or 0)) / elapsed)
+            self._previous[name] = {**raw, "at": now}
+            self.store.add(f"container:{name}", values, now)
+            found = stack_container(name, running[name].get("labels") or {})
+            self._stacks[name] = found[0] if found else None
+            if found:
+                totals = stack_totals.setdefault(found[0], {})
+                for key in _SUMMED:
+                    if values.get(key) is not None:
+                        totals[key] = totals.get(key, 0.0) + values[key]
+        for project, totals in stack_totals.items():
+            self.store.add(f"stack:{project}", totals, now)
+        self._stacks = {name: stack for name, stack in self._stacks.items() if name in running}
+        self.samples += 1
+        self.last_sample_at = datetime.fromtimestamp(now, timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
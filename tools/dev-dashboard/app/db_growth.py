@@ -0,0 +1,151 @@
+import json
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from .pg_probe import redact_url
+from .timeseries import TimeSeriesStore
+
+_DAY = 86400.0
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+
+
+def growth_per_day(samples: Sequence[Tuple[float, float]], min_span: float = 3600.0) -> float | None:
+    """Least-squares slope of ``(timestamp, bytes)`` samples in bytes per day; None over less than ``min_span``."""
+    if len(samples) < 2 or samples[-1][0] - samples[0][0] < min_span:
+        return None
+    mean_t = sum(t for t, _ in samples) / len(samples)
+    mean_v = sum(v for _, v in samples) / len(samples)
+    variance = sum((t - mean_t) ** 2 for t, _ in samples)
+    if not variance:
+        return None
+    covariance = sum((t - mean_t) * (v - mean_v) for t, v in samples)
+    return covariance / variance * _DAY
+
+
+class DatabaseGrowth:
+    """Database and table sizes over time, persisted to a small JSON file.
+
+    Sizes are averaged into ``resolution``-second buckets and kept for
+    ``retention`` seconds, so a database costs at most a few thousand points
+    however often it is probed. Growth is the least-squares slope over the
+    last ``window`` seconds; with a size limit configured for the database it
+    is projected to the day the limit is reached. Series are keyed by the URL
+    without its password, which never reaches the file.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        limits: Callable[[], Dict[str, float]] | None = None,
+        resolution: float = 3600.0,
+        retention: float = 90 * _DAY,
+        window: float = 7 * _DAY,
+        save_interval: float = 300.0,
+    ) -> None:
+        self.path = path
+        self.limits = limits or dict
+        self.window = window
+        self.save_interval = save_interval
+        self.store = TimeSeriesStore(resolution=resolution, retention=retention)
+        self.last_error: str | None = None
+        self._saved_at = 0.0
+        self._dirty = False
+
+    def load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            self.store.load(data.get("series") or {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, TypeError, AttributeError) as exc:
+            self.last_error = f"Storico dimensioni non leggibile: {exc}"
+        self._saved_at = time.monotonic()
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps({"series": self.store.dump()}), encoding="utf-8")
+            tmp_path.replace(self.path)
+            self._dirty = False
+            self.last_error = None
+        except OSError as exc:
+            self.last_error = f"Storico dimensioni non salvato: {exc}"
+        self._saved_at = time.monotonic()
+
+    def record_size(self, url: str, size_bytes: int, timestamp: float | None = None) -> None:
+        self.store.add(f"db:{redact_url(url)}", {"size_bytes": size_bytes}, timestamp)
+        self._changed()
+
+    def record_tables(self, url: str, tables: List[dict], timestamp: float | None = None) -> None:
+        database = redact_url(url)
+        for table in tables:
+            if table.get("total_bytes") is None:
+                continue
+            name = table["name"] if table.get("schema") in (None, "public") else f"{table['schema']}.{table['name']}"
+            self.store.add(f"table:{database}|{name}", {"total_bytes": table["total_bytes"]}, timestamp)
+        self._changed()
+
+    def limit_for(self, url: str) -> float | None:
+        """Limit configured for the full URL or for the database name alone."""
+        limits = self.limits()
+        database = url.rsplit("/", 1)[-1].split("?", 1)[0]
+        return limits.get(url, limits.get(database))
+
+    def report(self, url: str, now: float | None = None, tables: int = 0, history_points: int | None = None) -> dict:
+        now = time.time() if now is None else now
+        key = f"db:{redact_url(url)}"
+        latest = self.store.latest(key) or {}
+        samples = self.store.samples(key, "size_bytes", since=now - self.window)
+        rate = growth_per_day(samples)
+        size = latest.get("size_bytes")
+        limit = self.limit_for(url)
+        report = {
+            "url": url,
+            "size_bytes": round(size) if size is not None else None,
+            "growth_bytes_per_day": round(rate) if rate is not None else None,
+            "window_days": round(self.window / _DAY, 2),
+            "points": len(samples),
+            "limit_bytes": limit,
+            "days_to_limit": None,
+            "projected_full_at": None,
+        }
+        if limit and size is not None:
+            report["used_ratio"] = round(size / limit, 4)
+            if rate and rate > 0:
+                days = max(0.0, (limit - size) / rate)
+                report["days_to_limit"] = round(days, 1)
+                report["projected_full_at"] = _iso(now + days * _DAY)
+        if history_points is not None:
+            report["series"] = self.store.series(key, max_points=history_points)
+        if tables:
+            prefix = f"table:{redact_url(url)}|"
+            growing = []
+            for table_key in self.store.keys(prefix):
+                table_samples = self.store.samples(table_key, "total_bytes", since=now - self.window)
+                table_rate = growth_per_day(table_samples)
+                growing.append(
+                    {
+                        "name": table_key[len(prefix):],
+                        "total_bytes": round(table_samples[-1][1]) if table_samples else None,
+                        "growth_bytes_per_day": round(table_rate) if table_rate is not None else None,
+                    }
+                )
+            growing.sort(key=lambda item: item["growth_bytes_per_day"] or 0, reverse=True)
+            report["tables"] = growing[:tables]
+        return report
+
+    def stats(self) -> dict:
+        return {"file": str(self.path), "last_error": self.last_error, **self.store.stats()}
+
+    def _changed(self) -> None:
+        self._dirty = True
+        if time.monotonic() - self._saved_at >= self.save_interval:
+            self.save()
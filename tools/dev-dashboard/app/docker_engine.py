@@ -0,0 +1,325 @@
+import asyncio
+import json
+import os
+import re
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+# Event actions that do not change what the docker card shows (healthchecks emit exec_* every few seconds).
+_IGNORED_EVENT_PREFIXES = ("exec_", "attach", "detach", "resize", "top", "export", "commit", "copy", "archive-path", "extract-to-dir")
+
+
+class DockerEngineError(Exception):
+    def __init__(self, message: str, status_code: int | None = None) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def docker_socket_path() -> Path:
+    docker_host = os.environ.get("DOCKER_HOST", "")
+    if docker_host.startswith("unix://"):
+        return Path(docker_host[len("unix://"):])
+    return Path(os.environ.get("DOCKER_SOCKET", "/var/run/docker.sock"))
+
+
+_DOCKER_TIME = re.compile(r"^(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d)(?:\.(\d+))?(Z|[+-]\d\d:\d\d)?$")
+
+
+def _parse_time(value: str | None) -> datetime | None:
+    if not value or value.startswith("0001-01-01"):
+        return None
+    # Docker uses RFC 3339 with nanoseconds; fromisoformat only takes microseconds.
+    match = _DOCKER_TIME.match(value)
+    if not match:
+        return None
+    base, fraction, offset = match.groups()
+    offset = "+00:00" if offset in (None, "Z") else offset
+    return datetime.fromisoformat(f"{base}.{(fraction or '0')[:6].ljust(6, '0')}{offset}")
+
+
+def human_duration(seconds: float) -> str:
+    """Same wording as `docker ps` (go-units HumanDuration)."""
+    seconds = int(seconds)
+    if seconds < 1:
+        return "Less than a second"
+    if seconds == 1:
+        return "1 second"
+    if seconds < 60:
+        return f"{seconds} seconds"
+    minutes = seconds // 60
+    if minutes == 1:
+        return "About a minute"
+    if minutes < 60:
+        return f"{minutes} minutes"
+    hours = round(seconds / 3600)
+    if hours == 1:
+        return "About an hour"
+    if hours < 48:
+        return f"{hours} hours"
+    if hours < 24 * 7 * 2:
+        return f"{hours // 24} days"
+    if hours < 24 * 30 * 2:
+        return f"{hours // 24 // 7} weeks"
+    if hours < 24 * 365 * 2:
+        return f"{hours // 24 // 30} months"
+    return f"{hours // 24 // 365} years"
+
+
+def container_status_text(container: dict, now: datetime | None = None) -> str:
+    """Rebuilds the `docker ps` STATUS column from an inspect payload."""
+    now = now or datetime.now(timezone.utc)
+    state = container.get("State") or {}
+    status = state.get("Status", "")
+    started = _parse_time(state.get("StartedAt"))
+    finished = _parse_time(state.get("FinishedAt"))
+    if status in ("running", "paused"):
+        text = f"Up {human_duration((now - started).total_seconds())}" if started else "Up"
+        health = (state.get("Health") or {}).get("Status")
+        if status == "paused":
+            text += " (Paused)"
+        elif health == "starting":
+            text += " (health: starting)"
+        elif health in ("healthy", "unhealthy"):
+            text += f" ({health})"
+        return text
+    if status == "restarting":
+        ago = f" {human_duration((now - finished).total_seconds())} ago" if finished else ""
+        return f"Restarting ({state.get('ExitCode', 0)}){ago}"
+    if status == "exited":
+        ago = f" {human_duration((now - finished).total_seconds())} ago" if finished else ""
+        return f"Exited ({state.get('ExitCode', 0)}){ago}"
+    if status == "removing":
+        return "Removal In Progress"
+    return status.capitalize() or "Unknown"
+
+
+class DockerEngineClient:
+    """Minimal async client for the Docker Engine API over the unix socket.
+
+    A single ``httpx.AsyncClient`` keeps its connections pooled for the life
+    of the dashboard.
+    """
+
+    def __init__(self, socket_path: Path, timeout: float = 10.0) -> None:
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._client: httpx.AsyncClient | None = None
+
+    @property
+    def available(self) -> bool:
+        return self.socket_path.exists()
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                transport=httpx.AsyncHTTPTransport(uds=str(self.socket_path)),
+                base_url="http://docker",
+                timeout=self.timeout,
+            )
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        try:
+            response = await self._http().request(method, path, **kwargs)
+        except httpx.HTTPError as exc:
+            raise DockerEngineError(f"Docker API non raggiungibile: {exc}") from exc
+        if response.status_code >= 400:
+            try:
+                message = response.json().get("message") or response.text
+            except ValueError:
+                message = response.text
+            raise DockerEngineError(message.strip() or f"HTTP {response.status_code}", response.status_code)
+        return response
+
+    async def list_containers(self) -> List[dict]:
+        response = await self._request("GET", "/containers/json", params={"all": "1"})
+        return response.json()
+
+    async def inspect(self, container_id: str) -> dict:
+        response = await self._request("GET", f"/containers/{container_id}/json")
+        return response.json()
+
+    async def container_action(self, name: str, action: str) -> bool:
+        """start/stop/restart; returns False when the container was already in that state (HTTP 304)."""
+        if action not in ("start", "stop", "restart"):
+            raise DockerEngineError(f"Azione docker non supportata: {action}")
+        # stop/restart wait for the container's grace period before answering.
+        response = await self._request("POST", f"/containers/{name}/{action}", timeout=self.timeout + 60)
+        return response.status_code != 304
+
+    async def container_stats(self, container_id: str) -> dict:
+        # one-shot skips the extra second the daemon otherwise spends collecting precpu_stats.
+        response = await self._request(
+            "GET", f"/containers/{container_id}/stats", params={"stream": "false", "one-shot": "true"}
+        )
+        return response.json()
+
+    async def logs(self, container_id: str, params: dict):
+        try:
+            async with self._http().stream(
+                "GET", f"/containers/{container_id}/logs", params=params, timeout=httpx.Timeout(self.timeout, read=None)
+            ) as response:
+                if response.status_code >= 400:
+                    await response.aread()
+                    raise DockerEngineError(response.text.strip() or f"HTTP {response.status_code}", response.status_code)
+                async for chunk in response.aiter_raw():
+                    yield chunk
+        except httpx.HTTPError as exc:
+            raise DockerEngineError(f"Stream log Docker interrotto: {exc}") from exc
+
+    async def events(self, since: int | None = None):
+        params = {"filters": json.dumps({"type": ["container"]})}
+        if since is not None:
+            params["since"] = str(since)
+        try:
+            async with self._http().stream(
+                "GET", "/events", params=params, timeout=httpx.Timeout(self.timeout, read=None)
+            ) as response:
+                if response.status_code >= 400:
+                    raise DockerEngineError(f"HTTP {response.status_code}", response.status_code)
+                async for line in response.aiter_lines():
+                    if line.strip():
+                        yield json.loads(line)
+        except httpx.HTTPError as exc:
+            raise DockerEngineError(f"Stream eventi Docker interrotto: {exc}") from exc
+
+
+class ContainerCache:
+    """Container table kept current by the Docker ``/events`` stream.
+
+    After an initial listing (plus one inspect per container) each container
+    event re-inspects only that container, so readers never need a full
+    listing. ``synced`` is False whenever the event stream is down; the
+    table may then be stale and callers should use ``refresh`` instead.
+    """
+
+    def __init__(
+        self,
+        client: DockerEngineClient,
+        on_change: Optional[Callable[[], None]] = None,
+        reconnect_delay: float = 2.0,
+        max_reconnect_delay: float = 60.0,
+    ) -> None:
+        self.client = client
+        self.on_change = on_change
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.containers: Dict[str, dict] = {}
+        self.synced = False
+        self.last_error: str | None = None
+        self.events = 0
+        self.resyncs = 0
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self._task is None and self.client.available:
+            self._task = asyncio.create_task(self._follow())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.synced = False
+        await self.client.close()
+
+    async def refresh(self) -> None:
+        """Full listing; used at (re)connection and when the event stream is down."""
+        listed = await self.client.list_containers()
+        semaphore = asyncio.Semaphore(8)
+
+        async def inspect(container_id: str) -> dict | None:
+            async with semaphore:
+                try:
+                    return await self.client.inspect(container_id)
+                except DockerEngineError as exc:
+                    if exc.status_code == 404:
+                        return None  # removed in the meantime
+                    raise
+
+        inspected = await asyncio.gather(*(inspect(item["Id"]) for item in listed))
+        self.containers = {item["Id"]: item for item in inspected if item}
+        self.resyncs += 1
+
+    def snapshot(self) -> List[dict]:
+        now = datetime.now(timezone.utc)
+        rows = []
+        for container in self.containers.values():
+            config = container.get("Config") or {}
+            rows.append(
+                {
+                    "id": container.get("Id"),
+                    "name": (container.get("Name") or "").lstrip("/"),
+                    "image": config.get("Image"),
+                    "state": (container.get("State") or {}).get("Status"),
+                    "status": container_status_text(container, now),
+                    "labels": config.get("Labels") or {},
+                }
+            )
+        return sorted(rows, key=lambda row: row["name"])
+
+    def stats(self) -> dict:
+        return {
+            "socket": str(self.client.socket_path),
+            "following": self._task is not None and not self._task.done(),
+            "synced": self.synced,
+            "containers": len(self.containers),
+            "events": self.events,
+            "resyncs": self.resyncs,
+            "last_error": self.last_error,
+        }
+
+    async def _follow(self) -> None:
+        delay = self.reconnect_delay
+        while True:
+            try:
+                # Events since just before the listing are replayed, so nothing falls in the gap.
+                since = int(time.time()) - 1
+                await self.refresh()
+                self.synced = True
+                self.last_error = None
+                delay = self.reconnect_delay
+                self._changed()
+                async for event in self.client.events(since=since):
+                    await self._apply(event)
+                raise DockerEngineError("Stream eventi Docker chiuso dal demone")
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # DockerEngineError, bad payloads, dropped sockets, ...
+                self.synced = False
+                self.last_error = str(exc) or type(exc).__name__
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def _apply(self, event: dict) -> None:
+        action = event.get("Action") or event.get("status") or ""
+        container_id = event.get("id") or (event.get("Actor") or {}).get("ID")
+        if not container_id or action.startswith(_IGNORED_EVENT_PREFIXES):
+            return
+        self.events += 1
+        if action == "destroy":
+            self.containers.pop(container_id, None)
+        else:
+            try:
+                self.containers[container_id] = await self.client.inspect(container_id)
+            except DockerEngineError as exc:
+                if exc.status_code != 404:
+                    raise
+                self.containers.pop(container_id, None)
+        self._changed()
+
+    def _changed(self) -> None:
+        if self.on_change is not None:
+            self.on_change()
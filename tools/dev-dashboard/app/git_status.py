@@ -0,0 +1,559 @@
+import hashlib
+import os
+import re
+import stat
+import struct
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Repositories whose working tree does not fit these limits are left to the git CLI.
+MAX_HASH_BYTES = 64 * 1024 * 1024
+MAX_REPORTED_CHANGES = 200
+
+_GITLINK_MODE = 0o160000
+_SYMLINK_MODE = 0o120000
+
+
+class Unsure(Exception):
+    """Raised when the repository can't be answered without the git CLI."""
+
+
+@dataclass
+class RepoStatus:
+    state: str  # "clean", "dirty" or "unknown"
+    changes: List[str] = field(default_factory=list)
+    reason: str | None = None
+
+    @property
+    def porcelain(self) -> str:
+        return "\n".join(self.changes)
+
+
+@dataclass
+class IndexEntry:
+    path: str
+    mtime: Tuple[int, int]
+    mode: int
+    size: int
+    sha: bytes
+    stage: int
+    skip_worktree: bool
+    intent_to_add: bool
+
+
+@dataclass
+class _GitDirs:
+    git_dir: Path
+    common_dir: Path
+
+
+def _resolve_git_dirs(repo_path: Path) -> _GitDirs:
+    dot_git = repo_path / ".git"
+    if dot_git.is_file():
+        content = dot_git.read_text(encoding="utf-8").strip()
+        if not content.startswith("gitdir:"):
+            raise Unsure("file .git non riconosciuto")
+        git_dir = Path(content[len("gitdir:"):].strip())
+        if not git_dir.is_absolute():
+            git_dir = (repo_path / git_dir).resolve()
+    elif dot_git.is_dir():
+        git_dir = dot_git
+    else:
+        raise Unsure("directory .git assente")
+    common_dir = git_dir
+    commondir_file = git_dir / "commondir"
+    if commondir_file.exists():
+        common_dir = (git_dir / commondir_file.read_text(encoding="utf-8").strip()).resolve()
+    return _GitDirs(git_dir, common_dir)
+
+
+def _read_config(dirs: _GitDirs) -> Dict[str, str]:
+    """Minimal reader for the handful of keys that change status semantics."""
+    values: Dict[str, str] = {}
+    config_file = dirs.common_dir / "config"
+    if not config_file.exists():
+        return values
+    section = ""
+    for raw_line in config_file.read_text(encoding="utf-8", errors="replace").splitlines():
+        line = raw_line.strip()
+        if not line or line[0] in "#;":
+            continue
+        if line.startswith("["):
+            header = line.strip("[]").strip()
+            name, _, subsection = header.partition(" ")
+            section = name.lower() + ("." + subsection.strip('"') if subsection else "")
+            continue
+        key, sep, value = line.partition("=")
+        key = key.strip().lower()
+        values[f"{section}.{key}"] = value.strip().strip('"') if sep else "true"
+    if "include.path" in values or any(key.startswith("includeif.") for key in values):
+        raise Unsure("config con include")
+    return values
+
+
+def _is_true(value: str | None, default: bool) -> bool:
+    if value is None:
+        return default
+    return value.lower() in ("true", "yes", "on", "1")
+
+
+def _resolve_head(dirs: _GitDirs) -> bytes | None:
+    head = (dirs.git_dir / "HEAD").read_text(encoding="utf-8").strip()
+    if not head.startswith("ref:"):
+        return bytes.fromhex(head)
+    ref = head[4:].strip()
+    for base in (dirs.git_dir, dirs.common_dir):
+        ref_file = base / ref
+        if ref_file.is_file():
+            return bytes.fromhex(ref_file.read_text(encoding="utf-8").strip())
+    packed = dirs.common_dir / "packed-refs"
+    if packed.exists():
+        for line in packed.read_text(encoding="utf-8").splitlines():
+            if line.endswith(" " + ref) and not line.startswith(("#", "^")):
+                return bytes.fromhex(line.split(" ", 1)[0])
+    return None  # unborn branch
+
+
+def _read_loose_object(dirs: _GitDirs, sha: bytes) -> bytes | None:
+    hex_sha = sha.hex()
+    path = dirs.common_dir / "objects" / hex_sha[:2] / hex_sha[2:]
+    if not path.exists():
+        return None
+    data = zlib.decompress(path.read_bytes())
+    _, _, body = data.partition(b"\0")
+    return body
+
+
+def _read_packed_object(dirs: _GitDirs, sha: bytes) -> bytes | None:
+    pack_dir = dirs.common_dir / "objects" / "pack"
+    if not pack_dir.is_dir():
+        return None
+    for idx_path in pack_dir.glob("*.idx"):
+        offset = _find_in_pack_index(idx_path, sha)
+        if offset is None:
+            continue
+        with idx_path.with_suffix(".pack").open("rb") as handle:
+            handle.seek(offset)
+            header = handle.read(32)
+            obj_type = (header[0] >> 4) & 0x07
+            pos = 1
+            while header[pos - 1] & 0x80:
+                pos += 1
+            if obj_type not in (1, 2, 3, 4):
+                raise Unsure("oggetto delta nel pack")
+            handle.seek(offset + pos)
+            inflater = zlib.decompressobj()
+            chunks = []
+            while not inflater.eof:
+                chunk = handle.read(16384)
+                if not chunk:
+                    break
+                chunks.append(inflater.decompress(chunk))
+            return b"".join(chunks)
+    return None
+
+
+def _find_in_pack_index(idx_path: Path, sha: bytes) -> int | None:
+    data = idx_path.read_bytes()
+    if data[:4] != b"\377tOc" or struct.unpack(">I", data[4:8])[0] != 2:
+        raise Unsure("indice pack non supportato")
+    fanout = struct.unpack(">256I", data[8:8 + 1024])
+    total = fanout[255]
+    low = fanout[sha[0] - 1] if sha[0] else 0
+    high = fanout[sha[0]]
+    names_at = 8 + 1024
+    while low < high:
+        mid = (low + high) // 2
+        candidate = data[names_at + mid * 20:names_at + mid * 20 + 20]
+        if candidate == sha:
+            offsets_at = names_at + total * 24
+            offset = struct.unpack(">I", data[offsets_at + mid * 4:offsets_at + mid * 4 + 4])[0]
+            if offset & 0x80000000:
+                large_at = offsets_at + total * 4 + (offset & 0x7FFFFFFF) * 8
+                offset = struct.unpack(">Q", data[large_at:large_at + 8])[0]
+            return offset
+        if candidate < sha:
+            low = mid + 1
+        else:
+            high = mid
+    return None
+
+
+def _head_tree(dirs: _GitDirs, commit: bytes) -> bytes:
+    body = _read_loose_object(dirs, commit)
+    if body is None:
+        body = _read_packed_object(dirs, commit)
+    if body is None:
+        raise Unsure("commit HEAD non trovato")
+    first_line = body.split(b"\n", 1)[0]
+    if not first_line.startswith(b"tree "):
+        raise Unsure("commit HEAD non valido")
+    return bytes.fromhex(first_line[5:].decode("ascii"))
+
+
+def _read_index(dirs: _GitDirs) -> Tuple[List[IndexEntry], bytes | None, float]:
+    index_path = dirs.git_dir / "index"
+    if not index_path.exists():
+        return [], None, 0.0
+    index_mtime = index_path.stat().st_mtime
+    data = index_path.read_bytes()
+    if data[:4] != b"DIRC":
+        raise Unsure("index non valido")
+    version, count = struct.unpack(">II", data[4:12])
+    if version not in (2, 3, 4):
+        raise Unsure(f"index versione {version}")
+    entries: List[IndexEntry] = []
+    pos = 12
+    previous_path = b""
+    for _ in range(count):
+        (
+            _ctime_s, _ctime_ns, mtime_s, mtime_ns, _dev, _ino, mode, _uid, _gid, size,
+        ) = struct.unpack(">10I", data[pos:pos + 40])
+        sha = data[pos + 40:pos + 60]
+        flags = struct.unpack(">H", data[pos + 60:pos + 62])[0]
+        cursor = pos + 62
+        extended = 0
+        if version >= 3 and flags & 0x4000:
+            extended = struct.unpack(">H", data[cursor:cursor + 2])[0]
+            cursor += 2
+        if version == 4:
+            strip, cursor = _read_offset_varint(data, cursor)
+            end = data.index(b"\0", cursor)
+            path = previous_path[:len(previous_path) - strip] + data[cursor:end]
+            pos = end + 1
+        else:
+            end = data.index(b"\0", cursor)
+            path = data[cursor:end]
+            entry_len = end - pos
+            pos += (entry_len + 8) & ~7
+        previous_path = path
+        entries.append(
+            IndexEntry(
+                path=path.decode("utf-8", errors="surrogateescape"),
+                mtime=(mtime_s, mtime_ns),
+                mode=mode,
+                size=size,
+                sha=sha,
+                stage=(flags >> 12) & 0x3,
+                skip_worktree=bool(extended & 0x4000),
+                intent_to_add=bool(extended & 0x2000),
+            )
+        )
+    root_tree = None
+    end_of_extensions = len(data) - 20
+    while pos + 8 <= end_of_extensions:
+        signature = data[pos:pos + 4]
+        size = struct.unpack(">I", data[pos + 4:pos + 8])[0]
+        body = data[pos + 8:pos + 8 + size]
+        if signature in (b"link", b"sdir"):
+            raise Unsure("split index o sparse index")
+        if signature == b"TREE":
+            root_tree = _root_cache_tree(body)
+        pos += 8 + size
+    return entries, root_tree, index_mtime
+
+
+def _read_offset_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    byte = data[pos]
+    value = byte & 0x7F
+    pos += 1
+    while byte & 0x80:
+        byte = data[pos]
+        value = ((value + 1) << 7) | (byte & 0x7F)
+        pos += 1
+    return value, pos
+
+
+def _root_cache_tree(body: bytes) -> bytes | None:
+    path_end = body.index(b"\0")
+    if path_end != 0:
+        return None
+    line_end = body.index(b"\n", path_end)
+    entry_count = int(body[path_end + 1:line_end].split(b" ")[0])
+    if entry_count < 0:
+        return None  # invalidated by a later `git add`
+    return body[line_end + 1:line_end + 21]
+
+
+def _blob_sha(content: bytes) -> bytes:
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).digest()
+
+
+class _IgnoreRules:
+    """gitignore matching: last matching pattern wins, deeper files override."""
+
+    def __init__(self, ignore_case: bool) -> None:
+        self.flags = re.IGNORECASE if ignore_case else 0
+        self.rules: List[Tuple[str, re.Pattern, bool, bool]] = []
+
+    def extended(self, base: str, lines: List[str]) -> "_IgnoreRules":
+        clone = _IgnoreRules.__new__(_IgnoreRules)
+        clone.flags = self.flags
+        clone.rules = self.rules + [rule for rule in (self._compile(base, line) for line in lines) if rule]
+        return clone
+
+    def _compile(self, base: str, line: str):
+        line = line.rstrip("\n")
+        if not line or line.startswith("#"):
+            return None
+        while line.endswith(" ") and not line.endswith("\\ "):
+            line = line[:-1]
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        elif line.startswith("\\!") or line.startswith("\\#"):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            return None
+        anchored = "/" in line
+        line = line.lstrip("/")
+        regex = _glob_to_regex(line)
+        if not anchored:
+            regex = f"(?:.*/)?{regex}"
+        prefix = re.escape(base + "/") if base else ""
+        return (base, re.compile(f"^{prefix}{regex}$", self.flags), negate, dir_only)
+
+    def ignored(self, rel_path: str, is_dir: bool) -> bool:
+        result = False
+        for _, pattern, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if pattern.match(rel_path):
+                result = not negate
+        return result
+
+
+def _glob_to_regex(pattern: str) -> str:
+    out = []
+    i = 0
+    length = len(pattern)
+    while i < length:
+        char = pattern[i]
+        if pattern.startswith("**/", i) and (i == 0 or pattern[i - 1] == "/"):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i) and i + 2 == length and (i == 0 or pattern[i - 1] == "/"):
+            out.append(".*")
+            i += 2
+        elif char == "*":
+            out.append("[^/]*")
+            i += 1
+        elif char == "?":
+            out.append("[^/]")
+            i += 1
+        elif char == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                out.append(re.escape(char))
+                i += 1
+                continue
+            body = pattern[i + 1:end]
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            out.append(f"[{body}]")
+            i = end + 1
+        elif char == "\\" and i + 1 < length:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(char))
+            i += 1
+    return "".join(out)
+
+
+def _read_lines(path: Path) -> List[str]:
+    try:
+        return path.read_text(encoding="utf-8", errors="replace").splitlines()
+    except OSError:
+        return []
+
+
+def _base_ignore_rules(dirs: _GitDirs, config: Dict[str, str], ignore_case: bool) -> _IgnoreRules:
+    rules = _IgnoreRules(ignore_case)
+    excludes_file = config.get("core.excludesfile")
+    if excludes_file:
+        global_file = Path(excludes_file).expanduser()
+    else:
+        xdg = os.environ.get("XDG_CONFIG_HOME") or str(Path.home() / ".config")
+        global_file = Path(xdg) / "git" / "ignore"
+    rules = rules.extended("", _read_lines(global_file))
+    return rules.extended("", _read_lines(dirs.common_dir / "info" / "exclude"))
+
+
+class _WorktreeScan:
+    def __init__(self, repo_path: Path, entries: List[IndexEntry], index_mtime: float, config: Dict[str, str]) -> None:
+        self.repo_path = repo_path
+        self.entries = entries
+        self.index_mtime = index_mtime
+        self.ignore_case = _is_true(config.get("core.ignorecase"), False)
+        self.trust_filemode = _is_true(config.get("core.filemode"), True)
+        self.filtered = False
+        self.changes: List[str] = []
+        self.hashed_bytes = 0
+        fold = str.casefold if self.ignore_case else (lambda value: value)
+        self.fold = fold
+        self.tracked = {fold(entry.path) for entry in entries}
+        self.tracked_dirs = set()
+        for entry in entries:
+            parts = entry.path.split("/")[:-1]
+            for depth in range(1, len(parts) + 1):
+                self.tracked_dirs.add(fold("/".join(parts[:depth])))
+
+    def full(self) -> bool:
+        return len(self.changes) >= MAX_REPORTED_CHANGES
+
+    def check_tracked(self) -> None:
+        for entry in self.entries:
+            if self.full():
+                return
+            if entry.stage:
+                if entry.stage == 1:
+                    self.changes.append(f"UU {entry.path}")
+                continue
+            if entry.skip_worktree:
+                continue
+            if entry.mode == _GITLINK_MODE:
+                raise Unsure("submodule presenti")
+            if entry.intent_to_add:
+                self.changes.append(f" A {entry.path}")
+                continue
+            self._check_entry(entry)
+
+    def _check_entry(self, entry: IndexEntry) -> None:
+        path = self.repo_path / entry.path
+        try:
+            info = os.lstat(path)
+        except FileNotFoundError:
+            self.changes.append(f" D {entry.path}")
+            return
+        except NotADirectoryError:
+            self.changes.append(f" D {entry.path}")
+            return
+        is_link = stat.S_ISLNK(info.st_mode)
+        if (entry.mode == _SYMLINK_MODE) != is_link or not (is_link or stat.S_ISREG(info.st_mode)):
+            self.changes.append(f" T {entry.path}")
+            return
+        if not is_link and self.trust_filemode:
+            executable = bool(info.st_mode & stat.S_IXUSR)
+            if executable != bool(entry.mode & 0o100):
+                self.changes.append(f" M {entry.path}")
+                return
+        if (info.st_size & 0xFFFFFFFF) != entry.size and not self.filtered:
+            self.changes.append(f" M {entry.path}")
+            return
+        mtime = (int(info.st_mtime), info.st_mtime_ns % 1_000_000_000)
+        same_mtime = mtime[0] == entry.mtime[0] and (not entry.mtime[1] or mtime[1] == entry.mtime[1])
+        racy = info.st_mtime >= self.index_mtime
+        if same_mtime and not racy and (info.st_size & 0xFFFFFFFF) == entry.size:
+            return
+        # Stat data is ambiguous (touched file, racy timestamp): compare content.
+        if self.filtered:
+            raise Unsure("filtri/attributi di conversione configurati")
+        if is_link:
+            content = os.readlink(path).encode("utf-8", errors="surrogateescape")
+        else:
+            self.hashed_bytes += info.st_size
+            if self.hashed_bytes > MAX_HASH_BYTES:
+                raise Unsure("troppi file da verificare")
+            content = path.read_bytes()
+        if _blob_sha(content) != entry.sha:
+            self.changes.append(f" M {entry.path}")
+
+    def scan_untracked(self, rules: _IgnoreRules) -> None:
+        self._walk(self.repo_path, "", rules)
+
+    def _walk(self, directory: Path, rel_dir: str, rules: _IgnoreRules) -> None:
+        gitignore = directory / ".gitignore"
+        if gitignore.is_file():
+            rules = rules.extended(rel_dir, _read_lines(gitignore))
+        try:
+            children = sorted(os.scandir(directory), key=lambda item: item.name)
+        except OSError:
+            return
+        for child in children:
+            if self.full():
+                return
+            if child.name == ".git":
+                continue
+            rel = f"{rel_dir}/{child.name}" if rel_dir else child.name
+            is_dir = child.is_dir(follow_symlinks=False)
+            folded = self.fold(rel)
+            if is_dir:
+                if folded in self.tracked_dirs:
+                    self._walk(Path(child.path), rel, rules)
+                elif not rules.ignored(rel, True) and self._has_visible_file(Path(child.path), rel, rules):
+                    self.changes.append(f"?? {rel}/")
+            elif folded not in self.tracked and not rules.ignored(rel, False):
+                self.changes.append(f"?? {rel}")
+
+    def _has_visible_file(self, directory: Path, rel_dir: str, rules: _IgnoreRules) -> bool:
+        if (directory / ".git").exists():
+            return True  # nested repository: git lists it as an untracked directory
+        gitignore = directory / ".gitignore"
+        if gitignore.is_file():
+            rules = rules.extended(rel_dir, _read_lines(gitignore))
+        try:
+            children = list(os.scandir(directory))
+        except OSError:
+            return False
+        for child in children:
+            rel = f"{rel_dir}/{child.name}"
+            is_dir = child.is_dir(follow_symlinks=False)
+            if rules.ignored(rel, is_dir):
+                continue
+            if not is_dir or self._has_visible_file(Path(child.path), rel, rules):
+                return True
+        return False
+
+
+def _has_conversion_attributes(repo_path: Path, dirs: _GitDirs, config: Dict[str, str]) -> bool:
+    if config.get("core.autocrlf", "false").lower() not in ("false", "input"):
+        return True
+    attribute_files = [dirs.common_dir / "info" / "attributes", repo_path / ".gitattributes"]
+    for attributes in attribute_files:
+        for line in _read_lines(attributes):
+            stripped = line.strip()
+            if stripped and not stripped.startswith("#") and re.search(r"\b(filter|eol|text|ident|working-tree-encoding)\b", stripped):
+                return True
+    return False
+
+
+def read_repo_status(repo_path: Path) -> RepoStatus:
+    """Answers clean/dirty for ``repo_path`` without spawning git.
+
+    Returns ``state="unknown"`` (with a reason) whenever the answer would need
+    the git CLI: staged changes, submodules, split/sparse index, deltified
+    HEAD commit, conversion filters combined with ambiguous stat data, ...
+    """
+    try:
+        dirs = _resolve_git_dirs(repo_path)
+        config = _read_config(dirs)
+        if config.get("extensions.objectformat", "sha1").lower() != "sha1":
+            raise Unsure("object format non sha1")
+        entries, root_tree, index_mtime = _read_index(dirs)
+        head = _resolve_head(dirs)
+        if head is None:
+            if entries:
+                raise Unsure("file in stage su branch senza commit")
+        elif root_tree is None or root_tree != _head_tree(dirs, head):
+            raise Unsure("modifiche in stage o cache-tree non valida")
+
+        scan = _WorktreeScan(repo_path, entries, index_mtime, config)
+        scan.filtered = _has_conversion_attributes(repo_path, dirs, config)
+        scan.check_tracked()
+        show_untracked = config.get("status.showuntrackedfiles", "normal").lower()
+        if show_untracked != "no" and not scan.full():
+            scan.scan_untracked(_base_ignore_rules(dirs, config, scan.ignore_case))
+    except Unsure as exc:
+        return RepoStatus("unknown", reason=str(exc))
+    except (OSError, ValueError, struct.error, zlib.error, IndexError) as exc:
+        return RepoStatus("unknown", reason=f"lettura repository fallita: {exc}")
+
+    if not scan.changes:
+        return RepoStatus("clean")
+    changes = sorted(scan.changes, key=lambda line: (line.startswith("??"), line[3:]))
+    return RepoStatus("dirty", changes=changes)
@@ -0,0 +1,284 @@
+import asyncio
+import json
+import re
+import uuid
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Deque, Dict, List, Tuple
+
+from .status_engine import BroadcastHub, sse_message
+
+_JOB_ID = re.compile(r"^\d{14}-[0-9a-f]{8}$")
+FINAL_STATES = ("succeeded", "failed", "cancelled", "interrupted")
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat() + "Z"
+
+
+class Job:
+    def __init__(self, kind: str, title: str, params: dict, output_lines: int) -> None:
+        self.id = f"{datetime.utcnow():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self.kind = kind
+        self.title = title
+        self.params = params
+        self.status = "queued"
+        self.created_at = _now()
+        self.started_at: str | None = None
+        self.finished_at: str | None = None
+        self.result: dict | None = None
+        self.error: str | None = None
+        self.seq = 0
+        self.output: Deque[Tuple[int, str, str]] = deque(maxlen=output_lines)
+        self.items: List[dict] = []
+        self.hub = BroadcastHub(queue_size=1024)
+        self.done = asyncio.Event()
+        self.task: asyncio.Task | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINAL_STATES
+
+    def log(self, text: str, stream: str = "stdout") -> None:
+        for line in text.splitlines() or [""]:
+            self.seq += 1
+            self.output.append((self.seq, stream, line))
+            self.hub.publish("line", {"seq": self.seq, "stream": stream, "text": line}, self.seq)
+
+    def add_item(self, item: dict) -> None:
+        """Records the result of one item of a bulk action as soon as it completes."""
+        self.items.append(item)
+        self.hub.publish("item", item)
+
+    async def events(self):
+        """SSE messages: a snapshot (with the items done so far), then live events until ``end``."""
+        async with self.hub.subscribe() as queue:
+            snapshot = {**self.describe(), "items": self.items}
+            yield sse_message("job", json.dumps(snapshot, ensure_ascii=False, default=str).encode("utf-8"))
+            if self.finished:
+                yield sse_message("end", json.dumps(self.describe(), ensure_ascii=False, default=str).encode("utf-8"))
+                return
+            while True:
+                message = await queue.get()
+                if message is None:
+                    # Too slow to keep up: the client can fall back to polling /api/jobs/{id}.
+                    yield sse_message("lagged", json.dumps(self.describe(), ensure_ascii=False, default=str).encode("utf-8"))
+                    return
+                yield message
+                if self.finished and queue.empty():
+                    return
+
+    def describe(self, after: int | None = None) -> dict:
+        lines = [
+            {"seq": seq, "stream": stream, "text": text}
+            for seq, stream, text in self.output
+            if after is None or seq > after
+        ]
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "title": self.title,
+            "params": self.params,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+            "items_done": len(self.items),
+            "output_seq": self.seq,
+            "output_dropped": max(0, self.seq - len(self.output)),
+            "output": lines,
+        }
+
+
+JobRunner = Callable[[Job], Awaitable[dict]]
+
+
+class JobQueue:
+    """Runs dashboard actions in the background on a bounded worker pool.
+
+    ``submit`` returns immediately; ``workers`` jobs run at once and at most
+    ``max_pending`` wait in the queue. A runner returns a result dict
+    (``"ok": False`` marks the job failed) and may write progress with
+    ``job.log``; only the last ``output_lines`` lines are kept. Every state
+    change is written to ``root/<id>.json`` so results outlive the request
+    and the process.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        workers: int = 4,
+        max_pending: int = 100,
+        output_lines: int = 500,
+        retention: int = 200,
+    ) -> None:
+        self.root = root
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self.output_lines = output_lines
+        self.retention = retention
+        self._queue: asyncio.Queue | None = None
+        self._workers: List[asyncio.Task] = []
+        self._jobs: Dict[str, Job] = {}
+        self._runners: Dict[str, JobRunner] = {}
+        self.completed = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    async def start(self) -> None:
+        if self._workers:
+            return
+        self._recover()
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for job in list(self._jobs.values()):
+            if not job.finished:
+                self._finish(job, "interrupted", error="Dashboard arrestata")
+                if job.task is not None:
+                    job.task.cancel()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+    async def submit(self, kind: str, title: str, params: dict, runner: JobRunner) -> Job:
+        if not self._workers:
+            await self.start()
+        pending = sum(1 for job in self._jobs.values() if job.status == "queued")
+        if pending >= self.max_pending:
+            raise JobQueueFull()
+        job = Job(kind, title, params, self.output_lines)
+        self._jobs[job.id] = job
+        self._runners[job.id] = runner
+        self._persist(job)
+        self._queue.put_nowait(job)
+        return job
+
+    def get(self, job_id: str) -> Job | dict | None:
+        if not _JOB_ID.match(job_id):
+            return None
+        if job_id in self._jobs:
+            return self._jobs[job_id]
+        path = self.root / f"{job_id}.json"
+        if path.exists():
+            try:
+                return json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError):
+                return None
+        return None
+
+    def list(self, limit: int = 50, status: str | None = None) -> List[dict]:
+        jobs: Dict[str, dict] = {}
+        if self.root.exists():
+            for path in sorted(self.root.glob("*.json"), reverse=True)[: limit * 2]:
+                try:
+                    jobs[path.stem] = json.loads(path.read_text(encoding="utf-8"))
+                except (OSError, json.JSONDecodeError):
+                    continue
+        for job in self._jobs.values():
+            jobs[job.id] = job.describe()
+        items = [jobs[key] for key in sorted(jobs, reverse=True)]
+        if status:
+            items = [item for item in items if item.get("status") == status]
+        return [{**item, "output": []} for item in items[:limit]]
+
+    def cancel(self, job_id: str) -> Job | dict | None:
+        job = self.get(job_id)
+        if not isinstance(job, Job) or job.finished:
+            return job
+        if job.status == "queued":
+            self._finish(job, "cancelled")
+        elif job.task is not None:
+            job.task.cancel()
+        return job
+
+    def stats(self) -> dict:
+        statuses: Dict[str, int] = {}
+        for job in self._jobs.values():
+            statuses[job.status] = statuses.get(job.status, 0) + 1
+        return {"workers": self.workers, "max_pending": self.max_pending, "completed": self.completed, **statuses}
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            if job.status != "queued":
+                continue  # cancelled while waiting
+            runner = self._runners.pop(job.id)
+            job.status = "running"
+            job.started_at = _now()
+            self._persist(job)
+            job.task = asyncio.create_task(runner(job))
+            # asyncio.wait does not propagate the job's cancellation into the worker.
+            await asyncio.wait([job.task])
+            if job.finished:
+                continue
+            if job.task.cancelled():
+                self._finish(job, "cancelled")
+            elif job.task.exception() is not None:
+                self._finish(job, "failed", error=str(job.task.exception()) or type(job.task.exception()).__name__)
+            else:
+                result = job.task.result() or {}
+                self._finish(job, "succeeded" if result.get("ok", True) else "failed", result=result)
+
+    def _finish(self, job: Job, status: str, result: dict | None = None, error: str | None = None) -> None:
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = _now()
+        job.done.set()
+        job.hub.publish("end", job.describe())
+        self._runners.pop(job.id, None)
+        self.completed += 1
+        self._persist(job)
+        self._prune()
+
+    def _persist(self, job: Job) -> None:
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            path = self.root / f"{job.id}.json"
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(job.describe(), ensure_ascii=False, default=str), encoding="utf-8")
+            tmp_path.replace(path)
+        except OSError:
+            pass
+
+    def _recover(self) -> None:
+        """Jobs left queued/running by a previous process can't resume: mark them interrupted."""
+        if not self.root.exists():
+            return
+        for path in self.root.glob("*.json"):
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError):
+                continue
+            if data.get("status") in FINAL_STATES:
+                continue
+            data.update(status="interrupted", finished_at=_now(), error="Dashboard riavviata durante l'esecuzione")
+            try:
+                path.write_text(json.dumps(data, ensure_ascii=False, default=str), encoding="utf-8")
+            except OSError:
+                continue
+
+    def _prune(self) -> None:
+        finished = sorted(job_id for job_id, job in self._jobs.items() if job.finished)
+        for job_id in finished[: max(0, len(finished) - self.retention)]:
+            del self._jobs[job_id]
+        if not self.root.exists():
+            return
+        for path in sorted(self.root.glob("*.json"), reverse=True)[self.retention:]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
@@ -1,20 +1,90 @@
 import asyncio
 import os
 import json
+import signal
+import time
 import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import List, Literal, Optional
+from typing import Awaitable, Callable, Dict, List, Literal, Optional
 from urllib.parse import urlparse
 
-import httpx
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel, Field
 
-app = FastAPI(title="EWH Dev Dashboard", version="1.0.0")
+from .bucket_inventory import BucketInventory
+from .compose_stacks import (
+    DEPENDS_ON_LABEL,
+    ONEOFF_LABEL,
+    PROJECT_LABEL,
+    SERVICE_LABEL,
+    StackContainer,
+    dependency_waves,
+    stack_container,
+    stack_dependencies,
+)
+from .container_logs import LogFilter, LogTail, api_log_lines, cli_log_lines, parse_since
+from .container_stats import ContainerStatsSampler, parse_size
+from .db_growth import DatabaseGrowth
+from .docker_engine import ContainerCache, DockerEngineClient, DockerEngineError, docker_socket_path
+from .git_status import read_repo_status
+from .jobs import Job, JobQueue, JobQueueFull
+from .pg_hotspots import DatabaseHotspots
+from .pg_probe import PostgresProbeError, PostgresProbePool
+from .redis_probe import RedisProbeError, RedisProbePool, redact_redis_url
+from .repo_watcher import DEFAULT_IGNORED_DIRS, RepoWatcher
+from .s3_client import BucketUsage, S3Client, S3Error
+from .scalingo_api import ScalingoApiError, ScalingoClient
+from .script_runs import ScriptRun, ScriptRunStore
+from .status_engine import (
+    PROBE_KINDS,
+    CategorySnapshot,
+    CircuitBreakerRegistry,
+    ProbeScheduler,
+    ProviderResult,
+    StatusProvider,
+    StatusSnapshot,
+    StatusSnapshotEngine,
+    TargetHealth,
+    sse_message,
+)
+from .timeseries import TimeSeriesStore
+
+
+@asynccontextmanager
+async def _lifespan(_: FastAPI):
+    await JOBS.start()
+    await REPO_WATCHER.start()
+    if DOCKER_CONTAINERS is not None:
+        await DOCKER_CONTAINERS.start()
+    await CONTAINER_STATS.start()
+    DATABASE_GROWTH.load()
+    await DATABASE_HOTSPOTS.start()
+    await BUCKET_INVENTORY.start()
+    await STATUS_ENGINE.start()
+    try:
+        yield
+    finally:
+        await STATUS_ENGINE.stop()
+        await DATABASE_HOTSPOTS.stop()
+        await POSTGRES_PROBES.close()
+        await REDIS_PROBES.close()
+        await BUCKET_INVENTORY.stop()
+        await BUCKET_USAGE.close()
+        await SCALINGO_API.close()
+        DATABASE_GROWTH.save()
+        await CONTAINER_STATS.stop()
+        if DOCKER_CONTAINERS is not None:
+            await DOCKER_CONTAINERS.stop()
+        await REPO_WATCHER.stop()
+        await JOBS.stop()
+
+
+app = FastAPI(title="EWH Dev Dashboard", version="1.0.0", lifespan=_lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -31,6 +101,162 @@ TEMPLATES = Jinja2Templates(directory=str(APP_ROOT / "templates"))
 KNOWLEDGE_FILE = APP_ROOT / "data" / "knowledge.json"
 
 
+def _env_float(name: str, default: float) -> float:
+    raw = os.environ.get(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        return float(raw)
+    except ValueError:
+        return default
+
+
+STATUS_REFRESH_INTERVAL = _env_float("STATUS_REFRESH_INTERVAL", 30.0)
+STATUS_SNAPSHOT_TTL = _env_float("STATUS_SNAPSHOT_TTL", 120.0)
+
+STATUS_REFRESH_BUDGET = _env_float("STATUS_REFRESH_BUDGET", 25.0)
+STATUS_STREAM_KEEPALIVE = 15.0
+
+PROBE_DEFAULT_LIMITS = {"git": 8, "docker": 2, "postgres": 4, "redis": 4, "s3": 4, "scalingo": 6}
+PROBE_DEFAULT_TIMEOUTS = {"git": 10.0, "docker": 10.0, "postgres": 8.0, "redis": 5.0, "s3": 20.0, "scalingo": 15.0}
+PROBE_SCHEDULER = ProbeScheduler(
+    {
+        kind: int(_env_float(f"STATUS_PROBE_LIMIT_{kind.upper()}", PROBE_DEFAULT_LIMITS[kind]))
+        for kind in PROBE_KINDS
+    },
+    timeouts={
+        kind: _env_float(f"STATUS_PROBE_TIMEOUT_{kind.upper()}", PROBE_DEFAULT_TIMEOUTS[kind])
+        for kind in PROBE_KINDS
+    },
+    breakers=CircuitBreakerRegistry(
+        threshold=int(_env_float("STATUS_BREAKER_THRESHOLD", 2)),
+        base_backoff=_env_float("STATUS_BREAKER_BACKOFF", 60.0),
+        max_backoff=_env_float("STATUS_BREAKER_MAX_BACKOFF", 1800.0),
+    ),
+)
+
+POSTGRES_PROBES = PostgresProbePool(
+    max_size=int(_env_float("STATUS_PG_POOL_SIZE", 2)),
+    idle_timeout=_env_float("STATUS_PG_POOL_IDLE", 300.0),
+    command_timeout=PROBE_SCHEDULER.timeouts.get("postgres") or PROBE_DEFAULT_TIMEOUTS["postgres"],
+    native=os.environ.get("STATUS_PG_NATIVE", "1").strip().lower() not in ("0", "false", "no", "off"),
+)
+REDIS_PROBES = RedisProbePool(
+    max_size=int(_env_float("STATUS_REDIS_POOL_SIZE", 2)),
+    idle_timeout=_env_float("STATUS_REDIS_POOL_IDLE", 300.0),
+)
+SCALINGO_API = ScalingoClient(
+    timeout=PROBE_SCHEDULER.timeouts.get("scalingo") or PROBE_DEFAULT_TIMEOUTS["scalingo"],
+    max_connections=PROBE_SCHEDULER.limits.get("scalingo") or PROBE_DEFAULT_LIMITS["scalingo"],
+    rate=_env_float("SCALINGO_API_RATE", 5.0),
+    burst=int(_env_float("SCALINGO_API_BURST", 10)),
+    retries=int(_env_float("SCALINGO_API_RETRIES", 3)),
+)
+SCALINGO_REGION_TIMEOUT = _env_float("SCALINGO_REGION_TIMEOUT", 20.0)
+S3_NATIVE = os.environ.get("STATUS_S3_NATIVE", "1").strip().lower() not in ("0", "false", "no", "off")
+S3_CLIENT = S3Client(timeout=PROBE_SCHEDULER.timeouts.get("s3") or PROBE_DEFAULT_TIMEOUTS["s3"])
+BUCKET_USAGE = BucketUsage(
+    S3_CLIENT,
+    ttl=_env_float("STATUS_BUCKETS_USAGE_TTL", 3600.0),
+    concurrency=int(_env_float("STATUS_BUCKETS_SCAN_CONCURRENCY", 2)),
+)
+BUCKET_INVENTORY = BucketInventory(
+    S3_CLIENT,
+    Path(os.environ.get("STATUS_BUCKETS_INVENTORY_DIR", APP_ROOT / "data" / "bucket_inventory")).resolve(),
+    buckets=lambda: _read_config_list("STATUS_BUCKETS", "STATUS_BUCKETS_FILE") if S3_NATIVE else [],
+    endpoint=lambda: _resolve_bucket_endpoint(),
+    inventories=lambda: _bucket_inventory_locations(),
+    interval=_env_float("STATUS_BUCKETS_INVENTORY_INTERVAL", 86400.0),
+    depth=int(_env_float("STATUS_BUCKETS_PREFIX_DEPTH", 2)),
+)
+DATABASE_GROWTH = DatabaseGrowth(
+    Path(os.environ.get("STATUS_DB_GROWTH_FILE", APP_ROOT / "data" / "db_growth.json")).resolve(),
+    limits=lambda: _database_size_limits(),
+    window=_env_float("STATUS_DB_GROWTH_WINDOW_DAYS", 7.0) * 86400,
+)
+DATABASE_HOTSPOTS = DatabaseHotspots(
+    POSTGRES_PROBES,
+    targets=lambda: _manual_database_urls(),
+    interval=_env_float("STATUS_PG_HOTSPOTS_INTERVAL", 300.0),
+    top=int(_env_float("STATUS_PG_HOTSPOTS_TOP", 10)),
+    long_query_seconds=_env_float("STATUS_PG_LONG_QUERY_SECONDS", 30.0),
+    on_sample=lambda url, snapshot: DATABASE_GROWTH.record_tables(url, snapshot["tables"]),
+)
+
+GIT_NATIVE_STATUS = os.environ.get("STATUS_GIT_NATIVE", "1").strip().lower() not in ("0", "false", "no", "off")
+GIT_STATUS_STATS: Dict[str, object] = {"native": 0, "fallback": 0, "last_fallback_reason": None}
+GIT_RESCAN_INTERVAL = _env_float("STATUS_GIT_RESCAN_INTERVAL", 600.0)
+REPO_WATCHER = RepoWatcher(
+    mode=os.environ.get("STATUS_GIT_WATCH", "auto").strip().lower() or "auto",
+    ignored_dirs=[
+        name.strip()
+        for name in os.environ.get("STATUS_GIT_WATCH_IGNORE", ",".join(DEFAULT_IGNORED_DIRS)).split(",")
+        if name.strip()
+    ],
+    poll_interval=_env_float("STATUS_GIT_POLL_INTERVAL", 10.0),
+)
+_REPO_PROBE_CACHE: Dict[Path, tuple[float, dict, dict | None]] = {}
+
+SCRIPT_RUNS = ScriptRunStore(
+    Path(os.environ.get("SCRIPT_RUNS_DIR", APP_ROOT / "data" / "runs")).resolve(),
+    tail_lines=int(_env_float("SCRIPT_RUN_TAIL_LINES", 500)),
+    retention=int(_env_float("SCRIPT_RUN_RETENTION", 50)),
+)
+DOCKER_API_MODE = os.environ.get("DOCKER_API", "auto").strip().lower() or "auto"
+DOCKER_EVENT_DEBOUNCE = _env_float("DOCKER_EVENT_DEBOUNCE", 0.5)
+DOCKER_STACK_WAIT_TIMEOUT = _env_float("DOCKER_STACK_WAIT_TIMEOUT", 120.0)
+_DOCKER_REFRESH_TIMER: Dict[str, asyncio.TimerHandle] = {}
+
+
+def _on_docker_change() -> None:
+    # Bursts of container events (e.g. a bulk restart) collapse into one refresh of the docker card.
+    pending = _DOCKER_REFRESH_TIMER.pop("local_docker", None)
+    if pending is not None:
+        pending.cancel()
+    _DOCKER_REFRESH_TIMER["local_docker"] = asyncio.get_running_loop().call_later(
+        DOCKER_EVENT_DEBOUNCE, lambda: STATUS_ENGINE.request_refresh(["local_docker"])
+    )
+
+
+DOCKER_ENGINE = DockerEngineClient(docker_socket_path()) if DOCKER_API_MODE != "cli" else None
+DOCKER_CONTAINERS = ContainerCache(DOCKER_ENGINE, on_change=_on_docker_change) if DOCKER_ENGINE else None
+DOCKER_LOGS_BUFFER = int(_env_float("DOCKER_LOGS_BUFFER", 1000))
+DOCKER_LOGS_MAX_TAIL = int(_env_float("DOCKER_LOGS_MAX_TAIL", 50000))
+DOCKER_STATS_INTERVAL = _env_float("DOCKER_STATS_INTERVAL", 30.0)
+CONTAINER_USAGE = TimeSeriesStore(
+    resolution=DOCKER_STATS_INTERVAL or 30.0,
+    retention=_env_float("DOCKER_STATS_RETENTION", 3600.0),
+)
+
+
+async def _docker_stats_targets() -> List[dict] | None:
+    rows, _ = await _docker_rows()
+    return rows
+
+
+CONTAINER_STATS = ContainerStatsSampler(
+    CONTAINER_USAGE,
+    _docker_stats_targets,
+    client=DOCKER_ENGINE,
+    interval=DOCKER_STATS_INTERVAL,
+    concurrency=int(_env_float("DOCKER_STATS_CONCURRENCY", 2)),
+    history_points=int(_env_float("DOCKER_STATS_HISTORY_POINTS", 60)),
+)
+
+ACTION_CONCURRENCY = {
+    "docker": int(_env_float("ACTION_CONCURRENCY_DOCKER", 4)),
+    "scalingo": int(_env_float("ACTION_CONCURRENCY_SCALINGO", 4)),
+    "git": int(_env_float("ACTION_CONCURRENCY_GIT", 8)),
+}
+JOBS = JobQueue(
+    Path(os.environ.get("JOBS_DIR", APP_ROOT / "data" / "jobs")).resolve(),
+    workers=int(_env_float("JOB_WORKERS", 4)),
+    max_pending=int(_env_float("JOB_MAX_PENDING", 100)),
+    output_lines=int(_env_float("JOB_OUTPUT_LINES", 500)),
+    retention=int(_env_float("JOB_RETENTION", 200)),
+)
+
+
 class ScriptInfo(BaseModel):
     name: str
     path: str
@@ -46,6 +272,9 @@ class RunResult(BaseModel):
     exit_code: int
     stdout: str
     stderr: str
+    timed_out: bool = False
+    run_id: str | None = None
+    truncated: bool = False
 
 
 class KnowledgeCreate(BaseModel):
@@ -64,17 +293,28 @@ class PromptContentRequest(BaseModel):
     content: str
 
 
-class DockerActionRequest(BaseModel):
+class BulkActionOptions(BaseModel):
+    concurrency: int | None = Field(None, ge=1)
+    depends_on: Dict[str, List[str]] | None = None
+
+
+class DockerActionRequest(BulkActionOptions):
     action: Literal["start", "stop", "restart"]
     names: List[str] = Field(..., min_length=1)
 
 
-class ScalingoActionRequest(BaseModel):
+class DockerStackActionRequest(BaseModel):
+    action: Literal["start", "stop", "restart"]
+    stacks: List[str] = Field(..., min_length=1)
+    concurrency: int | None = Field(None, ge=1)
+
+
+class ScalingoActionRequest(BulkActionOptions):
     action: Literal["restart"]
     names: List[str] = Field(..., min_length=1)
 
 
-class GitActionRequest(BaseModel):
+class GitActionRequest(BulkActionOptions):
     action: Literal["status", "pull", "fetch"]
     repos: List[str] = Field(..., min_length=1)
 
@@ -162,30 +402,180 @@ async def list_scripts() -> List[ScriptInfo]:
     return scripts
 
 
-@app.post("/api/scripts/{script_name}/run", response_model=RunResult)
-async def run_script(script_name: str, payload: RunRequest | None = None) -> RunResult:
+def _run_event_stream(events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _script_job_events(job: Job, run_ready: asyncio.Future):
+    yield sse_message("job", json.dumps(job.describe(), ensure_ascii=False).encode("utf-8"))
+    job_done = asyncio.create_task(job.done.wait())
+    try:
+        await asyncio.wait([run_ready, job_done], return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        job_done.cancel()
+    if not run_ready.done():
+        # Cancelled while still queued: no process was ever started.
+        yield sse_message("end", json.dumps(job.describe(), ensure_ascii=False).encode("utf-8"))
+        return
+    async for message in run_ready.result().events():
+        yield message
+
+
+@app.post(
+    "/api/scripts/{script_name}/run",
+    response_model=RunResult,
+    responses={503: {"description": "Troppi lavori in coda (JOB_MAX_PENDING), riprova più tardi"}},
+)
+async def run_script(
+    script_name: str,
+    payload: RunRequest | None = None,
+    stream: bool = False,
+    background: bool = False,
+):
     script_path = _ensure_safe_script(script_name)
     args = payload.args if payload and payload.args else []
-    cmd = [str(script_path), *args]
+    run_ready: asyncio.Future = asyncio.get_running_loop().create_future()
 
-    process = await asyncio.create_subprocess_exec(
-        *cmd,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-        cwd=str(SCRIPTS_ROOT),
-    )
-    stdout_bytes, stderr_bytes = await process.communicate()
-    stdout = stdout_bytes.decode("utf-8", errors="replace")
-    stderr = stderr_bytes.decode("utf-8", errors="replace")
+    async def runner(job: Job) -> dict:
+        run = SCRIPT_RUNS.start(script_path, args, SCRIPTS_ROOT, listener=lambda stream, text: job.log(text, stream))
+        run_ready.set_result(run)
+        try:
+            await run.wait()
+        except asyncio.CancelledError:
+            run.task.cancel()
+            await run.wait()
+            raise
+        return {
+            "ok": run.exit_code == 0,
+            "run_id": run.id,
+            "exit_code": run.exit_code,
+            "truncated": run.truncated(),
+            "output_url": f"/api/scripts/runs/{run.id}/output",
+        }
 
+    # Scripts always go through the job pool, so concurrent runs stay bounded.
+    job = await _submit_job("script", script_name, {"script": script_name, "args": args}, runner)
+    if background:
+        return JSONResponse(status_code=202, content=job.describe())
+    if stream:
+        return _run_event_stream(_script_job_events(job, run_ready))
+
+    # The job keeps running (and spooling) even if the client goes away.
+    await job.done.wait()
+    if not run_ready.done():
+        return RunResult(script=script_name, exit_code=-1, stdout="", stderr=job.error or "Esecuzione annullata")
+    run = run_ready.result()
+    await run.wait()
     return RunResult(
         script=script_name,
-        exit_code=process.returncode,
-        stdout=stdout,
-        stderr=stderr,
+        exit_code=run.exit_code if run.exit_code is not None else -1,
+        stdout=run.tail("stdout"),
+        stderr=run.tail("stderr"),
+        run_id=run.id,
+        truncated=run.truncated(),
     )
 
 
+def _get_script_run(run_id: str) -> ScriptRun | dict:
+    run = SCRIPT_RUNS.get(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Esecuzione non trovata")
+    return run
+
+
+@app.get("/api/scripts/runs")
+async def list_script_runs(limit: int = 50) -> List[dict]:
+    return SCRIPT_RUNS.list(limit=max(1, min(limit, 500)))
+
+
+@app.get("/api/scripts/runs/{run_id}")
+async def get_script_run(run_id: str) -> dict:
+    run = _get_script_run(run_id)
+    if isinstance(run, dict):
+        return run
+    return {**run.describe(), "stdout_tail": run.tail("stdout"), "stderr_tail": run.tail("stderr")}
+
+
+@app.get("/api/scripts/runs/{run_id}/output")
+async def get_script_run_output(run_id: str) -> FileResponse:
+    _get_script_run(run_id)
+    output_path = SCRIPT_RUNS.output_path(run_id)
+    if output_path is None:
+        raise HTTPException(status_code=404, detail="Output non disponibile")
+    return FileResponse(output_path, media_type="text/plain; charset=utf-8", filename=output_path.name)
+
+
+@app.get("/api/scripts/runs/{run_id}/stream")
+async def stream_script_run(run_id: str) -> StreamingResponse:
+    run = _get_script_run(run_id)
+    if isinstance(run, dict):
+        # Run from a previous process: only its metadata and spooled output are left.
+        async def finished_events():
+            data = json.dumps(run, ensure_ascii=False).encode("utf-8")
+            yield sse_message("run", data)
+            yield sse_message("end", data)
+
+        return _run_event_stream(finished_events())
+    return _run_event_stream(run.events())
+
+
+def _get_job(job_id: str) -> Job | dict:
+    job = JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Lavoro non trovato")
+    return job
+
+
+@app.get("/api/jobs")
+async def list_jobs(limit: int = 50, status: str | None = None) -> List[dict]:
+    return JOBS.list(limit=max(1, min(limit, 500)), status=status)
+
+
+@app.get("/api/jobs/stats")
+async def get_jobs_stats() -> dict:
+    return JOBS.stats()
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str, after: int | None = None) -> dict:
+    job = _get_job(job_id)
+    if isinstance(job, dict):
+        if after is not None:
+            job = {**job, "output": [line for line in job.get("output", []) if line["seq"] > after]}
+        return job
+    return job.describe(after=after)
+
+
+@app.get("/api/jobs/{job_id}/stream")
+async def stream_job(job_id: str) -> StreamingResponse:
+    job = _get_job(job_id)
+    if isinstance(job, dict):
+        async def finished_events():
+            data = json.dumps(job, ensure_ascii=False).encode("utf-8")
+            yield sse_message("job", data)
+            yield sse_message("end", data)
+
+        return _run_event_stream(finished_events())
+    return _job_event_stream(job)
+
+
+@app.post("/api/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str) -> dict:
+    job = _get_job(job_id)
+    if isinstance(job, dict):
+        raise HTTPException(status_code=409, detail="Lavoro già concluso")
+    JOBS.cancel(job_id)
+    try:
+        await asyncio.wait_for(job.done.wait(), timeout=5)
+    except asyncio.TimeoutError:
+        pass
+    return job.describe()
+
+
 async def _run_command(command: List[str], cwd: Path | None = None) -> RunResult:
     try:
         process = await asyncio.create_subprocess_exec(
@@ -193,8 +583,19 @@ async def _run_command(command: List[str], cwd: Path | None = None) -> RunResult
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
             cwd=str(cwd) if cwd else None,
+            start_new_session=True,
         )
-        stdout_bytes, stderr_bytes = await process.communicate()
+        try:
+            stdout_bytes, stderr_bytes = await process.communicate()
+        except asyncio.CancelledError:
+            # Probe deadlines cancel us: kill the whole process group so that
+            # wrappers (aws, scalingo) do not leave grandchildren holding the pipes.
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            await process.wait()
+            raise
         stdout = stdout_bytes.decode("utf-8", errors="replace")
         stderr = stderr_bytes.decode("utf-8", errors="replace")
         exit_code = process.returncode
@@ -215,6 +616,16 @@ async def _run_command(command: List[str], cwd: Path | None = None) -> RunResult
     )
 
 
+def _timeout_result(command: List[str], elapsed: float) -> RunResult:
+    return RunResult(
+        script=" ".join(command),
+        exit_code=-1,
+        stdout="",
+        stderr=_timeout_details(elapsed),
+        timed_out=True,
+    )
+
+
 def _read_config_list(env_var: str, file_env_var: str | None = None) -> List[str]:
     items: List[str] = []
     raw = os.environ.get(env_var, "")
@@ -280,12 +691,44 @@ def _status_entry(label: str, status: str, details: str, hint: str | None = None
     return entry
 
 
+def _timeout_details(elapsed: float) -> str:
+    return f"Nessuna risposta entro {elapsed:.0f}s"
+
+
+def _timeout_entry(label: str, elapsed: float, **extra: object) -> dict:
+    return _status_entry(label, "timeout", _timeout_details(elapsed), meta="Timeout", **extra)
+
+
+def _probe_failed(result: object) -> bool:
+    if isinstance(result, dict) and "status" in result:
+        return result.get("status") in ("error", "timeout")
+    if isinstance(result, (tuple, list)):
+        return any(_probe_failed(item) for item in result if isinstance(item, dict))
+    return False
+
+
+def _addon_fetch_failed(entries: List[dict]) -> bool:
+    return any(entry.get("meta") in ("Timeout", "Errore API", "Errore CLI") for entry in entries)
+
+
+def _with_circuit_info(result: object, health: TargetHealth) -> object:
+    info = health.describe()
+    if isinstance(result, dict):
+        decorated = {**result, "circuit": info}
+        if "label" in result:
+            decorated["hint"] = f"Target non raggiungibile: ultimo esito in cache, nuovo controllo tra {info.get('retry_in', 0)}s"
+        return decorated
+    if isinstance(result, (tuple, list)):
+        return type(result)(_with_circuit_info(item, health) for item in result)
+    return result
+
+
 def _overall_status(entries: List[dict], default: str = "info") -> str:
     if not entries:
         return default
     if any(e.get("status") == "error" for e in entries):
         return "error"
-    if any(e.get("status") == "warn" for e in entries):
+    if any(e.get("status") in ("warn", "timeout") for e in entries):
         return "warn"
     if any(e.get("status") == "ok" for e in entries):
         return "ok"
@@ -316,9 +759,12 @@ def _compute_environment_metrics(categories: List[dict]) -> tuple[dict, List[dic
         environment = card.get("environment")
         if environment not in {"local", "staging", "production"}:
             continue
-        env_metrics = metrics.setdefault(environment, {"total": 0, "ok": 0, "warn": 0, "error": 0})
+        env_metrics = metrics.setdefault(environment, {"total": 0, "ok": 0, "warn": 0, "error": 0, "timeout": 0})
         for entry in card.get("entries", []):
             status = (entry.get("status") or "").lower()
+            if status == "timeout":
+                env_metrics["timeout"] += 1
+                status = "warn"
             if status not in {"ok", "warn", "error"}:
                 continue
             env_metrics["total"] += 1
@@ -341,10 +787,10 @@ def _compute_environment_metrics(categories: List[dict]) -> tuple[dict, List[dic
 
 
 def _status_counters(entries: List[dict]) -> dict[str, int]:
-    counters = {"total": len(entries), "ok": 0, "warn": 0, "error": 0}
+    counters = {"total": len(entries), "ok": 0, "warn": 0, "error": 0, "timeout": 0}
     for entry in entries:
         status = (entry.get("status") or "").lower()
-        if status in {"ok", "warn", "error"}:
+        if status in {"ok", "warn", "error", "timeout"}:
             counters[status] += 1
     return counters
 
@@ -521,41 +967,7 @@ async def _measure_bucket_usage(bucket: str, endpoint: str | None) -> dict:
     return usage
 
 
-async def _measure_database_usage(db_url: str) -> dict:
-    stats_query = (
-        "SELECT pg_database_size(current_database()), "
-        "SUM(CASE WHEN relkind = 'r' THEN reltuples ELSE 0 END)::bigint "
-        "FROM pg_class;"
-    )
-    result = await _run_command(["psql", db_url, "-At", "-c", stats_query], cwd=None)
-    environment = _guess_environment_from_db_url(db_url)
-    if result.exit_code != 0:
-        detail = result.stderr or result.stdout or "Errore interrogazione"
-        return {"url": db_url, "status": "error", "environment": environment, "error": detail.strip(), "type": "manual"}
-    line = (result.stdout or "").strip().splitlines()
-    if not line:
-        return {"url": db_url, "status": "error", "environment": environment, "error": "Risposta vuota"}
-    first = line[0]
-    size_str, _, rows_str = first.partition("|")
-    try:
-        size = int(float(size_str)) if size_str else 0
-    except ValueError:
-        size = 0
-    try:
-        rows = int(float(rows_str)) if rows_str else 0
-    except ValueError:
-        rows = 0
-    return {
-        "url": db_url,
-        "status": "ok",
-        "environment": environment,
-        "size_bytes": size,
-        "row_estimate": rows,
-        "type": "manual",
-    }
-
-
-def _parse_scalingo_apps(output: str) -> List[dict]:
+def _parse_scalingo_apps(output: str, region: str | None = None) -> List[dict]:
     entries: List[dict] = []
     for line in output.splitlines():
         line = line.strip()
@@ -583,7 +995,7 @@ def _parse_scalingo_apps(output: str) -> List[dict]:
                 status,
                 details,
                 meta=status_txt,
-                target={"type": "scalingo_app", "id": name},
+                target={"type": "scalingo_app", "id": f"{region}/{name}" if region else name},
                 actions=["restart"],
             )
         )
@@ -622,7 +1034,7 @@ def _parse_scalingo_addons_cli(app_name: str, output: str) -> List[dict]:
     return entries
 
 
-def _load_scalingo_credentials() -> tuple[str | None, str]:
+def _load_scalingo_credentials() -> tuple[str | None, List[tuple[str, str]]]:
     token = os.environ.get("SCALINGO_API_TOKEN")
     region = os.environ.get("SCALINGO_REGION", "osc-fr1")
     base_url = os.environ.get("SCALINGO_API_URL")
@@ -637,26 +1049,57 @@ def _load_scalingo_credentials() -> tuple[str | None, str]:
         except json.JSONDecodeError:
             pass
 
+    regions: List[tuple[str, str]] = []
+    for item in _read_config_list("SCALINGO_REGIONS", "SCALINGO_REGIONS_FILE"):
+        name, _, url = item.partition("=")
+        if name:
+            regions.append((name, (url or f"https://api.{name}.scalingo.com").rstrip("/")))
+    if regions:
+        return token, regions
+
     if not base_url:
         base_url = f"https://api.{region}.scalingo.com" if region else "https://api.osc-fr1.scalingo.com"
 
-    return token, base_url.rstrip("/")
+    return token, [(region or "osc-fr1", base_url.rstrip("/"))]
+
 
+async def _across_scalingo_regions(
+    fetch: Callable[[str | None, str, str], Awaitable[tuple[List[dict], str | None]]],
+) -> tuple[List[dict], str | None]:
+    token, regions = _load_scalingo_credentials()
+    tagged = len(regions) > 1
 
-async def _fetch_scalingo_via_api() -> tuple[List[dict], str | None]:
-    token, base_url = _load_scalingo_credentials()
+    async def fetch_region(region: str, base_url: str) -> tuple[List[dict], str | None]:
+        timeout = SCALINGO_REGION_TIMEOUT
+        remaining = PROBE_SCHEDULER.remaining()
+        if remaining is not None:
+            timeout = min(timeout, remaining)
+        started = time.monotonic()
+        try:
+            entries, error = await asyncio.wait_for(fetch(token, region, base_url), timeout)
+        except asyncio.TimeoutError:
+            entries, error = [_timeout_entry(f"Scalingo {region}", time.monotonic() - started)], None
+        tagged_entries = []
+        for entry in entries:
+            # Fetchers may hand out cached entries: tag copies, never the originals.
+            entry = {**entry, "region": region}
+            if tagged and "Region:" not in (entry.get("details") or ""):
+                entry["details"] = f"{entry.get('details') or ''} · Region: {region}".lstrip(" ·")
+            tagged_entries.append(entry)
+        return tagged_entries, f"{region}: {error}" if error and tagged else error
+
+    results = await asyncio.gather(*(fetch_region(region, base_url) for region, base_url in regions))
+    entries = [entry for region_entries, _ in results for entry in region_entries]
+    errors = [error for _, error in results if error]
+    return entries, " · ".join(errors) or None
+
+
+async def _fetch_scalingo_via_api(token: str | None, base_url: str) -> tuple[List[dict], str | None]:
     if not token:
         return [], "Imposta SCALINGO_API_TOKEN o la config locale"
 
-    url = f"{base_url}/v1/apps"
-    headers = {"Authorization": f"Bearer {token}", "Accept": "application/json"}
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.get(url, headers=headers)
-        if resp.status_code != 200:
-            return [], f"API Scalingo ha risposto {resp.status_code}: {resp.text[:200]}"
-        data = resp.json()
-        apps = data.get("apps", [])
+        apps = await SCALINGO_API.apps(base_url, token)
         entries: List[dict] = []
         for app in apps:
             name = app.get("name", "(sconosciuto)")
@@ -680,27 +1123,34 @@ async def _fetch_scalingo_via_api() -> tuple[List[dict], str | None]:
                 details += f" · {description}"
             entries.append(_status_entry(name, status, details))
         return entries, None
-    except httpx.HTTPError as exc:
-        return [], f"Errore HTTP Scalingo API: {exc}"
+    except ScalingoApiError as exc:
+        return [], str(exc)
 
 
-async def _scalingo_status() -> tuple[List[dict], str | None]:
-    entries, error = await _fetch_scalingo_via_api()
+async def _scalingo_region_status(token: str | None, region: str, base_url: str) -> tuple[List[dict], str | None]:
+    entries, error = await _fetch_scalingo_via_api(token, base_url)
     if entries:
         return entries, error
     if error:
         # API fallback to CLI only if CLI available
-        cli_res = await _run_command(["scalingo", "apps"])
+        cli_res = await _run_command(["scalingo", "--region", region, "apps"])
         if cli_res.exit_code == 0 and cli_res.stdout.strip():
-            return _parse_scalingo_apps(cli_res.stdout), None
+            return _parse_scalingo_apps(cli_res.stdout, region), None
         cli_error = cli_res.stderr or cli_res.stdout or "CLI Scalingo non disponibile"
         hint = "Configura SCALINGO_API_TOKEN (o la config locale) o installa la CLI nel container"
         return [_status_entry("scalingo", "error", cli_error, meta="Errore", hint=hint)], error
     return entries, None
 
 
+async def _scalingo_status() -> tuple[List[dict], str | None]:
+    return await _across_scalingo_regions(_scalingo_region_status)
+
+
 async def _fetch_scalingo_postgres_addons_cli(region: str) -> tuple[List[dict], str | None]:
-    apps_res = await _run_command(["scalingo", "--region", region, "apps"])
+    apps_cmd = ["scalingo", "--region", region, "apps"]
+    apps_res = await PROBE_SCHEDULER.run(
+        "scalingo", lambda: _run_command(apps_cmd), on_timeout=lambda elapsed: _timeout_result(apps_cmd, elapsed)
+    )
     if apps_res.exit_code != 0 or not apps_res.stdout.strip():
         error = apps_res.stderr or apps_res.stdout or "CLI Scalingo non disponibile"
         return [], error
@@ -709,18 +1159,22 @@ async def _fetch_scalingo_postgres_addons_cli(region: str) -> tuple[List[dict],
     if not app_names:
         return [], "Nessuna app trovata via CLI"
 
-    semaphore = asyncio.Semaphore(4)
-
     async def fetch_for_app(app_name: str) -> List[dict]:
-        async with semaphore:
-            addons_res = await _run_command(["scalingo", "--region", region, "-a", app_name, "addons"])
+        addons_res = await _run_command(["scalingo", "--region", region, "-a", app_name, "addons"])
         if addons_res.exit_code != 0:
             details = addons_res.stderr or addons_res.stdout or "Errore CLI addons"
-            return [_status_entry(app_name, "error", details)]
+            return [_status_entry(app_name, "error", details, meta="Errore CLI")]
         return _parse_scalingo_addons_cli(app_name, addons_res.stdout)
 
-    tasks = [asyncio.create_task(fetch_for_app(name)) for name in app_names]
-    results = await asyncio.gather(*tasks)
+    results = await PROBE_SCHEDULER.map(
+        "scalingo",
+        app_names,
+        fetch_for_app,
+        on_timeout=lambda name, elapsed: [_timeout_entry(name, elapsed)],
+        target=lambda name: f"cli/{region}/{name}/addons",
+        is_failure=_addon_fetch_failed,
+        on_open=_with_circuit_info,
+    )
     entries: List[dict] = [entry for bucket in results for entry in bucket]
 
     if not entries:
@@ -728,61 +1182,69 @@ async def _fetch_scalingo_postgres_addons_cli(region: str) -> tuple[List[dict],
     return entries, None
 
 
-async def _fetch_scalingo_postgres_addons() -> tuple[List[dict], str | None]:
-    token, base_url = _load_scalingo_credentials()
-    region = os.environ.get("SCALINGO_REGION", "osc-fr1")
+def _scalingo_addon_entries(app: dict, app_name: str, addons: List[dict]) -> List[dict]:
+    entries: List[dict] = []
+    for addon in addons:
+        provider = addon.get("addon_provider", {}).get("name", "")
+        if "postgres" not in provider.lower():
+            continue
+        status_txt = addon.get("state") or addon.get("status") or "sconosciuto"
+        status_lower = str(status_txt).lower()
+        if status_lower in ("running", "available", "provisioned"):
+            status = "ok"
+        elif any(token in status_lower for token in ["provision", "start", "build", "pending"]):
+            status = "warn"
+        else:
+            status = "error"
+        plan = addon.get("plan", {}).get("name")
+        addon_region = addon.get("region") or app.get("region") or addon.get("provider_region")
+        addon_name = addon.get("name") or addon.get("id") or provider
+        details = f"App: {app_name} · Plan: {plan or '?'} · Status: {status_txt}"
+        if addon_region:
+            details += f" · Region: {addon_region}"
+        entries.append(
+            _status_entry(
+                addon_name,
+                status,
+                details,
+                meta=status_txt,
+            )
+        )
+    return entries
+
 
+async def _fetch_scalingo_region_addons(token: str | None, region: str, base_url: str) -> tuple[List[dict], str | None]:
     api_error_msg: str | None = None
 
     if token:
-        headers = {"Authorization": f"Bearer {token}", "Accept": "application/json"}
         entries: List[dict] = []
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            try:
-                apps_resp = await client.get(f"{base_url}/v1/apps", headers=headers)
-                apps_resp.raise_for_status()
-                apps = apps_resp.json().get("apps", [])
-            except httpx.HTTPError as exc:
-                api_error_msg = f"Errore HTTP Scalingo API (apps): {exc}"
-            else:
-                for app in apps:
-                    app_name = app.get("name")
-                    if not app_name:
-                        continue
-                    try:
-                        addons_resp = await client.get(f"{base_url}/v1/apps/{app_name}/addons", headers=headers)
-                        addons_resp.raise_for_status()
-                        addons = addons_resp.json().get("addons", [])
-                    except httpx.HTTPError as exc:
-                        entries.append(_status_entry(app_name, "error", f"Errore addons: {exc}"))
-                        continue
-
-                    for addon in addons:
-                        provider = addon.get("addon_provider", {}).get("name", "")
-                        if "postgres" not in provider.lower():
-                            continue
-                        status_txt = addon.get("state") or addon.get("status") or "sconosciuto"
-                        status_lower = str(status_txt).lower()
-                        if status_lower in ("running", "available", "provisioned"):
-                            status = "ok"
-                        elif any(token in status_lower for token in ["provision", "start", "build", "pending"]):
-                            status = "warn"
-                        else:
-                            status = "error"
-                        plan = addon.get("plan", {}).get("name")
-                        addon_region = addon.get("region") or app.get("region") or addon.get("provider_region")
-                        addon_name = addon.get("name") or addon.get("id") or provider
-                        details = f"App: {app_name} · Plan: {plan or '?'} · Status: {status_txt}"
-                        if addon_region:
-                            details += f" · Region: {addon_region}"
-                        entries.append(
-                            _status_entry(
-                                addon_name,
-                                status,
-                                details,
-                                meta=status_txt,
-                            )
-                        )
+        try:
+            apps = await PROBE_SCHEDULER.run("scalingo", lambda: SCALINGO_API.apps(base_url, token))
+        except asyncio.TimeoutError:
+            api_error_msg = "API Scalingo (apps) non ha risposto in tempo"
+        except ScalingoApiError as exc:
+            api_error_msg = f"{exc} (apps)"
+        else:
+
+            async def fetch_for_app(app: dict) -> List[dict]:
+                app_name = app.get("name")
+                try:
+                    addons = await SCALINGO_API.addons(base_url, token, app_name)
+                except ScalingoApiError as exc:
+                    return [_status_entry(app_name, "error", f"Errore addons: {exc}", meta="Errore API")]
+                return _scalingo_addon_entries(app, app_name, addons)
+
+            named_apps = [app for app in apps if app.get("name")]
+            for app_entries in await PROBE_SCHEDULER.map(
+                "scalingo",
+                named_apps,
+                fetch_for_app,
+                on_timeout=lambda app, elapsed: [_timeout_entry(app.get("name"), elapsed)],
+                target=lambda app: f"{base_url}/{app.get('name')}/addons",
+                is_failure=_addon_fetch_failed,
+                on_open=_with_circuit_info,
+            ):
+                entries.extend(app_entries)
 
         if entries:
             return entries, None
@@ -797,6 +1259,10 @@ async def _fetch_scalingo_postgres_addons() -> tuple[List[dict], str | None]:
     return cli_entries, cli_error or api_error_msg
 
 
+async def _fetch_scalingo_postgres_addons() -> tuple[List[dict], str | None]:
+    return await _across_scalingo_regions(_fetch_scalingo_region_addons)
+
+
 @app.get("/", response_class=HTMLResponse)
 async def root(request: Request) -> HTMLResponse:
     return TEMPLATES.TemplateResponse(
@@ -887,52 +1353,341 @@ def _docker_command_for_action(action: str, name: str) -> List[str]:
     raise ValueError(f"Azione docker non supportata: {action}")
 
 
+def _bulk_dependencies(
+    options: BulkActionOptions,
+    targets: List[tuple[str, List[str], Path | None]],
+    aliases: Dict[str, str] | None = None,
+) -> Dict[str, List[str]]:
+    known = {target for target, _, _ in targets}
+    aliases = aliases or {}
+
+    def resolve(name: str) -> str:
+        target = aliases.get(name, name)
+        if target not in known:
+            raise HTTPException(status_code=400, detail=f"Dipendenza su un elemento non selezionato: {name}")
+        return target
+
+    dependencies = {
+        resolve(name): sorted({resolve(dep) for dep in deps if dep})
+        for name, deps in (options.depends_on or {}).items()
+    }
+    visiting: set[str] = set()
+    visited: set[str] = set()
+
+    def visit(target: str) -> None:
+        if target in visited:
+            return
+        if target in visiting:
+            raise HTTPException(status_code=400, detail=f"Dipendenze cicliche che coinvolgono: {target}")
+        visiting.add(target)
+        for dep in dependencies.get(target, []):
+            visit(dep)
+        visiting.discard(target)
+        visited.add(target)
+
+    for target in dependencies:
+        visit(target)
+    return dependencies
+
+
+def _bulk_concurrency(kind: str, options: BulkActionOptions) -> int:
+    limit = ACTION_CONCURRENCY[kind]
+    return max(1, min(options.concurrency or limit, limit))
+
+
+async def _run_docker_command(command: List[str], cwd: Path | None = None) -> RunResult:
+    if DOCKER_ENGINE is not None and DOCKER_ENGINE.available:
+        _, action, name = command
+        try:
+            changed = await DOCKER_ENGINE.container_action(name, action)
+        except DockerEngineError as exc:
+            if exc.status_code is not None:
+                return RunResult(script="docker", exit_code=1, stdout="", stderr=str(exc))
+            # Socket not reachable: let the CLI try.
+        else:
+            stdout = f"{name}\n" if changed else f"{name} (nessuna modifica: già nello stato richiesto)\n"
+            return RunResult(script="docker", exit_code=0, stdout=stdout, stderr="")
+    return await _run_command(command, cwd=cwd)
+
+
+async def _run_action_commands(
+    action: str,
+    key: str,
+    targets: List[tuple[str, List[str], Path | None]],
+    job: Job | None = None,
+    concurrency: int = 1,
+    dependencies: Dict[str, List[str]] | None = None,
+    execute: Callable[[List[str], Path | None], Awaitable[RunResult]] = _run_command,
+    settle: Callable[[List[str], RunResult], Awaitable[RunResult]] | None = None,
+) -> dict:
+    # ``settle`` runs after the concurrency slot is released, so waiting there does not block other items.
+    dependencies = dependencies or {}
+    semaphore = asyncio.Semaphore(concurrency)
+    finished = {target: asyncio.Event() for target, _, _ in targets}
+    exit_codes: Dict[str, int] = {}
+
+    async def run_item(target: str, command: List[str], cwd: Path | None) -> dict:
+        try:
+            deps = dependencies.get(target, [])
+            for dep in deps:
+                await finished[dep].wait()
+            failed_deps = [dep for dep in deps if exit_codes.get(dep) != 0]
+            if failed_deps:
+                run_result = RunResult(
+                    script=command[0],
+                    exit_code=-1,
+                    stdout="",
+                    stderr=f"Saltato: dipendenza non riuscita ({', '.join(failed_deps)})",
+                )
+            else:
+                async with semaphore:
+                    try:
+                        if job is not None:
+                            job.log(f"$ {' '.join(command)}")
+                        run_result = await execute(command, cwd)
+                    except Exception as exc:
+                        run_result = RunResult(script=command[0], exit_code=-1, stdout="", stderr=f"Errore: {exc}")
+                if settle is not None and run_result.exit_code == 0:
+                    try:
+                        run_result = await settle(command, run_result)
+                    except Exception as exc:
+                        run_result = RunResult(
+                            script=command[0], exit_code=-1, stdout=run_result.stdout, stderr=f"Errore: {exc}"
+                        )
+            item = {
+                key: target,
+                "action": action,
+                "exit_code": run_result.exit_code,
+                "stdout": run_result.stdout,
+                "stderr": run_result.stderr,
+                "skipped": bool(failed_deps),
+            }
+            exit_codes[target] = run_result.exit_code
+            if job is not None:
+                try:
+                    if run_result.stdout.strip():
+                        job.log(run_result.stdout.rstrip("\n"))
+                    if run_result.stderr.strip():
+                        job.log(run_result.stderr.rstrip("\n"), stream="stderr")
+                    job.add_item(item)
+                except Exception as exc:
+                    item["stderr"] = f"{item['stderr']}\nErrore registrazione job: {exc}".lstrip("\n")
+            return item
+        finally:
+            # Dependents must always wake up; without an exit code they are reported as skipped.
+            exit_codes.setdefault(target, -1)
+            finished[target].set()
+
+    results = await asyncio.gather(*(run_item(target, command, cwd) for target, command, cwd in targets))
+    return {"action": action, "results": results, "ok": all(item["exit_code"] == 0 for item in results)}
+
+
+async def _submit_job(kind: str, title: str, params: dict, runner) -> Job:
+    try:
+        return await JOBS.submit(kind, title, params, runner)
+    except JobQueueFull as exc:
+        raise HTTPException(status_code=503, detail="Troppi lavori in coda, riprova più tardi") from exc
+
+
+def _job_event_stream(job: Job) -> StreamingResponse:
+    return _run_event_stream(job.events())
+
+
+async def _dispatch_action(kind: str, title: str, params: dict, runner, background: bool, stream: bool = False):
+    if not background and not stream:
+        return await runner(None)
+    job = await _submit_job(kind, title, params, runner)
+    if stream:
+        return _job_event_stream(job)
+    return JSONResponse(status_code=202, content=job.describe())
+
+
 @app.post("/api/docker/containers/actions")
-async def docker_containers_actions(payload: DockerActionRequest) -> dict:
+async def docker_containers_actions(payload: DockerActionRequest, background: bool = False, stream: bool = False):
     unique_names = sorted({name for name in payload.names if name})
     if not unique_names:
         raise HTTPException(status_code=400, detail="Nessun container selezionato")
 
-    results: List[dict] = []
+    targets = []
     for name in unique_names:
         try:
-            command = _docker_command_for_action(payload.action, name)
+            targets.append((name, _docker_command_for_action(payload.action, name), None))
         except ValueError as exc:  # pragma: no cover - guard for literals
             raise HTTPException(status_code=400, detail=str(exc)) from exc
-        run_result = await _run_command(command)
-        results.append(
-            {
-                "name": name,
-                "action": payload.action,
-                "exit_code": run_result.exit_code,
-                "stdout": run_result.stdout,
-                "stderr": run_result.stderr,
-            }
+
+    concurrency = _bulk_concurrency("docker", payload)
+    dependencies = _bulk_dependencies(payload, targets)
+
+    async def runner(job: Job | None) -> dict:
+        return await _run_action_commands(
+            payload.action, "name", targets, job, concurrency, dependencies, execute=_run_docker_command
         )
-    return {"action": payload.action, "results": results}
+
+    title = f"docker {payload.action}: {', '.join(unique_names)}"
+    params = {"action": payload.action, "names": unique_names, "concurrency": concurrency, "depends_on": dependencies}
+    return await _dispatch_action("docker", title, params, runner, background, stream)
+
+
+async def _docker_container_state(name: str) -> dict | None:
+    if DOCKER_ENGINE is not None and DOCKER_ENGINE.available:
+        try:
+            return (await DOCKER_ENGINE.inspect(name)).get("State") or {}
+        except DockerEngineError as exc:
+            if exc.status_code is not None:
+                return None
+    result = await _run_command(["docker", "inspect", "--format", "{{json .State}}", name])
+    if result.exit_code != 0:
+        return None
+    try:
+        return json.loads(result.stdout)
+    except json.JSONDecodeError:
+        return None
+
+
+async def _await_compose_condition(name: str, condition: str) -> str | None:
+    """Waits until a started container satisfies a ``depends_on`` condition; returns an error message otherwise."""
+    deadline = time.monotonic() + DOCKER_STACK_WAIT_TIMEOUT
+    while True:
+        state = await _docker_container_state(name)
+        if state is None:
+            return f"Impossibile leggere lo stato di {name}"
+        if condition == "service_healthy":
+            health = (state.get("Health") or {}).get("Status")
+            if health in (None, "healthy"):
+                return None  # without a healthcheck "started" is all compose can check too
+            if health == "unhealthy":
+                return f"{name} non è healthy"
+        elif condition == "service_completed_successfully":
+            if state.get("Status") in ("exited", "dead"):
+                exit_code = state.get("ExitCode", 0)
+                return None if exit_code == 0 else f"{name} è terminato con codice {exit_code}"
+        else:
+            return None
+        if time.monotonic() >= deadline:
+            return f"{name} non ha raggiunto {condition} entro {DOCKER_STACK_WAIT_TIMEOUT:.0f}s"
+        await asyncio.sleep(1)
+
+
+@app.post("/api/docker/stacks/actions")
+async def docker_stacks_actions(payload: DockerStackActionRequest, background: bool = False, stream: bool = False):
+    unique_stacks = sorted({name for name in payload.stacks if name})
+    if not unique_stacks:
+        raise HTTPException(status_code=400, detail="Nessuno stack selezionato")
+    rows, docker_cmd = await _docker_rows()
+    if rows is None:
+        detail = docker_cmd.stderr if docker_cmd is not None else ""
+        raise HTTPException(status_code=502, detail=detail or "Elenco container non disponibile")
+    stacks = _compose_stacks(rows)
+    missing = [name for name in unique_stacks if name not in stacks]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Stack compose non trovati: {', '.join(missing)}")
+
+    targets = []
+    dependencies: Dict[str, List[str]] = {}
+    wait_for: Dict[str, str] = {}
+    waves: Dict[str, List[List[str]]] = {}
+    for stack in unique_stacks:
+        containers = stacks[stack]
+        stack_deps, stack_wait = stack_dependencies(containers, payload.action)
+        try:
+            waves[stack] = dependency_waves([container.name for container in containers], stack_deps)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=f"Dipendenze cicliche nello stack {stack}: {exc}") from exc
+        dependencies.update(stack_deps)
+        wait_for.update(stack_wait)
+        for wave in waves[stack]:
+            targets.extend((name, _docker_command_for_action(payload.action, name), None) for name in wave)
+
+    concurrency = _bulk_concurrency("docker", payload)
+
+    async def await_condition(command: List[str], result: RunResult) -> RunResult:
+        condition = wait_for.get(command[2])
+        if condition:
+            error = await _await_compose_condition(command[2], condition)
+            if error:
+                return RunResult(script="docker", exit_code=1, stdout=result.stdout, stderr=error)
+        return result
+
+    async def runner(job: Job | None) -> dict:
+        if job is not None:
+            for stack, stack_waves in waves.items():
+                for index, wave in enumerate(stack_waves, start=1):
+                    job.log(f"{stack} · onda {index}: {', '.join(wave)}")
+        result = await _run_action_commands(
+            payload.action, "name", targets, job, concurrency, dependencies,
+            execute=_run_docker_command, settle=await_condition,
+        )
+        return {**result, "stacks": unique_stacks, "waves": waves}
+
+    title = f"docker compose {payload.action}: {', '.join(unique_stacks)}"
+    params = {"action": payload.action, "stacks": unique_stacks, "concurrency": concurrency, "waves": waves}
+    return await _dispatch_action("docker", title, params, runner, background, stream)
+
+
+@app.get("/api/docker/containers/{name}/logs")
+async def docker_container_logs(
+    name: str,
+    q: str | None = None,
+    regex: bool = False,
+    ignore_case: bool = False,
+    streams: Literal["all", "stdout", "stderr"] = "all",
+    since: str | None = None,
+    tail: int = 1000,
+    limit: int = 200,
+    follow: bool = False,
+):
+    rows, docker_cmd = await _docker_rows()
+    if rows is None:
+        detail = docker_cmd.stderr if docker_cmd is not None else ""
+        raise HTTPException(status_code=502, detail=detail or "Elenco container non disponibile")
+    if name not in {row["name"] for row in rows}:
+        raise HTTPException(status_code=404, detail="Container non trovato")
+    selected = ("stdout", "stderr") if streams == "all" else (streams,)
+    try:
+        since_ts = parse_since(since) if since else None
+        log_filter = LogFilter(q, regex, ignore_case, selected)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    tail = max(0, min(tail, DOCKER_LOGS_MAX_TAIL))
+    limit = max(1, min(limit, DOCKER_LOGS_BUFFER))
+    if DOCKER_ENGINE is not None and DOCKER_ENGINE.available:
+        lines = api_log_lines(DOCKER_ENGINE, name, follow, since_ts, tail, selected)
+    else:
+        lines = cli_log_lines(name, follow, since_ts, tail, DOCKER_LOGS_BUFFER)
+    log_tail = LogTail(lines, log_filter, buffer=DOCKER_LOGS_BUFFER)
+    if follow:
+        header = {"container": name, "query": q, "regex": regex, "streams": list(selected), "tail": tail}
+        return _run_event_stream(log_tail.events(header))
+    try:
+        matches = await log_tail.collect(limit)
+    except DockerEngineError as exc:
+        raise HTTPException(status_code=exc.status_code or 502, detail=str(exc)) from exc
+    except OSError as exc:
+        raise HTTPException(status_code=502, detail=f"Comando docker non disponibile: {exc}") from exc
+    return {"container": name, "lines": matches, **log_tail.summary()}
 
 
 @app.post("/api/scalingo/apps/actions")
-async def scalingo_apps_actions(payload: ScalingoActionRequest) -> dict:
+async def scalingo_apps_actions(payload: ScalingoActionRequest, background: bool = False, stream: bool = False):
     unique_names = sorted({name for name in payload.names if name})
     if not unique_names:
         raise HTTPException(status_code=400, detail="Nessuna app selezionata")
 
-    region = os.environ.get("SCALINGO_REGION", "osc-fr1")
-    results: List[dict] = []
+    default_region = _load_scalingo_credentials()[1][0][0]
+    targets = []
     for name in unique_names:
-        command = ["scalingo", "--region", region, "-a", name, "restart"]
-        run_result = await _run_command(command)
-        results.append(
-            {
-                "name": name,
-                "action": payload.action,
-                "exit_code": run_result.exit_code,
-                "stdout": run_result.stdout,
-                "stderr": run_result.stderr,
-            }
-        )
-    return {"action": payload.action, "results": results}
+        region, _, app_name = name.rpartition("/")  # "<region>/<app>" when several regions are configured
+        targets.append((name, ["scalingo", "--region", region or default_region, "-a", app_name, "restart"], None))
+
+    concurrency = _bulk_concurrency("scalingo", payload)
+    dependencies = _bulk_dependencies(payload, targets)
+
+    async def runner(job: Job | None) -> dict:
+        return await _run_action_commands(payload.action, "name", targets, job, concurrency, dependencies)
+
+    title = f"scalingo {payload.action}: {', '.join(unique_names)}"
+    params = {"action": payload.action, "names": unique_names, "concurrency": concurrency, "depends_on": dependencies}
+    return await _dispatch_action("scalingo", title, params, runner, background, stream)
 
 
 def _validate_repo_path(repo_path: Path) -> Path:
@@ -960,151 +1715,257 @@ def _git_command_for_action(action: str) -> List[str]:
 
 
 @app.post("/api/git/repos/actions")
-async def git_repos_actions(payload: GitActionRequest) -> dict:
+async def git_repos_actions(payload: GitActionRequest, background: bool = False, stream: bool = False):
     repo_paths = sorted({repo for repo in payload.repos if repo})
     if not repo_paths:
         raise HTTPException(status_code=400, detail="Nessun repository selezionato")
 
-    results: List[dict] = []
+    targets = []
+    aliases: Dict[str, str] = {}
     for repo in repo_paths:
         resolved = _validate_repo_path(Path(repo))
         try:
             command = _git_command_for_action(payload.action)
         except ValueError as exc:  # pragma: no cover - guard for literals
             raise HTTPException(status_code=400, detail=str(exc)) from exc
-        run_result = await _run_command(command, cwd=resolved)
-        results.append(
-            {
-                "repo": str(resolved),
-                "action": payload.action,
-                "exit_code": run_result.exit_code,
-                "stdout": run_result.stdout,
-                "stderr": run_result.stderr,
-            }
-        )
-    return {"action": payload.action, "results": results}
+        targets.append((str(resolved), command, resolved))
+        aliases[repo] = str(resolved)
+        aliases[resolved.name] = str(resolved)
+    concurrency = _bulk_concurrency("git", payload)
+    dependencies = _bulk_dependencies(payload, targets, aliases)
+
+    async def runner(job: Job | None) -> dict:
+        try:
+            return await _run_action_commands(payload.action, "repo", targets, job, concurrency, dependencies)
+        finally:
+            for _, _, resolved in targets:
+                REPO_WATCHER.mark(resolved)
+
+    title = f"git {payload.action}: {', '.join(Path(target).name for target, _, _ in targets)}"
+    params = {
+        "action": payload.action,
+        "repos": [target for target, _, _ in targets],
+        "concurrency": concurrency,
+        "depends_on": dependencies,
+    }
+    return await _dispatch_action("git", title, params, runner, background, stream)
 
 
-async def _gather_status_data() -> dict:
-    categories: List[dict] = []
-    git_dirty: List[dict] = []
-    bucket_usage: List[dict] = []
-    database_usage: List[dict] = []
+REPO_ACTIONS = ("fetch", "pull", "status")
+
+
+def _repo_entry(repo_path: Path, status: str, details: str, meta: str) -> dict:
+    return _status_entry(
+        repo_path.name,
+        status,
+        details,
+        meta=meta,
+        target={"type": "git_repo", "id": str(repo_path)},
+        actions=list(REPO_ACTIONS),
+    )
 
-    # Repository status
+
+async def _probe_repository(repo_path: Path) -> tuple[dict, dict | None]:
+    if GIT_NATIVE_STATUS:
+        native = await asyncio.to_thread(read_repo_status, repo_path)
+        if native.state != "unknown":
+            GIT_STATUS_STATS["native"] += 1
+            if native.state == "clean":
+                return _repo_entry(repo_path, "ok", "Pulito", "Pulito"), None
+            details = native.porcelain
+            entry = _repo_entry(repo_path, "warn", details, "Modifiche locali")
+            return entry, {"name": repo_path.name, "path": str(repo_path), "status": "warn", "details": details}
+        GIT_STATUS_STATS["fallback"] += 1
+        GIT_STATUS_STATS["last_fallback_reason"] = f"{repo_path.name}: {native.reason}"
+    res = await _run_command(["git", "status", "--porcelain"], cwd=repo_path)
+    if res.exit_code != 0:
+        details = res.stderr or res.stdout or "Errore git"
+        entry = _repo_entry(repo_path, "error", details, "Errore")
+    elif res.stdout.strip():
+        details = res.stdout.strip()
+        entry = _repo_entry(repo_path, "warn", details, "Modifiche locali")
+    else:
+        return _repo_entry(repo_path, "ok", "Pulito", "Pulito"), None
+    dirty = {"name": repo_path.name, "path": str(repo_path), "status": entry["status"], "details": details}
+    return entry, dirty
+
+
+async def _collect_repo_status() -> tuple[dict, List[dict]]:
     repo_entries: List[dict] = []
-    repo_actions: set[str] = {"status", "fetch", "pull"}
+    git_dirty: List[dict] = []
     repo_paths = sorted(path.parent for path in WORKSPACE_ROOT.glob("*/.git"))
     if not repo_paths:
         repo_entries.append(_status_entry("Workspace", "info", "Nessun repository trovato", meta="Nessun repository trovato"))
+
+    def on_timeout(repo_path: Path, elapsed: float) -> tuple[dict, None]:
+        return _repo_entry(repo_path, "timeout", _timeout_details(elapsed), "Timeout"), None
+
+    # Only repositories touched since their last probe (or never probed) are re-checked.
+    await REPO_WATCHER.sync(repo_paths)
+    changed = REPO_WATCHER.take_dirty(repo_paths)
+    now = time.monotonic()
+    for cached_path in set(_REPO_PROBE_CACHE) - set(repo_paths):
+        del _REPO_PROBE_CACHE[cached_path]
+    to_probe = [
+        repo_path
+        for repo_path in repo_paths
+        if repo_path in changed
+        or repo_path not in _REPO_PROBE_CACHE
+        or now - _REPO_PROBE_CACHE[repo_path][0] > GIT_RESCAN_INTERVAL
+    ]
+    probed = await PROBE_SCHEDULER.map("git", to_probe, _probe_repository, on_timeout=on_timeout)
+    for repo_path, (entry, dirty) in zip(to_probe, probed):
+        if entry["status"] in ("ok", "warn"):
+            _REPO_PROBE_CACHE[repo_path] = (now, entry, dirty)
+        else:
+            _REPO_PROBE_CACHE.pop(repo_path, None)
+            REPO_WATCHER.mark(repo_path)
+    fresh = dict(zip(to_probe, probed))
+    for repo_path in repo_paths:
+        entry, dirty = fresh[repo_path] if repo_path in fresh else _REPO_PROBE_CACHE[repo_path][1:]
+        repo_entries.append(entry)
+        if dirty:
+            git_dirty.append(dirty)
+    card = {
+        "id": "local_repos",
+        "title": "Repository locali",
+        "status": _overall_status(repo_entries, default="info"),
+        "entries": repo_entries,
+        "actions": sorted(REPO_ACTIONS),
+        "environment": "local",
+        "category_type": "git",
+    }
+    return card, git_dirty
+
+
+def _docker_entry(name: str, state: str) -> dict | None:
+    container_name = name.strip()
+    if not container_name:
+        return None
+    status_text = state.strip()
+    status_lower = status_text.lower()
+    if status_lower.startswith("up") and "restart" not in status_lower:
+        entry_status = "ok"
+        available_actions = ["stop", "restart"]
+    elif any(token in status_lower for token in ["exited", "dead", "created"]):
+        entry_status = "error"
+        available_actions = ["start"]
+    elif "paused" in status_lower:
+        entry_status = "warn"
+        available_actions = ["start", "restart", "stop"]
     else:
-        for repo_path in repo_paths:
-            res = await _run_command(["git", "status", "--porcelain"], cwd=repo_path)
-            if res.exit_code != 0:
-                details = res.stderr or res.stdout or "Errore git"
-                entry_status = "error"
-                repo_entries.append(
-                    _status_entry(
-                        repo_path.name,
-                        entry_status,
-                        details,
-                        meta="Errore",
-                        target={"type": "git_repo", "id": str(repo_path)},
-                        actions=list(repo_actions),
-                    )
-                )
-                git_dirty.append(
-                    {
-                        "name": repo_path.name,
-                        "path": str(repo_path),
-                        "status": entry_status,
-                        "details": details,
-                    }
-                )
-            elif res.stdout.strip():
-                summary = res.stdout.strip()
-                entry_status = "warn"
-                repo_entries.append(
-                    _status_entry(
-                        repo_path.name,
-                        entry_status,
-                        summary,
-                        meta="Modifiche locali",
-                        target={"type": "git_repo", "id": str(repo_path)},
-                        actions=list(repo_actions),
-                    )
-                )
-                git_dirty.append(
-                    {
-                        "name": repo_path.name,
-                        "path": str(repo_path),
-                        "status": entry_status,
-                        "details": summary,
-                    }
-                )
-            else:
-                repo_entries.append(
-                    _status_entry(
-                        repo_path.name,
-                        "ok",
-                        "Pulito",
-                        meta="Pulito",
-                        target={"type": "git_repo", "id": str(repo_path)},
-                        actions=list(repo_actions),
-                    )
-                )
-    categories.append(
-        {
-            "id": "local_repos",
-            "title": "Repository locali",
-            "status": _overall_status(repo_entries, default="info"),
-            "entries": repo_entries,
-            "actions": sorted(repo_actions),
-            "environment": "local",
-            "category_type": "git",
-        }
+        entry_status = "warn"
+        available_actions = ["start", "restart", "stop"]
+    return _status_entry(
+        container_name,
+        entry_status,
+        status_text,
+        meta=status_text,
+        target={"type": "docker_container", "id": container_name},
+        actions=available_actions,
+    )
+
+
+_DOCKER_PS_FORMAT = "::".join(
+    ["{{.Names}}", "{{.Status}}"]
+    + [f'{{{{.Label "{label}"}}}}' for label in (PROJECT_LABEL, SERVICE_LABEL, ONEOFF_LABEL, DEPENDS_ON_LABEL)]
+)
+
+
+def _parse_docker_ps(stdout: str) -> List[dict]:
+    rows = []
+    for line in stdout.splitlines():
+        if not line.strip():
+            continue
+        name, status, *label_values = line.strip().split("::", 5)
+        labels = dict(zip((PROJECT_LABEL, SERVICE_LABEL, ONEOFF_LABEL, DEPENDS_ON_LABEL), label_values))
+        rows.append({"name": name, "status": status, "labels": {key: value for key, value in labels.items() if value}})
+    return rows
+
+
+async def _docker_rows_via_api() -> List[dict] | None:
+    # Served from the event-fed table; a listing is only needed while the event stream is down.
+    if DOCKER_CONTAINERS is None or not DOCKER_ENGINE.available:
+        return None
+    if not DOCKER_CONTAINERS.synced:
+        try:
+            await PROBE_SCHEDULER.run("docker", DOCKER_CONTAINERS.refresh)
+        except (DockerEngineError, asyncio.TimeoutError):
+            return None
+    return DOCKER_CONTAINERS.snapshot()
+
+
+async def _docker_rows() -> tuple[List[dict] | None, RunResult | None]:
+    rows = await _docker_rows_via_api()
+    if rows is not None:
+        return rows, None
+    docker_cmd = await PROBE_SCHEDULER.run(
+        "docker",
+        lambda: _run_command(["docker", "ps", "-a", "--format", _DOCKER_PS_FORMAT]),
+        on_timeout=lambda elapsed: _timeout_result(["docker", "ps"], elapsed),
     )
+    if docker_cmd.exit_code == 0 and not docker_cmd.timed_out:
+        return _parse_docker_ps(docker_cmd.stdout), docker_cmd
+    return None, docker_cmd
+
+
+def _compose_stacks(rows: List[dict]) -> Dict[str, List[StackContainer]]:
+    stacks: Dict[str, List[StackContainer]] = {}
+    for row in rows:
+        found = stack_container(row["name"], row.get("labels") or {})
+        if found is not None:
+            project, container = found
+            stacks.setdefault(project, []).append(container)
+    return stacks
+
+
+def _compose_groups(entries: List[dict], stacks: Dict[str, List[StackContainer]]) -> List[dict]:
+    groups = []
+    for project in sorted(stacks):
+        group_id = f"compose:{project}"
+        members = [entry for entry in entries if entry.get("group") == group_id]
+        dependencies, _ = stack_dependencies(stacks[project], "start")
+        try:
+            waves = dependency_waves([container.name for container in stacks[project]], dependencies)
+        except ValueError:
+            waves = []
+        groups.append(
+            {
+                "id": group_id,
+                "label": project,
+                "stack": project,
+                "status": _overall_status(members, default="info"),
+                "services": sorted({container.service for container in stacks[project]}),
+                "start_waves": waves,
+                "actions": ["start", "stop", "restart"],
+            }
+        )
+    return groups
+
 
-    # Local docker containers
+async def _collect_docker_status() -> dict:
     docker_entries: List[dict] = []
     docker_hint = None
     docker_actions: set[str] = set()
-    docker_cmd = await _run_command(["docker", "ps", "-a", "--format", "{{.Names}}::{{.Status}}"])
-    if docker_cmd.exit_code == 0:
-        lines = [line.strip() for line in docker_cmd.stdout.splitlines() if line.strip()]
-        if not lines:
+    rows, docker_cmd = await _docker_rows()
+    stacks: Dict[str, List[StackContainer]] = {}
+    if rows is not None:
+        if not rows:
             docker_entries.append(_status_entry("Docker", "info", "Nessun container trovato"))
-        else:
-            for line in lines:
-                name, _, state = line.partition("::")
-                container_name = name.strip()
-                if not container_name:
-                    continue
-                status_text = state.strip()
-                status_lower = status_text.lower()
-                if status_lower.startswith("up") and "restart" not in status_lower:
-                    entry_status = "ok"
-                    available_actions = ["stop", "restart"]
-                elif any(token in status_lower for token in ["exited", "dead", "created"]):
-                    entry_status = "error"
-                    available_actions = ["start"]
-                elif "paused" in status_lower:
-                    entry_status = "warn"
-                    available_actions = ["start", "restart", "stop"]
-                else:
-                    entry_status = "warn"
-                    available_actions = ["start", "restart", "stop"]
-                docker_actions.update(available_actions)
-                docker_entries.append(
-                    _status_entry(
-                        container_name,
-                        entry_status,
-                        status_text,
-                        meta=status_text,
-                        target={"type": "docker_container", "id": container_name},
-                        actions=available_actions,
-                    )
-                )
+        stacks = _compose_stacks(rows)
+        for row in rows:
+            entry = _docker_entry(row["name"], row["status"])
+            if entry is None:
+                continue
+            found = stack_container(row["name"], row.get("labels") or {})
+            if found is not None:
+                project, container = found
+                entry["group"] = f"compose:{project}"
+                entry["service"] = container.service
+            docker_actions.update(entry["actions"])
+            docker_entries.append(entry)
+    elif docker_cmd.timed_out:
+        docker_entries.append(_status_entry("docker", "timeout", docker_cmd.stderr, meta="Timeout"))
     else:
         error = docker_cmd.stderr or docker_cmd.stdout or "Comando docker non disponibile"
         docker_hint = "Installa docker CLI nel container o monta il socket del demone host"
@@ -1121,47 +1982,79 @@ async def _gather_status_data() -> dict:
     }
     if docker_actions:
         docker_card["actions"] = sorted(docker_actions)
-    categories.append(docker_card)
+    if stacks:
+        docker_card["groups"] = _compose_groups(docker_entries, stacks)
+    return docker_card
 
-    # Manual database checks
-    manual_db_entries_by_env: dict[str, List[dict]] = {"local": [], "staging": [], "production": []}
-    db_urls = [url for url in _read_config_list("STATUS_DB_URLS", "STATUS_DB_URLS_FILE") if not _is_placeholder_db_url(url)]
-    for url in db_urls:
-        env = _guess_environment_from_db_url(url)
-        res = await _run_command(["psql", url, "-At", "-c", "SELECT 1;"], cwd=None)
-        if res.exit_code == 0:
-            entry = _status_entry(url, "ok", "Connessione OK", meta="Connessione OK")
-            manual_db_entries_by_env.setdefault(env, []).append(entry)
-            usage = await _measure_database_usage(url)
-            database_usage.append(usage)
-        else:
-            error_msg = res.stderr or res.stdout or "Errore connessione"
-            entry = _status_entry(url, "error", error_msg, meta="Errore")
-            manual_db_entries_by_env.setdefault(env, []).append(entry)
-            database_usage.append(
-                {
-                    "url": url,
-                    "status": "error",
-                    "environment": env,
-                    "error": error_msg.strip(),
-                    "type": "manual",
-                }
-            )
 
-    local_db_entries = manual_db_entries_by_env.get("local") or []
-    if local_db_entries:
-        categories.append(
-            {
-                "id": "databases_local",
-                "title": "Database locali",
-                "status": _overall_status(local_db_entries, default="info"),
-                "entries": local_db_entries,
-                "environment": "local",
-                "category_type": "databases",
-            }
-        )
+async def _probe_manual_database(url: str) -> tuple[str, dict, dict]:
+    env = _guess_environment_from_db_url(url)
+    try:
+        measured = await POSTGRES_PROBES.probe(url)
+    except PostgresProbeError as exc:
+        error_msg = str(exc)
+        entry = _status_entry(url, "error", error_msg, meta="Errore", database=url)
+        usage = {"url": url, "status": "error", "environment": env, "error": error_msg.strip(), "type": "manual"}
+        return env, entry, usage
+    DATABASE_GROWTH.record_size(url, measured["size_bytes"])
+    entry = _status_entry(
+        url, "ok", "Connessione OK", meta="Connessione OK", database=url, latency_ms=measured["latency_ms"]
+    )
+    usage = {
+        "url": url,
+        "status": "ok",
+        "environment": env,
+        "size_bytes": measured["size_bytes"],
+        "row_estimate": measured["row_estimate"],
+        "type": "manual",
+    }
+    growth = DATABASE_GROWTH.report(url)
+    for key in ("growth_bytes_per_day", "limit_bytes", "days_to_limit", "projected_full_at"):
+        if growth[key] is not None:
+            usage[key] = growth[key]
+    return env, entry, usage
+
 
-    # Scalingo staging apps
+def _manual_database_urls() -> List[str]:
+    return [url for url in _read_config_list("STATUS_DB_URLS", "STATUS_DB_URLS_FILE") if not _is_placeholder_db_url(url)]
+
+
+def _database_size_limits() -> Dict[str, float]:
+    limits: Dict[str, float] = {}
+    for item in _read_config_list("STATUS_DB_SIZE_LIMITS", "STATUS_DB_SIZE_LIMITS_FILE"):
+        target, _, raw_limit = item.rpartition("=")
+        limit = parse_size(raw_limit)
+        if target and limit:
+            limits[target] = limit
+    return limits
+
+
+async def _collect_manual_databases() -> tuple[dict[str, List[dict]], List[dict]]:
+    entries_by_env: dict[str, List[dict]] = {"local": [], "staging": [], "production": []}
+    database_usage: List[dict] = []
+    db_urls = _manual_database_urls()
+    await POSTGRES_PROBES.retain(db_urls)
+
+    def on_timeout(url: str, elapsed: float) -> tuple[str, dict, dict]:
+        env = _guess_environment_from_db_url(url)
+        usage = {"url": url, "status": "timeout", "environment": env, "error": _timeout_details(elapsed), "type": "manual"}
+        return env, {**_timeout_entry(url, elapsed), "database": url}, usage
+
+    for env, entry, usage in await PROBE_SCHEDULER.map(
+        "postgres",
+        db_urls,
+        _probe_manual_database,
+        on_timeout=on_timeout,
+        target=lambda url: url,
+        is_failure=_probe_failed,
+        on_open=_with_circuit_info,
+    ):
+        entries_by_env.setdefault(env, []).append(entry)
+        database_usage.append(usage)
+    return entries_by_env, database_usage
+
+
+async def _collect_scalingo_apps() -> dict:
     staging_entries, scalingo_hint = await _scalingo_status()
     if not staging_entries:
         staging_entries.append(_status_entry("Scalingo", "info", "Nessuna app trovata", meta="Nessuna app"))
@@ -1177,23 +2070,190 @@ async def _gather_status_data() -> dict:
     }
     if scalingo_actions:
         staging_card["actions"] = scalingo_actions
-    categories.append(staging_card)
+    return staging_card
 
-    # Database staging
-    scalingo_db_entries, scalingo_db_hint = await _fetch_scalingo_postgres_addons()
-    staging_db_entries = list(scalingo_db_entries)
-    for entry in scalingo_db_entries:
-        database_usage.append(
-            {
-                "type": "scalingo",
-                "environment": "staging",
-                "label": entry.get("label"),
-                "status": entry.get("status"),
-                "details": entry.get("details"),
-            }
+
+def _resolve_bucket_endpoint() -> str | None:
+    return _ensure_endpoint_url(
+        os.environ.get("STATUS_BUCKETS_ENDPOINT")
+        or os.environ.get("AWS_S3_ENDPOINT")
+        or os.environ.get("WASABI_ENDPOINT")
+    )
+
+
+def _native_bucket_usage(bucket: str, scan: dict) -> dict:
+    usage: dict = {"name": bucket, "type": "bucket", "environment": "global", "partial": False, "status": "ok"}
+    progress = scan.get("scanning")
+    if "object_count" in scan:
+        usage.update(size_bytes=scan["size_bytes"], object_count=scan["object_count"], scanned_at=scan["scanned_at"])
+        if progress:
+            usage["note"] = f"Aggiornamento in corso ({progress['objects']} oggetti letti)"
+        elif scan.get("last_error"):
+            usage["note"] = f"Ultimo aggiornamento fallito: {scan['last_error']}"
+    elif progress:
+        usage.update(
+            size_bytes=progress["size_bytes"],
+            object_count=progress["objects"],
+            partial=True,
+            status="partial",
+            note="Conteggio completo in corso",
         )
-    manual_staging_entries = manual_db_entries_by_env.get("staging") or []
-    staging_db_entries.extend(manual_staging_entries)
+    elif scan.get("last_error"):
+        usage.update(status="error", error=scan["last_error"])
+    else:
+        usage.update(size_bytes=None, object_count=None, partial=True, status="partial", note="Conteggio in coda")
+    if progress:
+        usage["scanning"] = progress
+    return usage
+
+
+async def _probe_bucket_native(bucket: str, endpoint: str | None) -> tuple[dict, dict]:
+    try:
+        scan = await BUCKET_USAGE.probe(bucket, endpoint)
+    except S3Error as exc:
+        entry = _status_entry(bucket, "error", str(exc), meta="Errore")
+        return entry, {"name": bucket, "status": "error", "error": str(exc), "type": "bucket", "environment": "global"}
+    return _status_entry(bucket, "ok", "Accessibile", meta="Accessibile"), _native_bucket_usage(bucket, scan)
+
+
+def _bucket_inventory_locations() -> Dict[str, str]:
+    locations: Dict[str, str] = {}
+    for item in _read_config_list("STATUS_BUCKETS_INVENTORY", "STATUS_BUCKETS_INVENTORY_FILE"):
+        bucket, _, location = item.partition("=")
+        if bucket and location:
+            locations[bucket] = location
+    return locations
+
+
+async def _probe_bucket(bucket: str, endpoint: str | None) -> tuple[dict, dict]:
+    if S3_NATIVE and BUCKET_USAGE.client.available:
+        return await _probe_bucket_native(bucket, endpoint)
+    cmd = ["aws", "s3", "ls", f"s3://{bucket}"]
+    if endpoint:
+        cmd.extend(["--endpoint-url", endpoint.rstrip("/")])
+    res = await _run_command(cmd)
+    if res.exit_code == 0:
+        entry = _status_entry(bucket, "ok", "Accessibile", meta="Accessibile")
+        return entry, await _measure_bucket_usage(bucket, endpoint)
+    error_msg = res.stderr or res.stdout or "Errore S3"
+    entry = _status_entry(bucket, "error", error_msg, meta="Errore")
+    usage = {
+        "name": bucket,
+        "status": "error",
+        "error": (error_msg or "Errore S3").strip(),
+        "type": "bucket",
+        "environment": "global",
+    }
+    return entry, usage
+
+
+async def _probe_redis(url: str) -> dict:
+    label = redact_redis_url(url)
+    try:
+        info = await REDIS_PROBES.probe(url)
+    except RedisProbeError as exc:
+        return _status_entry(label, "error", str(exc), meta="Errore")
+    memory = info.get("used_memory_human") or "?"
+    if info.get("maxmemory"):
+        memory += f" / {info.get('maxmemory_human') or info['maxmemory']}"
+    parts = [
+        f"Memoria {memory}",
+        f"{info.get('ops_per_sec') or 0} op/s",
+        f"{info.get('keys', 0)} chiavi",
+        f"{info.get('evicted_keys') or 0} evizioni",
+    ]
+    if info.get("hit_ratio") is not None:
+        parts.insert(2, f"hit {info['hit_ratio'] * 100:.1f}%")
+    status = "ok"
+    hint = None
+    if info.get("maxmemory") and (info.get("used_memory") or 0) >= 0.9 * info["maxmemory"]:
+        status = "warn"
+        hint = f"Memoria oltre il 90% di maxmemory (policy {info.get('maxmemory_policy') or '?'})"
+    return _status_entry(label, status, " · ".join(parts), hint, meta=info.get("used_memory_human") or "OK", redis=info)
+
+
+async def _collect_redis() -> dict:
+    urls = _read_config_list("STATUS_REDIS_URLS", "STATUS_REDIS_URLS_FILE")
+    await REDIS_PROBES.retain(urls)
+    entries = await PROBE_SCHEDULER.map(
+        "redis",
+        urls,
+        _probe_redis,
+        on_timeout=lambda url, elapsed: _timeout_entry(redact_redis_url(url), elapsed),
+        target=redact_redis_url,
+        is_failure=_probe_failed,
+        on_open=_with_circuit_info,
+    )
+    if not urls:
+        entries = [_status_entry("Redis", "info", "Configura STATUS_REDIS_URLS o STATUS_REDIS_URLS_FILE", meta="Configurazione mancante")]
+    return {
+        "id": "redis",
+        "title": "Redis",
+        "status": _overall_status(entries, default="info"),
+        "entries": entries,
+        "environment": "global",
+        "category_type": "services",
+    }
+
+
+async def _collect_buckets() -> tuple[dict, List[dict]]:
+    bucket_entries: List[dict] = []
+    bucket_usage: List[dict] = []
+    bucket_names = _read_config_list("STATUS_BUCKETS", "STATUS_BUCKETS_FILE")
+    bucket_endpoint = _resolve_bucket_endpoint()
+    if not bucket_names:
+        bucket_entries.append(_status_entry("Bucket", "info", "Configura STATUS_BUCKETS o STATUS_BUCKETS_FILE", meta="Configurazione mancante"))
+
+    def on_timeout(bucket: str, elapsed: float) -> tuple[dict, dict]:
+        usage = {
+            "name": bucket,
+            "status": "timeout",
+            "error": _timeout_details(elapsed),
+            "type": "bucket",
+            "environment": "global",
+        }
+        return _timeout_entry(bucket, elapsed), usage
+
+    for entry, usage in await PROBE_SCHEDULER.map(
+        "s3",
+        bucket_names,
+        lambda name: _probe_bucket(name, bucket_endpoint),
+        on_timeout=on_timeout,
+        target=lambda name: f"{bucket_endpoint or 'aws'}/{name}",
+        is_failure=_probe_failed,
+        on_open=_with_circuit_info,
+    ):
+        bucket_entries.append(entry)
+        inventory = BUCKET_INVENTORY.snapshot(usage["name"])
+        if inventory is not None:
+            usage["top_prefixes"] = BUCKET_INVENTORY.top_prefixes(usage["name"])
+            usage["inventory_at"] = inventory["generated_at"]
+        bucket_usage.append(usage)
+    card = {
+        "id": "buckets",
+        "title": "Bucket S3",
+        "status": _overall_status(bucket_entries, default="info"),
+        "entries": bucket_entries,
+        "environment": "global",
+        "category_type": "storage",
+    }
+    return card, bucket_usage
+
+
+def _database_card(card_id: str, title: str, environment: str, entries: List[dict]) -> dict:
+    return {
+        "id": card_id,
+        "title": title,
+        "status": _overall_status(entries, default="info"),
+        "entries": entries,
+        "environment": environment,
+        "category_type": "databases",
+    }
+
+
+def _staging_database_card(scalingo_db_entries: List[dict], scalingo_db_hint: str | None, manual_entries: List[dict]) -> dict:
+    staging_db_entries = list(scalingo_db_entries)
+    staging_db_entries.extend(manual_entries)
     if not staging_db_entries:
         if scalingo_db_hint:
             staging_db_entries.append(_status_entry("Scalingo", "error", scalingo_db_hint, meta="Errore"))
@@ -1201,136 +2261,320 @@ async def _gather_status_data() -> dict:
             staging_db_entries.append(_status_entry("Database", "info", "Nessun database configurato", meta="Nessun database"))
     elif scalingo_db_hint:
         staging_db_entries.append(_status_entry("Scalingo", "warn", scalingo_db_hint, meta="Avviso"))
-    categories.append(
-        {
-            "id": "databases_staging",
-            "title": "Database staging",
-            "status": _overall_status(staging_db_entries, default="info"),
-            "entries": staging_db_entries,
-            "environment": "staging",
-            "category_type": "databases",
-        }
-    )
+    return _database_card("databases_staging", "Database staging", "staging", staging_db_entries)
 
-    # Production placeholder
-    prod_entries = [_status_entry("Produzione", "info", "Ancora non configurato")]
-    categories.append(
-        {
-            "id": "production",
-            "title": "Produzione",
-            "status": "info",
-            "entries": prod_entries,
-            "environment": "production",
-            "category_type": "services",
-        }
-    )
 
-    production_db_entries = manual_db_entries_by_env.get("production") or []
+def _production_database_card(manual_entries: List[dict]) -> dict:
+    production_db_entries = list(manual_entries)
     if not production_db_entries:
         production_db_entries.append(
             _status_entry("Database produzione", "info", "Ancora non configurato", meta="Configurazione mancante")
         )
-    categories.append(
-        {
-            "id": "databases_production",
-            "title": "Database produzione",
-            "status": _overall_status(production_db_entries, default="info"),
-            "entries": production_db_entries,
-            "environment": "production",
-            "category_type": "databases",
-        }
-    )
+    return _database_card("databases_production", "Database produzione", "production", production_db_entries)
 
-    # Buckets
-    bucket_entries: List[dict] = []
-    bucket_names = _read_config_list("STATUS_BUCKETS", "STATUS_BUCKETS_FILE")
-    bucket_endpoint = _ensure_endpoint_url(
-        os.environ.get("STATUS_BUCKETS_ENDPOINT")
-        or os.environ.get("AWS_S3_ENDPOINT")
-        or os.environ.get("WASABI_ENDPOINT")
-    )
-    if not bucket_names:
-        bucket_entries.append(_status_entry("Bucket", "info", "Configura STATUS_BUCKETS o STATUS_BUCKETS_FILE", meta="Configurazione mancante"))
-    else:
-        for bucket in bucket_names:
-            cmd = ["aws", "s3", "ls", f"s3://{bucket}"]
-            if bucket_endpoint:
-                cmd.extend(["--endpoint-url", bucket_endpoint.rstrip("/")])
-            res = await _run_command(cmd)
-            if res.exit_code == 0:
-                bucket_entries.append(_status_entry(bucket, "ok", "Accessibile", meta="Accessibile"))
-                usage = await _measure_bucket_usage(bucket, bucket_endpoint)
-            else:
-                error_msg = res.stderr or res.stdout or "Errore S3"
-                bucket_entries.append(_status_entry(bucket, "error", error_msg, meta="Errore"))
-                usage = {
-                    "name": bucket,
-                    "status": "error",
-                    "error": (error_msg or "Errore S3").strip(),
-                    "type": "bucket",
-                    "environment": "global",
-                }
-            bucket_usage.append(usage)
-    categories.append(
+
+def _production_card() -> dict:
+    return {
+        "id": "production",
+        "title": "Produzione",
+        "status": "info",
+        "entries": [_status_entry("Produzione", "info", "Ancora non configurato")],
+        "environment": "production",
+        "category_type": "services",
+    }
+
+
+def _scalingo_database_usage(entries: List[dict]) -> List[dict]:
+    return [
         {
-            "id": "buckets",
-            "title": "Bucket S3",
-            "status": _overall_status(bucket_entries, default="info"),
-            "entries": bucket_entries,
-            "environment": "global",
-            "category_type": "storage",
+            "type": "scalingo",
+            "environment": "staging",
+            "label": entry.get("label"),
+            "status": entry.get("status"),
+            "details": entry.get("details"),
         }
+        for entry in entries
+    ]
+
+
+async def _provide_repos(emit: Callable[[dict], None]) -> ProviderResult:
+    card, git_dirty = await _collect_repo_status()
+    emit(card)
+    return ProviderResult([card], {"git_dirty": git_dirty})
+
+
+async def _provide_docker(emit: Callable[[dict], None]) -> ProviderResult:
+    card = await _collect_docker_status()
+    emit(card)
+    return ProviderResult([card])
+
+
+async def _provide_databases(emit: Callable[[dict], None]) -> ProviderResult:
+    manual_databases = asyncio.ensure_future(_collect_manual_databases())
+
+    async def manual_database_cards() -> tuple[dict | None, dict]:
+        entries_by_env, _ = await manual_databases
+        local_entries = entries_by_env.get("local") or []
+        local_card = None
+        if local_entries:
+            local_card = _database_card("databases_local", "Database locali", "local", local_entries)
+            emit(local_card)
+        production_card = _production_database_card(entries_by_env.get("production") or [])
+        emit(production_card)
+        return local_card, production_card
+
+    async def staging_databases() -> tuple[dict, List[dict]]:
+        scalingo_db_entries, scalingo_db_hint = await _fetch_scalingo_postgres_addons()
+        entries_by_env, _ = await manual_databases
+        card = _staging_database_card(scalingo_db_entries, scalingo_db_hint, entries_by_env.get("staging") or [])
+        emit(card)
+        return card, _scalingo_database_usage(scalingo_db_entries)
+
+    (local_card, production_card), (staging_card, scalingo_usage) = await asyncio.gather(
+        manual_database_cards(),
+        staging_databases(),
     )
+    _, manual_usage = await manual_databases
+    cards = [card for card in (local_card, staging_card, production_card) if card]
+    return ProviderResult(cards, {"database_usage": manual_usage + scalingo_usage})
 
-    environment_summary, critical_entries = _compute_environment_metrics(categories)
-    for env in ("local", "staging", "production"):
-        environment_summary.setdefault(
-            env,
-            {"total": 0, "ok": 0, "warn": 0, "error": 0, "active": 0, "degraded": 0, "down": 0},
-        )
 
-    database_summary = {
-        "local": _status_counters(local_db_entries),
-        "staging": _status_counters(staging_db_entries),
-        "production": _status_counters(production_db_entries),
+async def _provide_scalingo_apps(emit: Callable[[dict], None]) -> ProviderResult:
+    card = await _collect_scalingo_apps()
+    emit(card)
+    return ProviderResult([card])
+
+
+async def _provide_production(emit: Callable[[dict], None]) -> ProviderResult:
+    return ProviderResult([_production_card()])
+
+
+async def _provide_redis(emit: Callable[[dict], None]) -> ProviderResult:
+    card = await _collect_redis()
+    emit(card)
+    return ProviderResult([card])
+
+
+async def _provide_buckets(emit: Callable[[dict], None]) -> ProviderResult:
+    card, bucket_usage = await _collect_buckets()
+    emit(card)
+    return ProviderResult([card], {"bucket_usage": bucket_usage})
+
+
+def _card_contribution(card: dict) -> dict:
+    metrics, critical = _compute_environment_metrics([card])
+    return {"environment": metrics, "critical": critical, "counters": _status_counters(card.get("entries", []))}
+
+
+def _aggregate_overview(categories: List[CategorySnapshot], extras: dict[str, List[dict]]) -> dict:
+    environment_summary: dict[str, dict[str, int]] = {
+        env: {"total": 0, "ok": 0, "warn": 0, "error": 0, "timeout": 0, "active": 0, "degraded": 0, "down": 0}
+        for env in ("local", "staging", "production")
     }
-    bucket_summary = _status_counters(bucket_entries)
+    critical_entries: List[dict] = []
+    for item in categories:
+        for env, counters in item.derived.get("environment", {}).items():
+            env_metrics = environment_summary.setdefault(env, {})
+            for key, value in counters.items():
+                env_metrics[key] = env_metrics.get(key, 0) + value
+        critical_entries.extend(item.derived.get("critical", []))
+
+    by_id = {item.id: item for item in categories}
 
-    usage_history = _load_usage_history()
+    def counters_for(card_id: str) -> dict[str, int]:
+        item = by_id.get(card_id)
+        return item.derived["counters"] if item else _status_counters([])
 
     return {
-        "categories": categories,
         "environment_summary": environment_summary,
         "critical": critical_entries,
-        "git_dirty": git_dirty,
-        "bucket_usage": bucket_usage,
-        "database_usage": database_usage,
+        "git_dirty": extras.get("git_dirty", []),
+        "bucket_usage": extras.get("bucket_usage", []),
+        "database_usage": extras.get("database_usage", []),
         "costs": _load_costs_breakdown(),
-        "database_summary": database_summary,
-        "bucket_summary": bucket_summary,
-        "usage_history": usage_history,
-        "generated_at": datetime.utcnow().isoformat() + "Z",
+        "database_summary": {env: counters_for(f"databases_{env}") for env in ("local", "staging", "production")},
+        "bucket_summary": counters_for("buckets"),
+        "usage_history": {**_load_usage_history(), **CONTAINER_STATS.overview()},
     }
 
 
+def _provider_ttl(provider_id: str) -> float:
+    return _env_float(f"STATUS_SNAPSHOT_TTL_{provider_id.upper()}", STATUS_SNAPSHOT_TTL)
+
+
+STATUS_PROVIDERS = [
+    StatusProvider("local_repos", _provide_repos, cards=("local_repos",), ttl=_provider_ttl("local_repos")),
+    StatusProvider("local_docker", _provide_docker, cards=("local_docker",), ttl=_provider_ttl("local_docker")),
+    StatusProvider(
+        "databases",
+        _provide_databases,
+        cards=("databases_local", "databases_staging", "databases_production"),
+        ttl=_provider_ttl("databases"),
+    ),
+    StatusProvider("staging", _provide_scalingo_apps, cards=("staging",), ttl=_provider_ttl("staging")),
+    StatusProvider("production", _provide_production, cards=("production",), ttl=_provider_ttl("production")),
+    StatusProvider("redis", _provide_redis, cards=("redis",), ttl=_provider_ttl("redis")),
+    StatusProvider("buckets", _provide_buckets, cards=("buckets",), ttl=_provider_ttl("buckets")),
+]
+
+STATUS_CATEGORY_ORDER = (
+    "local_repos",
+    "local_docker",
+    "databases_local",
+    "staging",
+    "databases_staging",
+    "production",
+    "databases_production",
+    "redis",
+    "buckets",
+)
+
+STATUS_ENGINE = StatusSnapshotEngine(
+    STATUS_PROVIDERS,
+    aggregate=_aggregate_overview,
+    derive=_card_contribution,
+    category_order=STATUS_CATEGORY_ORDER,
+    interval=STATUS_REFRESH_INTERVAL,
+    ttl=STATUS_SNAPSHOT_TTL,
+    scheduler=PROBE_SCHEDULER,
+    budget=STATUS_REFRESH_BUDGET,
+)
+
+
+def _snapshot_response(snapshot: StatusSnapshot, body: bytes) -> Response:
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"X-Status-Version": str(snapshot.version)},
+    )
+
+
+def _parse_categories(categories: str | None) -> List[str] | None:
+    if not categories:
+        return None
+    names = [part.strip() for part in categories.split(",") if part.strip()]
+    try:
+        STATUS_ENGINE.resolve(names)
+    except KeyError as exc:
+        raise HTTPException(status_code=400, detail=f"Categoria sconosciuta: {exc.args[0]}") from exc
+    return names or None
+
+
 @app.get("/api/status")
-async def get_status() -> dict:
-    data = await _gather_status_data()
-    return {"categories": data["categories"]}
+async def get_status(refresh: bool = False, categories: str | None = None) -> Response:
+    selected = _parse_categories(categories)
+    snapshot = await STATUS_ENGINE.current(force=refresh, providers=selected)
+    if selected is None:
+        return _snapshot_response(snapshot, snapshot.status_body)
+    return _snapshot_response(snapshot, snapshot.status_body_for(STATUS_ENGINE.card_ids(selected)))
 
 
 @app.get("/api/overview")
-async def get_overview() -> dict:
-    data = await _gather_status_data()
+async def get_overview(refresh: bool = False, categories: str | None = None) -> Response:
+    selected = _parse_categories(categories)
+    snapshot = await STATUS_ENGINE.current(force=refresh, providers=selected)
+    return _snapshot_response(snapshot, snapshot.overview_body)
+
+
+@app.get("/api/status/stream")
+async def stream_status(request: Request, refresh: bool = False, categories: str | None = None) -> StreamingResponse:
+    selected = _parse_categories(categories)
+    card_ids = STATUS_ENGINE.card_ids(selected) if selected is not None else None
+
+    async def events():
+        async with STATUS_ENGINE.hub.subscribe(card_ids) as queue:
+            yield b"retry: 3000\n\n"
+            snapshot = STATUS_ENGINE.snapshot
+            if snapshot is not None:
+                yield snapshot.stream_body if card_ids is None else snapshot.stream_body_for(card_ids)
+            if refresh or snapshot is None:
+                STATUS_ENGINE.request_refresh(selected)
+            elif STATUS_ENGINE.stale_providers(selected):
+                STATUS_ENGINE.request_refresh(STATUS_ENGINE.stale_providers(selected))
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), STATUS_STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                if message is None:
+                    break
+                yield message
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/api/status/engine")
+async def get_status_engine() -> dict:
+    snapshot = STATUS_ENGINE.snapshot
     return {
-        "generated_at": data["generated_at"],
-        "environment_summary": data["environment_summary"],
-        "critical": data["critical"],
-        "git_dirty": data["git_dirty"],
-        "bucket_usage": data["bucket_usage"],
-        "database_usage": data["database_usage"],
-        "costs": data["costs"],
-        "database_summary": data["database_summary"],
-        "bucket_summary": data["bucket_summary"],
-        "usage_history": data["usage_history"],
+        "version": STATUS_ENGINE.version,
+        "generated_at": snapshot.generated_at if snapshot else None,
+        "last_error": STATUS_ENGINE.last_error,
+        "providers": STATUS_ENGINE.stats(),
+        "refreshes": STATUS_ENGINE.flight.stats(),
+        "stream": STATUS_ENGINE.hub.stats(),
+        "probes": PROBE_SCHEDULER.stats(),
+        "circuits": PROBE_SCHEDULER.breakers.stats(),
+        "git_status": {"native_enabled": GIT_NATIVE_STATUS, **GIT_STATUS_STATS},
+        "git_watcher": REPO_WATCHER.stats(),
+        "docker": DOCKER_CONTAINERS.stats() if DOCKER_CONTAINERS is not None else {"mode": "cli"},
+        "docker_stats": CONTAINER_STATS.stats(),
+        "postgres": POSTGRES_PROBES.stats(),
+        "postgres_hotspots": DATABASE_HOTSPOTS.stats(),
+        "database_growth": DATABASE_GROWTH.stats(),
+        "redis": REDIS_PROBES.stats(),
+        "s3": {"native": S3_NATIVE and BUCKET_USAGE.client.available, **BUCKET_USAGE.stats()},
+        "bucket_inventory": BUCKET_INVENTORY.stats(),
+        "scalingo": SCALINGO_API.stats(),
     }
+
+
+@app.get("/api/databases/hotspots")
+async def get_database_hotspots(url: str) -> dict:
+    if url not in _manual_database_urls():
+        raise HTTPException(status_code=404, detail="Database non configurato in STATUS_DB_URLS")
+    snapshot = DATABASE_HOTSPOTS.snapshot(url)
+    if snapshot is None:
+        return {"url": url, "status": "pending", "sampler": DATABASE_HOTSPOTS.stats()}
+    return {**snapshot, "sampler": DATABASE_HOTSPOTS.stats()}
+
+
+@app.get("/api/databases/growth")
+async def get_database_growth(url: str | None = None, tables: int = 10, points: int = 200) -> dict:
+    urls = _manual_database_urls()
+    if url is not None:
+        if url not in urls:
+            raise HTTPException(status_code=404, detail="Database non configurato in STATUS_DB_URLS")
+        return DATABASE_GROWTH.report(url, tables=max(0, tables), history_points=max(1, points))
+    reports = [DATABASE_GROWTH.report(item) for item in urls]
+    reports.sort(key=lambda report: report["growth_bytes_per_day"] or 0, reverse=True)
+    return {"databases": reports, "store": DATABASE_GROWTH.stats()}
+
+
+@app.get("/api/buckets/inventory")
+async def get_bucket_inventory(bucket: str, prefix: str = "") -> dict:
+    if bucket not in _read_config_list("STATUS_BUCKETS", "STATUS_BUCKETS_FILE"):
+        raise HTTPException(status_code=404, detail="Bucket non configurato in STATUS_BUCKETS")
+    if BUCKET_INVENTORY.snapshot(bucket) is None:
+        return {"bucket": bucket, "status": "pending", "running": bucket in BUCKET_INVENTORY.stats()["running"]}
+    breakdown = BUCKET_INVENTORY.breakdown(bucket, prefix)
+    if breakdown is None:
+        raise HTTPException(status_code=404, detail="Prefisso non presente nell'inventario")
+    return {**breakdown, "status": "ok"}
+
+
+@app.get("/api/docker/stats")
+async def get_docker_stats(container: str | None = None, stack: str | None = None, minutes: float | None = None) -> dict:
+    since = time.time() - minutes * 60 if minutes else None
+    return {**CONTAINER_STATS.history(container, stack, since), "sampler": CONTAINER_STATS.stats()}
+
+
+@app.post("/api/status/circuits/reset")
+async def reset_status_circuits(target: str | None = None) -> dict:
+    PROBE_SCHEDULER.breakers.reset(target)
+    return {"reset": target or "all"}
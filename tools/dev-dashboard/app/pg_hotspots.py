@@ -0,0 +1,208 @@
+import asyncio
+import time
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional
+
+from .pg_probe import PostgresProbeError, PostgresProbePool
+
+# Candidates are picked by relpages (catalog only); exact sizes are computed for those alone.
+_TABLES_QUERY = """
+SELECT n.nspname AS schema, c.relname AS name,
+       pg_total_relation_size(c.oid) AS total_bytes,
+       pg_relation_size(c.oid) AS table_bytes,
+       pg_indexes_size(c.oid) AS index_bytes,
+       GREATEST(c.reltuples, 0)::bigint AS row_estimate,
+       s.n_live_tup AS live_tuples,
+       s.n_dead_tup AS dead_tuples,
+       GREATEST(s.last_vacuum, s.last_autovacuum) AS last_vacuum
+FROM (
+    SELECT c.oid FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    LEFT JOIN pg_class t ON t.oid = c.reltoastrelid
+    WHERE c.relkind IN ('r', 'm')
+      AND n.nspname NOT IN ('pg_catalog', 'information_schema') AND n.nspname NOT LIKE 'pg_toast%'
+    ORDER BY c.relpages + COALESCE(t.relpages, 0) DESC
+    LIMIT {candidates}
+) candidate
+JOIN pg_class c ON c.oid = candidate.oid
+JOIN pg_namespace n ON n.oid = c.relnamespace
+LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+ORDER BY total_bytes DESC
+LIMIT {top}
+"""
+
+_INDEXES_QUERY = """
+SELECT s.schemaname AS schema, s.relname AS table_name, s.indexrelname AS name,
+       pg_relation_size(s.indexrelid) AS size_bytes, s.idx_scan AS scans
+FROM pg_stat_user_indexes s
+JOIN pg_class c ON c.oid = s.indexrelid
+ORDER BY c.relpages DESC
+LIMIT {top}
+"""
+
+# Transactions left open count from their start, not from their last statement.
+_LONG_QUERIES_QUERY = """
+SELECT pid, usename AS user_name, application_name, state, wait_event_type, wait_event,
+       EXTRACT(EPOCH FROM now() - COALESCE(xact_start, query_start))::float8 AS duration_seconds,
+       LEFT(query, 500) AS query
+FROM pg_stat_activity
+WHERE datname = current_database() AND pid <> pg_backend_pid() AND backend_type = 'client backend'
+  AND state IS DISTINCT FROM 'idle'
+  AND COALESCE(xact_start, query_start) < now() - make_interval(secs => {seconds})
+ORDER BY COALESCE(xact_start, query_start)
+LIMIT {top}
+"""
+
+_LOCK_WAITS_QUERY = """
+SELECT w.pid, w.usename AS user_name, w.wait_event, LEFT(w.query, 300) AS query,
+       EXTRACT(EPOCH FROM now() - w.query_start)::float8 AS waiting_seconds,
+       b.pid AS blocking_pid, b.state AS blocking_state, LEFT(b.query, 300) AS blocking_query
+FROM pg_stat_activity w
+CROSS JOIN LATERAL unnest(pg_blocking_pids(w.pid)) AS blocker(pid)
+JOIN pg_stat_activity b ON b.pid = blocker.pid
+WHERE w.datname = current_database() AND w.wait_event_type = 'Lock'
+ORDER BY w.query_start
+LIMIT {top}
+"""
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+
+
+def _plain(row: dict) -> dict:
+    values = {}
+    for key, value in row.items():
+        if isinstance(value, (datetime, date)):
+            value = value.isoformat()
+        elif isinstance(value, Decimal):
+            value = float(value)
+        values[key] = value
+    return values
+
+
+def table_hotspot(row: dict) -> dict:
+    """Adds the dead-tuple ratio and the space it roughly accounts for (a bloat estimate)."""
+    row = _plain(row)
+    live = row.get("live_tuples") or 0
+    dead = row.get("dead_tuples") or 0
+    ratio = dead / (live + dead) if live + dead else 0.0
+    row["dead_ratio"] = round(ratio, 4)
+    row["bloat_bytes"] = round((row.get("table_bytes") or 0) * ratio)
+    return row
+
+
+class DatabaseHotspots:
+    """Periodic, cached drill-down of the configured databases.
+
+    Every ``interval`` seconds each URL returned by ``targets`` gets four
+    catalog queries over the shared probe pool: the ``top`` largest tables
+    (with dead-tuple ratio) and indexes, queries or transactions open for
+    longer than ``long_query_seconds`` and sessions waiting on a lock.
+    Readers only ever see the last snapshot, so opening the panel does not
+    touch the database.
+    """
+
+    def __init__(
+        self,
+        probes: PostgresProbePool,
+        targets: Callable[[], List[str]],
+        interval: float = 300.0,
+        top: int = 10,
+        long_query_seconds: float = 30.0,
+        concurrency: int = 2,
+        on_sample: Optional[Callable[[str, dict], None]] = None,
+    ) -> None:
+        self.probes = probes
+        self.targets = targets
+        self.interval = interval
+        self.top = max(1, top)
+        self.long_query_seconds = max(0.0, long_query_seconds)
+        self.concurrency = max(1, concurrency)
+        self.on_sample = on_sample
+        self.samples = 0
+        self.last_duration: float | None = None
+        self.last_error: str | None = None
+        self._snapshots: Dict[str, dict] = {}
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self, url: str) -> dict | None:
+        return self._snapshots.get(url)
+
+    def stats(self) -> dict:
+        return {
+            "interval": self.interval,
+            "running": self._task is not None and not self._task.done(),
+            "databases": len(self._snapshots),
+            "samples": self.samples,
+            "last_duration": self.last_duration,
+            "last_error": self.last_error,
+        }
+
+    async def sample_once(self) -> None:
+        urls = list(self.targets())
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def sample(url: str) -> None:
+            async with semaphore:
+                snapshot = self._snapshots[url] = await self._sample(url)
+            if self.on_sample is not None and snapshot["status"] == "ok":
+                try:
+                    self.on_sample(url, snapshot)
+                except Exception as exc:  # a failing consumer must not drop the other samples
+                    self.last_error = f"Errore elaborazione campione: {exc}"
+
+        await asyncio.gather(*(sample(url) for url in urls))
+        self._snapshots = {url: snapshot for url, snapshot in self._snapshots.items() if url in urls}
+        self.samples += 1
+
+    async def _loop(self) -> None:
+        while True:
+            started = time.monotonic()
+            try:
+                self.last_error = None
+                await self.sample_once()
+            except Exception as exc:  # pragma: no cover - keep the loop alive
+                self.last_error = f"Errore campionamento: {exc}"
+            self.last_duration = round(time.monotonic() - started, 3)
+            await asyncio.sleep(max(self.interval - self.last_duration, self.last_duration))
+
+    async def _sample(self, url: str) -> dict:
+        started = time.monotonic()
+        sections = {
+            "tables": _TABLES_QUERY.format(top=self.top, candidates=self.top * 3),
+            "indexes": _INDEXES_QUERY.format(top=self.top),
+            "long_queries": _LONG_QUERIES_QUERY.format(top=self.top, seconds=self.long_query_seconds),
+            "lock_waits": _LOCK_WAITS_QUERY.format(top=self.top),
+        }
+        snapshot: dict = {"url": url, "sampled_at": _iso(time.time()), "errors": {}}
+        for name in sections:
+            snapshot[name] = []
+        answered = False
+        for name, query in sections.items():
+            try:
+                rows = await self.probes.fetch(url, query)
+            except PostgresProbeError as exc:
+                snapshot["errors"][name] = str(exc)
+                if exc.connection:
+                    break
+                continue
+            answered = True
+            snapshot[name] = [table_hotspot(row) if name == "tables" else _plain(row) for row in rows]
+        snapshot["status"] = "ok" if answered else "error"
+        snapshot["duration"] = round(time.monotonic() - started, 3)
+        return snapshot
@@ -0,0 +1,179 @@
+import asyncio
+import json
+import os
+import signal
+import time
+from typing import Dict, Iterable, List
+
+try:
+    import asyncpg
+except ImportError:  # psql is used instead
+    asyncpg = None
+
+# Liveness, size and row estimate in one statement: if it answers, the database is up.
+# reltuples is -1 for tables never analyzed (PostgreSQL 14+).
+PROBE_QUERY = (
+    "SELECT pg_database_size(current_database()) AS size_bytes, "
+    "(SELECT COALESCE(SUM(GREATEST(reltuples, 0)), 0) FROM pg_class WHERE relkind = 'r')::bigint AS row_estimate"
+)
+
+
+class PostgresProbeError(Exception):
+    def __init__(self, message: str, connection: bool = False) -> None:
+        super().__init__(message)
+        self.connection = connection  # the server was not reached (as opposed to a failing query)
+
+
+def redact_url(url: str) -> str:
+    """The URL with its password masked, safe to show or store."""
+    scheme, sep, rest = url.partition("://")
+    credentials, at, host = rest.rpartition("@")
+    if not sep or not at:
+        return url
+    user = credentials.partition(":")[0]
+    return f"{scheme}://{user}:***@{host}"
+
+
+class PostgresProbePool:
+    """Read-only catalog queries against the configured databases over warm connections.
+
+    With asyncpg each URL gets its own small pool, created on first use and
+    kept open between refreshes, so a probe costs one round trip instead of a
+    process start plus a TLS/auth handshake. Connections idle for longer than
+    ``idle_timeout`` are closed. Without asyncpg (or with ``native=False``)
+    every query is a single ``psql`` invocation.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 2,
+        idle_timeout: float = 300.0,
+        connect_timeout: float = 5.0,
+        command_timeout: float = 8.0,
+        native: bool = True,
+    ) -> None:
+        self.max_size = max(1, max_size)
+        self.idle_timeout = idle_timeout
+        self.connect_timeout = connect_timeout
+        self.command_timeout = command_timeout
+        self.native = native and asyncpg is not None
+        self.queries = 0
+        self.connects = 0
+        self.failures = 0
+        self._pools: Dict[str, "asyncpg.Pool"] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    @property
+    def backend(self) -> str:
+        return "asyncpg" if self.native else "psql"
+
+    async def probe(self, url: str) -> dict:
+        started = time.monotonic()
+        rows = await self.fetch(url, PROBE_QUERY)
+        row = rows[0] if rows else {}
+        return {
+            "size_bytes": int(row.get("size_bytes") or 0),
+            "row_estimate": int(row.get("row_estimate") or 0),
+            "latency_ms": round((time.monotonic() - started) * 1000, 1),
+        }
+
+    async def fetch(self, url: str, query: str) -> List[dict]:
+        self.queries += 1
+        try:
+            if self.native:
+                return await self._fetch_native(url, query)
+            return await self._fetch_psql(url, query)
+        except PostgresProbeError:
+            self.failures += 1
+            raise
+
+    async def retain(self, urls: Iterable[str]) -> None:
+        """Closes the pools of databases no longer configured."""
+        keep = set(urls)
+        for url in [url for url in self._pools if url not in keep]:
+            await self._discard(url)
+
+    async def close(self) -> None:
+        for url in list(self._pools):
+            await self._discard(url)
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "pools": {
+                redact_url(url): {"size": pool.get_size(), "idle": pool.get_idle_size()}
+                for url, pool in self._pools.items()
+            },
+            "queries": self.queries,
+            "connects": self.connects,
+            "failures": self.failures,
+        }
+
+    async def _pool(self, url: str) -> "asyncpg.Pool":
+        pool = self._pools.get(url)
+        if pool is not None:
+            return pool
+        async with self._locks.setdefault(url, asyncio.Lock()):
+            pool = self._pools.get(url)
+            if pool is None:
+                self.connects += 1
+                pool = await asyncpg.create_pool(
+                    url,
+                    min_size=1,
+                    max_size=self.max_size,
+                    max_inactive_connection_lifetime=self.idle_timeout,
+                    timeout=self.connect_timeout,
+                    command_timeout=self.command_timeout,
+                    server_settings={"application_name": "dev-dashboard"},
+                )
+                self._pools[url] = pool
+        return pool
+
+    async def _fetch_native(self, url: str, query: str) -> List[dict]:
+        try:
+            pool = await self._pool(url)
+            async with pool.acquire(timeout=self.connect_timeout) as connection:
+                rows = await connection.fetch(query)
+        except (asyncpg.PostgresError, asyncpg.InterfaceError, OSError, asyncio.TimeoutError, ValueError) as exc:
+            unreachable = not isinstance(exc, asyncpg.PostgresError)
+            if unreachable:
+                await self._discard(url)  # reconnect from scratch next time
+            raise PostgresProbeError(str(exc) or type(exc).__name__, unreachable) from exc
+        return [dict(row) for row in rows]
+
+    async def _discard(self, url: str) -> None:
+        pool = self._pools.pop(url, None)
+        if pool is not None:
+            pool.terminate()
+
+    async def _fetch_psql(self, url: str, query: str) -> List[dict]:
+        wrapped = f"SELECT COALESCE(json_agg(q), '[]'::json) FROM ({query}) q"
+        try:
+            process = await asyncio.create_subprocess_exec(
+                "psql", url, "-At", "-X", "-c", wrapped,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                start_new_session=True,
+            )
+        except OSError as exc:
+            raise PostgresProbeError(str(exc), connection=True) from exc
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), self.connect_timeout + self.command_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            await process.wait()
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            raise PostgresProbeError("psql non ha risposto in tempo", connection=True) from exc
+        if process.returncode != 0:
+            detail = (stderr or stdout).decode("utf-8", errors="replace").strip()
+            # psql exits with 2 when the connection could not be made or was lost.
+            raise PostgresProbeError(detail or "Errore connessione", connection=process.returncode == 2)
+        try:
+            return json.loads(stdout.decode("utf-8", errors="replace").strip() or "[]")
+        except ValueError as exc:
+            raise PostgresProbeError("Risposta psql non valida") from exc
+
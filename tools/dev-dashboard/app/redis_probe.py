@@ -0,0 +1,258 @@
+import asyncio
+import ssl
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+
+_INFO_SECTIONS = ("memory", "stats", "keyspace")
+
+
+class RedisProbeError(Exception):
+    pass
+
+
+def redact_redis_url(url: str) -> str:
+    parsed = urlparse(url)
+    if not parsed.password:
+        return url
+    user = parsed.username or ""
+    return parsed._replace(netloc=f"{user}:***@{parsed.hostname}:{parsed.port or 6379}").geturl()
+
+
+def parse_info(text: str) -> Dict[str, str]:
+    """``INFO`` output as a flat ``field -> value`` mapping (section headers are skipped)."""
+    fields: Dict[str, str] = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        key, sep, value = line.partition(":")
+        if sep:
+            fields[key] = value
+    return fields
+
+
+def parse_keyspace(fields: Dict[str, str]) -> Dict[str, Dict[str, int]]:
+    """``db0:keys=12,expires=3,avg_ttl=0`` lines of ``INFO keyspace``."""
+    keyspace: Dict[str, Dict[str, int]] = {}
+    for key, value in fields.items():
+        if not key.startswith("db"):
+            continue
+        counts = {}
+        for item in value.split(","):
+            name, _, number = item.partition("=")
+            try:
+                counts[name] = int(number)
+            except ValueError:
+                continue
+        keyspace[key] = counts
+    return keyspace
+
+
+def _int(fields: Dict[str, str], key: str) -> int | None:
+    try:
+        return int(fields[key])
+    except (KeyError, ValueError):
+        return None
+
+
+def _float(fields: Dict[str, str], key: str) -> float | None:
+    try:
+        return float(fields[key])
+    except (KeyError, ValueError):
+        return None
+
+
+def info_metrics(memory: Dict[str, str], stats: Dict[str, str], keyspace: Dict[str, str]) -> dict:
+    hits = _int(stats, "keyspace_hits")
+    misses = _int(stats, "keyspace_misses")
+    lookups = (hits or 0) + (misses or 0)
+    databases = parse_keyspace(keyspace)
+    return {
+        "used_memory": _int(memory, "used_memory"),
+        "used_memory_human": memory.get("used_memory_human"),
+        "used_memory_peak": _int(memory, "used_memory_peak"),
+        "maxmemory": _int(memory, "maxmemory") or None,
+        "maxmemory_human": memory.get("maxmemory_human"),
+        "maxmemory_policy": memory.get("maxmemory_policy"),
+        "fragmentation_ratio": _float(memory, "mem_fragmentation_ratio"),
+        "ops_per_sec": _int(stats, "instantaneous_ops_per_sec"),
+        "keyspace_hits": hits,
+        "keyspace_misses": misses,
+        "hit_ratio": round(hits / lookups, 4) if hits is not None and lookups else None,
+        "evicted_keys": _int(stats, "evicted_keys"),
+        "expired_keys": _int(stats, "expired_keys"),
+        "rejected_connections": _int(stats, "rejected_connections"),
+        "keys": sum(counts.get("keys", 0) for counts in databases.values()),
+        "keyspace": databases,
+    }
+
+
+class _Connection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.last_used = time.monotonic()
+
+    @property
+    def closed(self) -> bool:
+        return self.writer.is_closing() or self.reader.at_eof()
+
+    async def pipeline(self, *commands: Tuple[str, ...]) -> List[object]:
+        """Sends every command in one write and reads the replies in order."""
+        payload = bytearray()
+        for command in commands:
+            payload += b"*%d\r\n" % len(command)
+            for arg in command:
+                data = arg.encode("utf-8")
+                payload += b"$%d\r\n%s\r\n" % (len(data), data)
+        self.writer.write(bytes(payload))
+        await self.writer.drain()
+        replies = [await self._reply() for _ in commands]
+        self.last_used = time.monotonic()
+        for reply in replies:
+            if isinstance(reply, RedisProbeError):
+                raise reply
+        return replies
+
+    async def _reply(self) -> object:
+        line = await self.reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Connessione Redis chiusa")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode("utf-8", errors="replace")
+        if kind == b"-":
+            return RedisProbeError(body.decode("utf-8", errors="replace"))
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            size = int(body)
+            if size < 0:
+                return None
+            data = await self.reader.readexactly(size + 2)
+            return data[:-2].decode("utf-8", errors="replace")
+        if kind == b"*":
+            count = int(body)
+            return None if count < 0 else [await self._reply() for _ in range(count)]
+        # RESP3 "verbatim string" (=) shows up when a proxy negotiated it; treat like a bulk string.
+        if kind == b"=":
+            data = await self.reader.readexactly(int(body) + 2)
+            return data[4:-2].decode("utf-8", errors="replace")
+        raise ConnectionError(f"Risposta Redis non valida: {line[:40]!r}")
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class RedisProbePool:
+    """Reads ``INFO memory``, ``INFO stats`` and ``INFO keyspace`` from the configured Redis servers.
+
+    Each URL keeps up to ``max_size`` authenticated connections open between
+    refreshes; a probe is the three ``INFO`` commands pipelined in a single
+    round trip. Connections unused for longer than ``idle_timeout`` are
+    closed instead of reused. ``rediss://`` URLs connect over TLS
+    (``?ssl_cert_reqs=none`` skips certificate verification, as in redis-py).
+    """
+
+    def __init__(self, max_size: int = 2, idle_timeout: float = 300.0, connect_timeout: float = 5.0) -> None:
+        self.max_size = max(1, max_size)
+        self.idle_timeout = idle_timeout
+        self.connect_timeout = connect_timeout
+        self.probes = 0
+        self.connects = 0
+        self.failures = 0
+        self._idle: Dict[str, Deque[_Connection]] = {}
+        self._slots: Dict[str, asyncio.Semaphore] = {}
+
+    async def probe(self, url: str) -> dict:
+        self.probes += 1
+        started = time.monotonic()
+        try:
+            replies = await self._run(url, *(("INFO", section) for section in _INFO_SECTIONS))
+        except RedisProbeError:
+            self.failures += 1
+            raise
+        sections = [parse_info(reply or "") for reply in replies]
+        return {**info_metrics(*sections), "latency_ms": round((time.monotonic() - started) * 1000, 1)}
+
+    async def retain(self, urls: Iterable[str]) -> None:
+        keep = set(urls)
+        for url in [url for url in self._idle if url not in keep]:
+            for connection in self._idle.pop(url):
+                connection.close()
+            self._slots.pop(url, None)
+
+    async def close(self) -> None:
+        await self.retain(())
+
+    def stats(self) -> dict:
+        return {
+            "connections": {redact_redis_url(url): len(idle) for url, idle in self._idle.items()},
+            "probes": self.probes,
+            "connects": self.connects,
+            "failures": self.failures,
+        }
+
+    async def _run(self, url: str, *commands: Tuple[str, ...]) -> List[object]:
+        async with self._slots.setdefault(url, asyncio.Semaphore(self.max_size)):
+            connection = self._reuse(url)
+            try:
+                if connection is None:
+                    connection = await self._connect(url)
+                replies = await connection.pipeline(*commands)
+            except RedisProbeError:
+                if connection is not None:
+                    self._idle.setdefault(url, deque()).append(connection)  # server answered: still usable
+                raise
+            except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError) as exc:
+                if connection is not None:
+                    connection.close()
+                raise RedisProbeError(str(exc) or type(exc).__name__) from exc
+            except BaseException:
+                # Cancelled mid-reply: the stream position is unknown, never reuse it.
+                if connection is not None:
+                    connection.close()
+                raise
+            self._idle.setdefault(url, deque()).append(connection)
+            return replies
+
+    def _reuse(self, url: str) -> _Connection | None:
+        idle = self._idle.get(url)
+        while idle:
+            connection = idle.pop()
+            if not connection.closed and time.monotonic() - connection.last_used < self.idle_timeout:
+                return connection
+            connection.close()
+        return None
+
+    async def _connect(self, url: str) -> _Connection:
+        parsed = urlparse(url)
+        if parsed.scheme not in ("redis", "rediss"):
+            raise RedisProbeError(f"Schema non supportato: {parsed.scheme or '?'}")
+        context = None
+        if parsed.scheme == "rediss":
+            context = ssl.create_default_context()
+            if parse_qs(parsed.query).get("ssl_cert_reqs", [""])[0].lower() == "none":
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+        self.connects += 1
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(parsed.hostname or "localhost", parsed.port or 6379, ssl=context),
+                self.connect_timeout,
+            )
+        except asyncio.TimeoutError as exc:
+            raise RedisProbeError("Connessione Redis scaduta") from exc
+        connection = _Connection(reader, writer)
+        if parsed.password:
+            auth = ("AUTH", unquote(parsed.password))
+            if parsed.username:
+                auth = ("AUTH", unquote(parsed.username), unquote(parsed.password))
+            try:
+                await connection.pipeline(auth)
+            except BaseException:
+                connection.close()
+                raise
+        return connection
@@ -0,0 +1,333 @@
+import asyncio
+import ctypes
+import ctypes.util
+import hashlib
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Set, Tuple
+
+DEFAULT_IGNORED_DIRS = (
+    "node_modules",
+    "dist",
+    "build",
+    ".next",
+    ".nuxt",
+    ".turbo",
+    ".cache",
+    ".parcel-cache",
+    "coverage",
+    "target",
+    "__pycache__",
+    ".venv",
+    "venv",
+)
+
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_DONT_FOLLOW = 0x02000000
+_IN_EXCL_UNLINK = 0x04000000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = os.O_CLOEXEC
+
+_WATCH_MASK = (
+    _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+    | _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_ONLYDIR | _IN_DONT_FOLLOW | _IN_EXCL_UNLINK
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _Inotify:
+    def __init__(self) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add = libc.inotify_add_watch
+        self._add.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm = libc.inotify_rm_watch
+        self._rm.argtypes = [ctypes.c_int, ctypes.c_int]
+        fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.fd = fd
+
+    def add_watch(self, path: Path) -> int:
+        wd = self._add(self.fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), str(path))
+        return wd
+
+    def rm_watch(self, wd: int) -> None:
+        self._rm(self.fd, wd)
+
+    def read_events(self) -> List[Tuple[int, int, str]]:
+        events: List[Tuple[int, int, str]] = []
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return events
+            if not data:
+                return events
+            pos = 0
+            while pos + _EVENT_HEADER.size <= len(data):
+                wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, pos)
+                pos += _EVENT_HEADER.size
+                name = data[pos:pos + length].rstrip(b"\0")
+                pos += length
+                events.append((wd, mask, os.fsdecode(name)))
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def _git_dir(repo_path: Path) -> Path | None:
+    dot_git = repo_path / ".git"
+    if dot_git.is_dir():
+        return dot_git
+    try:
+        content = dot_git.read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    if not content.startswith("gitdir:"):
+        return None
+    git_dir = Path(content[len("gitdir:"):].strip())
+    return git_dir if git_dir.is_absolute() else (repo_path / git_dir).resolve()
+
+
+class RepoWatcher:
+    """Tracks which workspace repositories changed since their last probe.
+
+    Uses inotify when available and falls back to periodic stat fingerprints
+    (whole watcher on non-Linux hosts, single repositories when the kernel
+    watch limit is reached). Repositories are "dirty" until ``take_dirty``
+    hands them to a probe; while the watcher is not running every repository
+    is reported as dirty.
+    """
+
+    def __init__(
+        self,
+        mode: str = "auto",
+        ignored_dirs: Iterable[str] = DEFAULT_IGNORED_DIRS,
+        poll_interval: float = 10.0,
+    ) -> None:
+        self.mode = mode
+        self.ignored_dirs = frozenset(ignored_dirs)
+        self.poll_interval = poll_interval
+        self.backend = "off"
+        self._inotify: _Inotify | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock = threading.Lock()
+        self._watches: Dict[int, Tuple[Path, Path, bool]] = {}
+        self._repo_watches: Dict[Path, Set[int]] = {}
+        self._polled: Dict[Path, str | None] = {}
+        self._dirty: Set[Path] = set()
+        self._poll_task: asyncio.Task | None = None
+        self.events = 0
+        self.overflows = 0
+
+    @property
+    def active(self) -> bool:
+        return self.backend != "off"
+
+    async def start(self) -> None:
+        if self.active or self.mode == "off":
+            return
+        self._loop = asyncio.get_running_loop()
+        if self.mode != "poll":
+            try:
+                self._inotify = _Inotify()
+            except (OSError, AttributeError):
+                self._inotify = None
+        if self._inotify is not None:
+            self._loop.add_reader(self._inotify.fd, self._on_readable)
+            self.backend = "inotify"
+        else:
+            self.backend = "poll"
+        self._poll_task = asyncio.create_task(self._poll_loop())
+
+    async def stop(self) -> None:
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+            try:
+                await self._poll_task
+            except asyncio.CancelledError:
+                pass
+            self._poll_task = None
+        if self._inotify is not None and self._loop is not None:
+            self._loop.remove_reader(self._inotify.fd)
+            self._inotify.close()
+            self._inotify = None
+        with self._lock:
+            self._watches.clear()
+            self._repo_watches.clear()
+            self._polled.clear()
+        self.backend = "off"
+
+    async def sync(self, repo_paths: Iterable[Path]) -> None:
+        if not self.active:
+            return
+        wanted = set(repo_paths)
+        known = set(self._repo_watches) | set(self._polled)
+        for repo_path in known - wanted:
+            self._forget(repo_path)
+        added = wanted - known
+        if added:
+            await asyncio.to_thread(self._register, sorted(added))
+            self._dirty.update(added)
+
+    def take_dirty(self, repo_paths: Iterable[Path]) -> Set[Path]:
+        repo_paths = set(repo_paths)
+        if not self.active:
+            return repo_paths
+        dirty = self._dirty & repo_paths
+        self._dirty -= dirty
+        return dirty
+
+    def mark(self, repo_path: Path) -> None:
+        self._dirty.add(repo_path)
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "watches": len(self._watches),
+            "watched_repos": len(self._repo_watches),
+            "polled_repos": len(self._polled),
+            "dirty": sorted(path.name for path in self._dirty),
+            "events": self.events,
+            "overflows": self.overflows,
+        }
+
+    def _forget(self, repo_path: Path) -> None:
+        with self._lock:
+            for wd in self._repo_watches.pop(repo_path, set()):
+                self._watches.pop(wd, None)
+                if self._inotify is not None:
+                    self._inotify.rm_watch(wd)
+            self._polled.pop(repo_path, None)
+        self._dirty.discard(repo_path)
+
+    def _register(self, repo_paths: List[Path]) -> None:
+        for repo_path in repo_paths:
+            if self._inotify is None:
+                self._polled[repo_path] = self._fingerprint(repo_path)
+                continue
+            try:
+                self._watch_repo(repo_path)
+            except OSError:
+                # Typically ENOSPC (fs.inotify.max_user_watches exhausted): keep the repo on polling.
+                self._forget(repo_path)
+                self._polled[repo_path] = self._fingerprint(repo_path)
+
+    def _watch_repo(self, repo_path: Path) -> None:
+        self._watch_tree(repo_path, repo_path)
+        git_dir = _git_dir(repo_path)
+        if git_dir is not None:
+            # index and HEAD live directly in the git dir; refs change on commit/fetch.
+            self._add_watch(repo_path, git_dir, recursive=False)
+            if (git_dir / "refs").is_dir():
+                self._watch_tree(repo_path, git_dir / "refs")
+
+    def _watch_tree(self, repo_path: Path, directory: Path) -> None:
+        self._add_watch(repo_path, directory, recursive=True)
+        try:
+            children = list(os.scandir(directory))
+        except OSError:
+            return
+        for child in children:
+            if child.is_dir(follow_symlinks=False) and not self._ignored(child.name):
+                self._watch_tree(repo_path, Path(child.path))
+
+    def _add_watch(self, repo_path: Path, directory: Path, recursive: bool) -> None:
+        try:
+            wd = self._inotify.add_watch(directory)
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self._watches[wd] = (repo_path, directory, recursive)
+            self._repo_watches.setdefault(repo_path, set()).add(wd)
+
+    def _ignored(self, name: str) -> bool:
+        return name == ".git" or name in self.ignored_dirs
+
+    def _on_readable(self) -> None:
+        for wd, mask, name in self._inotify.read_events():
+            self.events += 1
+            if mask & _IN_Q_OVERFLOW:
+                self.overflows += 1
+                self._dirty.update(self._repo_watches)
+                continue
+            with self._lock:
+                watched = self._watches.get(wd)
+                if mask & _IN_IGNORED:
+                    self._watches.pop(wd, None)
+                    if watched:
+                        self._repo_watches.get(watched[0], set()).discard(wd)
+            if watched is None:
+                continue
+            repo_path, directory, recursive = watched
+            if name and self._ignored(name):
+                continue
+            self._dirty.add(repo_path)
+            if recursive and mask & _IN_ISDIR and mask & (_IN_CREATE | _IN_MOVED_TO):
+                try:
+                    self._watch_tree(repo_path, directory / name)
+                except OSError:
+                    self._polled[repo_path] = None
+
+    async def _poll_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            polled = dict(self._polled)
+            if not polled:
+                continue
+            fingerprints = await asyncio.to_thread(
+                lambda: {repo_path: self._fingerprint(repo_path) for repo_path in polled}
+            )
+            for repo_path, fingerprint in fingerprints.items():
+                if repo_path not in self._polled:
+                    continue
+                if fingerprint != polled[repo_path]:
+                    self._polled[repo_path] = fingerprint
+                    self._dirty.add(repo_path)
+
+    def _fingerprint(self, repo_path: Path) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        stack = [repo_path]
+        git_dir = _git_dir(repo_path)
+        if git_dir is not None:
+            for name in ("HEAD", "index"):
+                self._hash_stat(digest, git_dir / name)
+            stack.append(git_dir / "refs")
+        while stack:
+            directory = stack.pop()
+            try:
+                children = sorted(os.scandir(directory), key=lambda item: item.name)
+            except OSError:
+                continue
+            for child in children:
+                if child.is_dir(follow_symlinks=False):
+                    if not self._ignored(child.name):
+                        stack.append(Path(child.path))
+                    continue
+                self._hash_stat(digest, Path(child.path))
+        return digest.hexdigest()
+
+    @staticmethod
+    def _hash_stat(digest, path: Path) -> None:
+        try:
+            info = os.lstat(path)
+        except OSError:
+            return
+        digest.update(f"{path}\0{info.st_mtime_ns}\0{info.st_size}\0{info.st_mode}\n".encode("utf-8", "surrogateescape"))
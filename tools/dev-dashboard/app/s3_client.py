@@ -0,0 +1,364 @@
+import asyncio
+import configparser
+import hashlib
+import hmac
+import os
+import re
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, Tuple
+from urllib.parse import quote, urlsplit
+from xml.etree import ElementTree
+
+import httpx
+
+_EMPTY_SHA256 = hashlib.sha256(b"").hexdigest()
+_ENDPOINT_REGION = re.compile(r"^s3[.-]([a-z0-9-]+)\.(?:amazonaws\.com|wasabisys\.com)$")
+
+
+class S3Error(Exception):
+    def __init__(self, message: str, status_code: int | None = None, code: str | None = None) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.code = code
+
+
+@dataclass
+class S3Credentials:
+    access_key: str
+    secret_key: str
+    session_token: str | None = None
+    region: str = "us-east-1"
+
+
+def load_credentials() -> S3Credentials | None:
+    """Same sources as the AWS CLI, minus SSO and instance roles: environment, then ``~/.aws`` files."""
+    profile = os.environ.get("AWS_PROFILE") or "default"
+    files = configparser.ConfigParser()
+    files.read(
+        [
+            os.environ.get("AWS_SHARED_CREDENTIALS_FILE") or Path.home() / ".aws" / "credentials",
+            os.environ.get("AWS_CONFIG_FILE") or Path.home() / ".aws" / "config",
+        ]
+    )
+    stored: Dict[str, str] = {}
+    for section in (profile, f"profile {profile}"):
+        if files.has_section(section):
+            stored.update(files[section])
+    access_key = os.environ.get("AWS_ACCESS_KEY_ID") or stored.get("aws_access_key_id")
+    secret_key = os.environ.get("AWS_SECRET_ACCESS_KEY") or stored.get("aws_secret_access_key")
+    if not access_key or not secret_key:
+        return None
+    return S3Credentials(
+        access_key,
+        secret_key,
+        os.environ.get("AWS_SESSION_TOKEN") or stored.get("aws_session_token"),
+        os.environ.get("AWS_REGION") or os.environ.get("AWS_DEFAULT_REGION") or stored.get("region") or "us-east-1",
+    )
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _quote(value: str) -> str:
+    return quote(value, safe="-_.~")
+
+
+class S3Client:
+    """ListObjectsV2 and GetObject over SigV4-signed requests, with connections pooled in one ``httpx.AsyncClient``.
+
+    Without ``endpoint`` buckets are addressed on AWS (virtual-hosted style,
+    following the region the bucket reports); with a custom endpoint
+    (Wasabi, MinIO, ...) requests use path style. Listings are parsed while
+    they stream in and every object is handed to a callback, so memory does
+    not grow with the bucket.
+
+    ``transport`` replaces the network layer (e.g. ``httpx.MockTransport``).
+    """
+
+    def __init__(
+        self,
+        credentials: Callable[[], S3Credentials | None] = load_credentials,
+        timeout: float = 20.0,
+        max_connections: int = 8,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self._credentials_loader = credentials
+        self._credentials: S3Credentials | None = None
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.transport = transport
+        self.requests = 0
+        self._client: httpx.AsyncClient | None = None
+        self._regions: Dict[Tuple[str | None, str], str] = {}
+
+    @property
+    def credentials(self) -> S3Credentials | None:
+        if self._credentials is None:
+            self._credentials = self._credentials_loader()
+        return self._credentials
+
+    @property
+    def available(self) -> bool:
+        return self.credentials is not None
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+                transport=self.transport,
+            )
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def check(self, bucket: str, endpoint: str | None = None) -> None:
+        """Raises ``S3Error`` unless the bucket can be listed (a single one-key page)."""
+        await self.list_page(bucket, endpoint, max_keys=1)
+
+    async def scan(
+        self,
+        bucket: str,
+        endpoint: str | None = None,
+        prefix: str = "",
+        on_object: Callable[[str, int], None] | None = None,
+    ) -> Tuple[int, int]:
+        """Pages through the whole listing; returns ``(object count, total bytes)``."""
+        count = total = 0
+
+        def collect(key: str, size: int) -> None:
+            nonlocal count, total
+            count += 1
+            total += size
+            if on_object is not None:
+                on_object(key, size)
+
+        token = None
+        while True:
+            token = await self.list_page(bucket, endpoint, prefix=prefix, token=token, on_object=collect)
+            if not token:
+                return count, total
+
+    async def list_page(
+        self,
+        bucket: str,
+        endpoint: str | None = None,
+        prefix: str = "",
+        token: str | None = None,
+        max_keys: int = 1000,
+        on_object: Callable[[str, int], None] | None = None,
+    ) -> str | None:
+        """One ListObjectsV2 page; returns the continuation token, None on the last page."""
+        params = {"list-type": "2", "max-keys": str(max_keys)}
+        if prefix:
+            params["prefix"] = prefix
+        if token:
+            params["continuation-token"] = token
+        async with self._get(bucket, endpoint, params=params) as response:
+            try:
+                return await self._parse_listing(response, on_object)
+            except ElementTree.ParseError as exc:
+                raise S3Error(f"Listing S3 non valido: {exc}") from exc
+
+    async def iter_object(self, bucket: str, key: str, endpoint: str | None = None) -> AsyncIterator[bytes]:
+        """The object body, chunk by chunk as it arrives."""
+        async with self._get(bucket, endpoint, key=key) as response:
+            async for chunk in response.aiter_bytes():
+                yield chunk
+
+    async def get_object(self, bucket: str, key: str, endpoint: str | None = None) -> bytes:
+        return b"".join([chunk async for chunk in self.iter_object(bucket, key, endpoint)])
+
+    @asynccontextmanager
+    async def _get(
+        self, bucket: str, endpoint: str | None, key: str = "", params: Dict[str, str] | None = None
+    ) -> AsyncIterator[httpx.Response]:
+        query = "&".join(f"{_quote(name)}={_quote(value)}" for name, value in sorted((params or {}).items()))
+        for attempt in range(2):
+            url, region = self._bucket_url(bucket, endpoint)
+            if key:
+                url = f"{url.rstrip('/')}/{quote(key, safe='/-_.~')}"
+            headers = self._sign("GET", url, query, region)
+            self.requests += 1
+            try:
+                async with self._http().stream("GET", f"{url}?{query}" if query else url, headers=headers) as response:
+                    moved = response.headers.get("x-amz-bucket-region")
+                    if response.status_code in (301, 400) and moved and moved != region and attempt == 0 and not endpoint:
+                        self._regions[(endpoint, bucket)] = moved  # bucket lives elsewhere: sign for its region
+                        await response.aread()
+                        continue
+                    if response.status_code >= 300:
+                        raise self._error(response.status_code, await response.aread())
+                    yield response
+                    return
+            except httpx.HTTPError as exc:
+                raise S3Error(f"S3 non raggiungibile: {exc}") from exc
+        raise S3Error(f"Bucket {bucket}: redirect di regione non risolto")
+
+    def _bucket_url(self, bucket: str, endpoint: str | None) -> Tuple[str, str]:
+        credentials = self.credentials
+        if credentials is None:
+            raise S3Error("Credenziali AWS non configurate")
+        if endpoint:
+            parts = urlsplit(endpoint.rstrip("/"))
+            inferred = _ENDPOINT_REGION.match(parts.hostname or "")
+            region = self._regions.get((endpoint, bucket)) or (inferred.group(1) if inferred else credentials.region)
+            return f"{parts.scheme}://{parts.netloc}{parts.path}/{quote(bucket)}", region
+        region = self._regions.get((None, bucket)) or credentials.region
+        host = "s3.amazonaws.com" if region == "us-east-1" else f"s3.{region}.amazonaws.com"
+        if "." in bucket:
+            return f"https://{host}/{quote(bucket)}", region  # dots break the wildcard certificate
+        return f"https://{bucket}.{host}/", region
+
+    def _sign(self, method: str, url: str, query: str, region: str) -> Dict[str, str]:
+        credentials = self.credentials
+        parts = urlsplit(url)
+        now = datetime.now(timezone.utc)
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        datestamp = amz_date[:8]
+        headers = {"host": parts.netloc, "x-amz-content-sha256": _EMPTY_SHA256, "x-amz-date": amz_date}
+        if credentials.session_token:
+            headers["x-amz-security-token"] = credentials.session_token
+        signed_headers = ";".join(sorted(headers))
+        canonical_request = "\n".join(
+            [
+                method,
+                quote(parts.path or "/", safe="/-_.~%"),
+                query,
+                "".join(f"{name}:{headers[name]}\n" for name in sorted(headers)),
+                signed_headers,
+                _EMPTY_SHA256,
+            ]
+        )
+        scope = f"{datestamp}/{region}/s3/aws4_request"
+        string_to_sign = "\n".join(
+            ["AWS4-HMAC-SHA256", amz_date, scope, hashlib.sha256(canonical_request.encode("utf-8")).hexdigest()]
+        )
+        key = f"AWS4{credentials.secret_key}".encode("utf-8")
+        for part in (datestamp, region, "s3", "aws4_request"):
+            key = hmac.new(key, part.encode("utf-8"), hashlib.sha256).digest()
+        signature = hmac.new(key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+        headers["authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={credentials.access_key}/{scope}, "
+            f"SignedHeaders={signed_headers}, Signature={signature}"
+        )
+        del headers["host"]  # httpx sends the same value
+        return headers
+
+    @staticmethod
+    async def _parse_listing(response: httpx.Response, on_object: Callable[[str, int], None] | None) -> str | None:
+        parser = ElementTree.XMLPullParser(events=("end",))
+        truncated = False
+        token = None
+        async for chunk in response.aiter_bytes():
+            parser.feed(chunk)
+            for _, element in parser.read_events():
+                tag = _local(element.tag)
+                if tag == "Contents":
+                    if on_object is not None:
+                        fields = {_local(child.tag): child.text or "" for child in element}
+                        on_object(fields.get("Key", ""), int(fields.get("Size") or 0))
+                    element.clear()
+                elif tag == "IsTruncated":
+                    truncated = (element.text or "").strip().lower() == "true"
+                elif tag == "NextContinuationToken":
+                    token = element.text
+        parser.close()
+        return token if truncated else None
+
+    @staticmethod
+    def _error(status_code: int, body: bytes) -> S3Error:
+        code = message = None
+        try:
+            root = ElementTree.fromstring(body)
+            code = root.findtext("Code") or None
+            message = root.findtext("Message") or None
+        except ElementTree.ParseError:
+            pass
+        text = f"{code}: {message}" if code and message else code or message or f"HTTP {status_code}"
+        return S3Error(text, status_code, code)
+
+
+class BucketUsage:
+    """Size and object count of each bucket from full listings run in the background.
+
+    A probe only lists one key (the reachability check) and returns the last
+    completed count. When that count is older than ``ttl`` seconds a new
+    full scan starts in the background, at most ``concurrency`` at a time,
+    so a bucket with millions of objects never holds up a status refresh;
+    while it runs its progress is reported as well.
+    """
+
+    def __init__(self, client: S3Client, ttl: float = 3600.0, concurrency: int = 2) -> None:
+        self.client = client
+        self.ttl = ttl
+        self.semaphore = asyncio.Semaphore(max(1, concurrency))
+        self.scans = 0
+        self._results: Dict[str, dict] = {}
+        self._progress: Dict[str, dict] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    async def probe(self, bucket: str, endpoint: str | None = None) -> dict:
+        await self.client.check(bucket, endpoint)
+        result = self._results.get(bucket)
+        if bucket not in self._tasks and (result is None or time.time() - result["finished"] >= self.ttl):
+            self._tasks[bucket] = asyncio.create_task(self._scan(bucket, endpoint))
+        usage = dict(result or {})
+        if bucket in self._progress:
+            usage["scanning"] = dict(self._progress[bucket])
+        return usage
+
+    async def close(self) -> None:
+        for task in list(self._tasks.values()):
+            task.cancel()
+        for task in list(self._tasks.values()):
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.client.close()
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.client.requests,
+            "scans": self.scans,
+            "running": sorted(self._tasks),
+            "buckets": len(self._results),
+        }
+
+    async def _scan(self, bucket: str, endpoint: str | None) -> None:
+        progress = self._progress[bucket] = {"objects": 0, "size_bytes": 0, "started": time.time()}
+
+        def count(_key: str, size: int) -> None:
+            progress["objects"] += 1
+            progress["size_bytes"] += size
+
+        try:
+            async with self.semaphore:
+                progress["started"] = time.time()
+                objects, size = await self.client.scan(bucket, endpoint, on_object=count)
+            finished = time.time()
+            self._results[bucket] = {
+                "object_count": objects,
+                "size_bytes": size,
+                "finished": finished,
+                "scanned_at": datetime.fromtimestamp(finished, timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z"),
+                "duration": round(finished - progress["started"], 1),
+            }
+            self.scans += 1
+        except Exception as exc:  # S3Error, but also network or parsing errors
+            if bucket in self._results:
+                self._results[bucket]["last_error"] = str(exc)
+            else:
+                self._results[bucket] = {"last_error": str(exc), "finished": time.time()}
+        finally:
+            self._progress.pop(bucket, None)
+            self._tasks.pop(bucket, None)
@@ -0,0 +1,256 @@
+import asyncio
+import random
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Tuple
+
+import httpx
+
+try:
+    import h2  # noqa: F401  (httpx negotiates HTTP/2 only when h2 is installed)
+except ImportError:
+    HTTP2_AVAILABLE = False
+else:
+    HTTP2_AVAILABLE = True
+
+
+class ScalingoApiError(Exception):
+    def __init__(self, message: str, status_code: int | None = None) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+
+_TRANSIENT_STATUS = {500, 502, 503, 504}
+
+
+def retry_after_seconds(value: str | None) -> float | None:
+    """``Retry-After`` as seconds to wait, given either as a number or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Allows ``rate`` requests per second on average, with bursts of up to ``burst``.
+
+    ``pause`` empties the bucket until the given delay has passed, which is
+    how a ``429`` answer holds back every pending request, not only the one
+    that was refused.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.waited = 0.0
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.rate
+                self.waited += delay
+                await asyncio.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        if self.rate <= 0:
+            return
+        # Negative tokens refill to zero only after ``seconds``.
+        self._tokens = min(self._tokens, -seconds * self.rate)
+        self._updated = time.monotonic()
+
+
+class ScalingoClient:
+    """Scalingo REST API over one long-lived, pooled ``httpx.AsyncClient``.
+
+    Every region and request share the same connections (HTTP/2 when h2 is
+    installed), so a refresh no longer pays a TLS handshake per call. The
+    apps list of a region is fetched once and shared for ``apps_ttl``
+    seconds: concurrent callers (the apps card and the addons card) wait
+    for the same request instead of issuing their own.
+
+    Requests are paced by a ``TokenBucket`` (``rate`` per second, bursts of
+    ``burst``). A ``429`` pauses the bucket for its ``Retry-After``; 429s,
+    5xx answers and network errors are retried up to ``retries`` times
+    with jittered exponential backoff. Responses carrying an ``ETag`` or
+    ``Last-Modified`` are kept (the last ``cache_size``) and revalidated
+    with ``If-None-Match``/``If-Modified-Since``, so an unchanged app
+    costs a ``304`` instead of a full body.
+
+    ``transport`` replaces the network layer (e.g. ``httpx.MockTransport``).
+    """
+
+    def __init__(
+        self,
+        timeout: float = 10.0,
+        max_connections: int = 10,
+        apps_ttl: float = 15.0,
+        rate: float = 5.0,
+        burst: int = 10,
+        retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        cache_size: int = 1024,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.apps_ttl = apps_ttl
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.cache_size = cache_size
+        self.transport = transport
+        self.bucket = TokenBucket(rate, burst)
+        self.requests = 0
+        self.failures = 0
+        self.apps_shared = 0
+        self.retried = 0
+        self.throttled = 0
+        self.not_modified = 0
+        self._client: httpx.AsyncClient | None = None
+        self._apps: Dict[Tuple[str, str], Tuple[float, asyncio.Future]] = {}
+        self._cache: "OrderedDict[Tuple[str, str], Tuple[Dict[str, str], dict]]" = OrderedDict()
+
+    @property
+    def http_version(self) -> str:
+        return "HTTP/2" if HTTP2_AVAILABLE else "HTTP/1.1"
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+                headers={"Accept": "application/json"},
+                transport=self.transport,
+            )
+        return self._client
+
+    async def close(self) -> None:
+        self._apps.clear()
+        self._cache.clear()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def get(self, base_url: str, token: str, path: str) -> dict:
+        url = f"{base_url}{path}"
+        cache_key = (url, token)
+        attempt = 0
+        while True:
+            cached = self._cache.get(cache_key)
+            headers = {"Authorization": f"Bearer {token}", **(cached[0] if cached else {})}
+            await self.bucket.acquire()
+            self.requests += 1
+            try:
+                response = await self._http().get(url, headers=headers)
+            except httpx.TransportError as exc:
+                error = ScalingoApiError(f"Errore HTTP Scalingo API: {exc}")
+                delay = None
+                paused = False
+            except httpx.HTTPError as exc:
+                self.failures += 1
+                raise ScalingoApiError(f"Errore HTTP Scalingo API: {exc}") from exc
+            else:
+                if response.status_code == 304 and cached:
+                    self.not_modified += 1
+                    self._cache.move_to_end(cache_key)
+                    return cached[1]
+                if response.status_code == 200:
+                    return self._store(cache_key, response)
+                error = ScalingoApiError(
+                    f"API Scalingo ha risposto {response.status_code}: {response.text[:200]}", response.status_code
+                )
+                if response.status_code != 429 and response.status_code not in _TRANSIENT_STATUS:
+                    self.failures += 1
+                    raise error
+                delay = retry_after_seconds(response.headers.get("Retry-After"))
+                paused = response.status_code == 429 and self.bucket.rate > 0
+                if response.status_code == 429:
+                    self.throttled += 1
+                if paused:
+                    # The next acquire() waits out the pause, for this request as for the others.
+                    self.bucket.pause(min(delay, self.max_backoff) if delay is not None else self._backoff(attempt))
+            if attempt >= self.retries:
+                self.failures += 1
+                raise error
+            self.retried += 1
+            if not paused:
+                await asyncio.sleep(min(delay, self.max_backoff) if delay is not None else self._backoff(attempt))
+            attempt += 1
+
+    def _backoff(self, attempt: int) -> float:
+        # "Full jitter": spreads retries of concurrent requests instead of synchronising them.
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def _store(self, cache_key: Tuple[str, str], response: httpx.Response) -> dict:
+        try:
+            payload = response.json()
+        except ValueError as exc:
+            self.failures += 1
+            raise ScalingoApiError(f"Risposta Scalingo non valida: {exc}") from exc
+        validators = {}
+        if response.headers.get("ETag"):
+            validators["If-None-Match"] = response.headers["ETag"]
+        if response.headers.get("Last-Modified"):
+            validators["If-Modified-Since"] = response.headers["Last-Modified"]
+        if validators:
+            self._cache[cache_key] = (validators, payload)
+            self._cache.move_to_end(cache_key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.pop(cache_key, None)
+        return payload
+
+    async def apps(self, base_url: str, token: str) -> List[dict]:
+        key = (base_url, token)
+        cached = self._apps.get(key)
+        if cached is not None and time.monotonic() - cached[0] < self.apps_ttl:
+            self.apps_shared += 1
+            future = cached[1]
+        else:
+            future = asyncio.ensure_future(self.get(base_url, token, "/v1/apps"))
+            self._apps[key] = (time.monotonic(), future)
+        try:
+            payload = await asyncio.shield(future)
+        except ScalingoApiError:
+            if self._apps.get(key, (None, None))[1] is future:
+                del self._apps[key]  # do not share a failure
+            raise
+        return payload.get("apps", [])
+
+    async def addons(self, base_url: str, token: str, app_name: str) -> List[dict]:
+        payload = await self.get(base_url, token, f"/v1/apps/{app_name}/addons")
+        return payload.get("addons", [])
+
+    def stats(self) -> dict:
+        return {
+            "http_version": self.http_version,
+            "requests": self.requests,
+            "failures": self.failures,
+            "apps_shared": self.apps_shared,
+            "retried": self.retried,
+            "throttled": self.throttled,
+            "not_modified": self.not_modified,
+            "cached": len(self._cache),
+            "rate_limit_wait": round(self.bucket.waited, 2),
+        }
@@ -0,0 +1,234 @@
+import asyncio
+import json
+import os
+import re
+import signal
+import uuid
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Deque, Dict, List, Tuple
+
+from .status_engine import BroadcastHub, sse_message
+
+# Output is forwarded line by line; a line longer than this is split.
+MAX_LINE_BYTES = 64 * 1024
+_READ_CHUNK = 16 * 1024
+_RUN_ID = re.compile(r"^\d{14}-[0-9a-f]{8}$")
+
+
+class ScriptRun:
+    """One execution of a workspace script.
+
+    The complete output is appended to ``spool_path`` as it is produced; only
+    the last ``tail_lines`` lines per stream stay in memory. Live listeners
+    subscribe to ``hub`` and receive ``line`` events followed by one ``end``.
+    """
+
+    def __init__(self, run_id: str, script: str, args: List[str], spool_path: Path, tail_lines: int) -> None:
+        self.id = run_id
+        self.script = script
+        self.args = args
+        self.spool_path = spool_path
+        self.started_at = datetime.utcnow().isoformat() + "Z"
+        self.finished_at: str | None = None
+        self.exit_code: int | None = None
+        self.error: str | None = None
+        self.seq = 0
+        self.bytes = 0
+        self.line_counts = {"stdout": 0, "stderr": 0}
+        self.tails: Dict[str, Deque[str]] = {"stdout": deque(maxlen=tail_lines), "stderr": deque(maxlen=tail_lines)}
+        self.recent: Deque[Tuple[int, str, str]] = deque(maxlen=tail_lines)
+        self.hub = BroadcastHub(queue_size=1024)
+        self.listeners: List[Callable[[str, str], None]] = []
+        self.done = asyncio.Event()
+        self.process: asyncio.subprocess.Process | None = None
+        self.task: asyncio.Task | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.done.is_set()
+
+    def tail(self, stream: str) -> str:
+        return "\n".join(self.tails[stream])
+
+    def truncated(self, stream: str | None = None) -> bool:
+        streams = [stream] if stream else list(self.tails)
+        return any(self.line_counts[name] > len(self.tails[name]) for name in streams)
+
+    def describe(self) -> dict:
+        return {
+            "id": self.id,
+            "script": self.script,
+            "args": self.args,
+            "status": "finished" if self.finished else "running",
+            "exit_code": self.exit_code,
+            "error": self.error,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "lines": self.seq,
+            "bytes": self.bytes,
+            "truncated": self.truncated(),
+            "output_url": f"/api/scripts/runs/{self.id}/output",
+        }
+
+    def emit(self, stream: str, text: str) -> None:
+        self.seq += 1
+        self.line_counts[stream] += 1
+        self.tails[stream].append(text)
+        self.recent.append((self.seq, stream, text))
+        self.hub.publish("line", {"seq": self.seq, "stream": stream, "text": text}, self.seq)
+        for listener in self.listeners:
+            listener(stream, text)
+
+    async def wait(self) -> None:
+        await self.done.wait()
+
+    async def events(self):
+        """SSE messages for a listener: buffered tail first, then live lines."""
+        async with self.hub.subscribe() as queue:
+            # Everything up to self.seq is in `recent`; anything newer arrives on the queue.
+            replay = list(self.recent)
+            first_seq = replay[0][0] if replay else self.seq + 1
+            yield sse_message("run", json.dumps({**self.describe(), "replay_from": first_seq}).encode("utf-8"))
+            for seq, stream, text in replay:
+                payload = json.dumps({"seq": seq, "stream": stream, "text": text}, ensure_ascii=False)
+                yield sse_message("line", payload.encode("utf-8"), seq)
+            if self.finished:
+                yield sse_message("end", json.dumps(self.describe()).encode("utf-8"))
+                return
+            while True:
+                message = await queue.get()
+                if message is None:
+                    # Listener too slow: the full output stays available from the spool.
+                    yield sse_message("lagged", json.dumps(self.describe()).encode("utf-8"))
+                    return
+                yield message
+                if self.finished and queue.empty():
+                    return
+
+
+class ScriptRunStore:
+    def __init__(self, root: Path, tail_lines: int = 500, retention: int = 50) -> None:
+        self.root = root
+        self.tail_lines = tail_lines
+        self.retention = retention
+        self._runs: Dict[str, ScriptRun] = {}
+
+    def start(
+        self,
+        script_path: Path,
+        args: List[str],
+        cwd: Path,
+        listener: Callable[[str, str], None] | None = None,
+    ) -> ScriptRun:
+        self.root.mkdir(parents=True, exist_ok=True)
+        run_id = f"{datetime.utcnow():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}"
+        run = ScriptRun(run_id, script_path.name, args, self.root / f"{run_id}.log", self.tail_lines)
+        if listener is not None:
+            run.listeners.append(listener)
+        self._runs[run_id] = run
+        run.task = asyncio.create_task(self._execute(run, [str(script_path), *args], cwd))
+        return run
+
+    def get(self, run_id: str) -> ScriptRun | dict | None:
+        if not _RUN_ID.match(run_id):
+            return None
+        if run_id in self._runs:
+            return self._runs[run_id]
+        meta_path = self.root / f"{run_id}.json"
+        if meta_path.exists():
+            return json.loads(meta_path.read_text(encoding="utf-8"))
+        return None
+
+    def output_path(self, run_id: str) -> Path | None:
+        if not _RUN_ID.match(run_id):
+            return None
+        path = self.root / f"{run_id}.log"
+        return path if path.exists() else None
+
+    def list(self, limit: int = 50) -> List[dict]:
+        runs: Dict[str, dict] = {}
+        if self.root.exists():
+            for meta_path in sorted(self.root.glob("*.json"), reverse=True)[:limit]:
+                try:
+                    runs[meta_path.stem] = json.loads(meta_path.read_text(encoding="utf-8"))
+                except (OSError, json.JSONDecodeError):
+                    continue
+        for run in self._runs.values():
+            runs[run.id] = run.describe()
+        return [runs[key] for key in sorted(runs, reverse=True)[:limit]]
+
+    async def _execute(self, run: ScriptRun, command: List[str], cwd: Path) -> None:
+        try:
+            with run.spool_path.open("wb") as spool:
+                run.process = await asyncio.create_subprocess_exec(
+                    *command,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=str(cwd),
+                    start_new_session=True,
+                )
+                await asyncio.gather(
+                    self._pump(run, "stdout", run.process.stdout, spool),
+                    self._pump(run, "stderr", run.process.stderr, spool),
+                )
+                run.exit_code = await run.process.wait()
+        except asyncio.CancelledError:
+            if run.process and run.process.returncode is None:
+                try:
+                    os.killpg(run.process.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                await run.process.wait()
+            run.exit_code = run.process.returncode if run.process else -1
+            run.error = "Esecuzione annullata"
+        except Exception as exc:  # spool not writable, command not startable, ...
+            run.exit_code = -1
+            run.error = f"Errore esecuzione script: {exc}"
+            run.emit("stderr", run.error)
+        finally:
+            run.finished_at = datetime.utcnow().isoformat() + "Z"
+            run.done.set()
+            run.hub.publish("end", run.describe())
+            self._persist(run)
+            self._prune()
+
+    async def _pump(self, run: ScriptRun, stream: str, reader: asyncio.StreamReader, spool) -> None:
+        pending = b""
+        while True:
+            chunk = await reader.read(_READ_CHUNK)
+            if not chunk:
+                break
+            run.bytes += len(chunk)
+            pending += chunk
+            *lines, pending = pending.split(b"\n")
+            while len(pending) > MAX_LINE_BYTES:
+                lines.append(pending[:MAX_LINE_BYTES])
+                pending = pending[MAX_LINE_BYTES:]
+            for line in lines:
+                spool.write(line + b"\n")
+                run.emit(stream, line.decode("utf-8", errors="replace"))
+            spool.flush()
+        if pending:
+            spool.write(pending + b"\n")
+            run.emit(stream, pending.decode("utf-8", errors="replace"))
+
+    def _persist(self, run: ScriptRun) -> None:
+        meta = {**run.describe(), "stdout_tail": run.tail("stdout"), "stderr_tail": run.tail("stderr")}
+        try:
+            (self.root / f"{run.id}.json").write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+        except OSError:
+            pass
+
+    def _prune(self) -> None:
+        finished = sorted(run_id for run_id, run in self._runs.items() if run.finished)
+        for run_id in finished[:max(0, len(finished) - self.retention)]:
+            del self._runs[run_id]
+        metas = sorted(self.root.glob("*.json"), reverse=True)
+        for meta_path in metas[self.retention:]:
+            for path in (meta_path, meta_path.with_suffix(".log")):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
@@ -0,0 +1,676 @@
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+
+@dataclass
+class ProviderResult:
+    cards: List[dict]
+    extras: Dict[str, List[dict]] = field(default_factory=dict)
+
+
+@dataclass
+class StatusProvider:
+    """An independently refreshable group of status cards.
+
+    ``collect`` receives an ``emit`` callback to push each card as soon as it
+    is ready; ``cards`` lists the card ids it produces, so callers can select
+    a provider by card id as well.
+    """
+
+    id: str
+    collect: Callable[[Callable[[dict], None]], Awaitable[ProviderResult]]
+    cards: tuple = ()
+    ttl: float | None = None
+
+
+@dataclass
+class ProviderState:
+    result: ProviderResult
+    generated_at: str
+    expires_at: float
+    error: str | None = None
+
+
+@dataclass
+class CategorySnapshot:
+    id: str
+    card: dict
+    version: int
+    provider: str
+    generated_at: str
+    expires_at: float
+    derived: dict = field(default_factory=dict)
+    body: bytes = b""
+
+    def is_expired(self, now: float | None = None) -> bool:
+        return (now if now is not None else time.monotonic()) >= self.expires_at
+
+
+@dataclass
+class StatusSnapshot:
+    version: int
+    generated_at: str
+    categories: Dict[str, CategorySnapshot] = field(default_factory=dict)
+    overview: dict = field(default_factory=dict)
+    status_body: bytes = b""
+    overview_body: bytes = b""
+    stream_body: bytes = b""
+
+    def status_body_for(self, card_ids: Iterable[str]) -> bytes:
+        wanted = set(card_ids)
+        items = [item for item in self.categories.values() if item.id in wanted]
+        return _status_body(self.version, self.generated_at, items)
+
+    def stream_body_for(self, card_ids: Iterable[str]) -> bytes:
+        wanted = set(card_ids)
+        items = [item for item in self.categories.values() if item.id in wanted]
+        return _stream_body(self, items)
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls: callers with the same key share one task.
+
+    The shared task is shielded, so a caller that goes away (closed tab,
+    cancelled request) does not cancel the work for everybody else.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.started: Dict[str, int] = {}
+        self.coalesced: Dict[str, int] = {}
+
+    def inflight(self, key: str) -> asyncio.Task | None:
+        return self._inflight.get(key)
+
+    async def run(self, key: str, factory: Callable[[], Awaitable]):
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced[key] = self.coalesced.get(key, 0) + 1
+            return await asyncio.shield(task)
+        task = asyncio.ensure_future(factory())
+        self._inflight[key] = task
+        self.started[key] = self.started.get(key, 0) + 1
+        task.add_done_callback(lambda done, key=key: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark as retrieved even if every caller went away
+
+    def stats(self) -> Dict[str, dict]:
+        keys = set(self.started) | set(self.coalesced)
+        return {
+            key: {
+                "started": self.started.get(key, 0),
+                "coalesced": self.coalesced.get(key, 0),
+                "inflight": key in self._inflight,
+            }
+            for key in sorted(keys)
+        }
+
+
+def _encode(payload: dict) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def _status_body(version: int, generated_at: str, items: Iterable[CategorySnapshot]) -> bytes:
+    head = _encode({"version": version, "generated_at": generated_at})
+    return head[:-1] + b', "categories": [' + b", ".join(item.body for item in items) + b"]}"
+
+
+def _stream_body(snapshot: "StatusSnapshot", items: Iterable[CategorySnapshot]) -> bytes:
+    version = snapshot.version
+    summary = _encode({"version": version, "generated_at": snapshot.generated_at, "categories": list(snapshot.categories)})
+    return b"".join(
+        [sse_message("category", item.body, item.version) for item in items]
+        + [sse_message("overview", snapshot.overview_body, version), sse_message("snapshot", summary, version)]
+    )
+
+
+def sse_message(event: str, data: bytes, event_id: str | int | None = None) -> bytes:
+    # JSON produced by _encode never contains raw newlines, so one data line is enough.
+    head = f"event: {event}\n"
+    if event_id is not None:
+        head += f"id: {event_id}\n"
+    return head.encode("utf-8") + b"data: " + data + b"\n\n"
+
+
+class BroadcastHub:
+    """Fans out pre-encoded Server-Sent Events to every connected client.
+
+    Each message is encoded once and the same bytes are queued for all
+    subscribers. A subscriber whose queue fills up is disconnected (it gets
+    ``None``); EventSource reconnects on its own and resyncs from the snapshot.
+    Messages published with a ``topic`` only reach subscribers that asked for
+    it (or for every topic).
+    """
+
+    def __init__(self, queue_size: int = 256) -> None:
+        self.queue_size = queue_size
+        self._subscribers: Dict[asyncio.Queue, set[str] | None] = {}
+        self.published = 0
+        self.dropped = 0
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    @asynccontextmanager
+    async def subscribe(self, topics: Iterable[str] | None = None):
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        self._subscribers[queue] = set(topics) if topics is not None else None
+        try:
+            yield queue
+        finally:
+            self._subscribers.pop(queue, None)
+
+    def publish(
+        self, event: str, payload: dict | bytes, event_id: str | int | None = None, topic: str | None = None
+    ) -> None:
+        if not self._subscribers:
+            return
+        data = payload if isinstance(payload, bytes) else _encode(payload)
+        message = sse_message(event, data, event_id)
+        self.published += 1
+        for queue, topics in list(self._subscribers.items()):
+            if topic is not None and topics is not None and topic not in topics:
+                continue
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self._subscribers.pop(queue, None)
+                self.dropped += 1
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    def stats(self) -> dict:
+        return {"subscribers": self.subscribers, "published": self.published, "dropped": self.dropped}
+
+
+PROBE_KINDS = ("git", "docker", "postgres", "redis", "s3", "scalingo")
+
+_REFRESH_DEADLINE: ContextVar[float | None] = ContextVar("status_refresh_deadline", default=None)
+
+
+@dataclass
+class TargetHealth:
+    key: str
+    state: str = "closed"
+    failures: int = 0
+    next_probe_at: float = 0.0
+    last_checked: float | None = None
+    last_result: object = None
+    probing: bool = False
+
+    def describe(self, now: float | None = None) -> dict:
+        now = now if now is not None else time.monotonic()
+        info: dict = {"state": self.state, "failures": self.failures}
+        if self.state != "closed":
+            info["retry_in"] = max(0, round(self.next_probe_at - now))
+        return info
+
+
+class CircuitBreakerRegistry:
+    """Per-target health with exponential backoff.
+
+    After ``threshold`` consecutive failures a target is opened and re-probed
+    only after ``base_backoff * 2**n`` seconds (capped at ``max_backoff``);
+    meanwhile callers are served its last known result. Once the backoff has
+    elapsed a single trial probe is let through; the other callers keep
+    getting the last result until that probe is recorded.
+    """
+
+    def __init__(self, threshold: int = 2, base_backoff: float = 60.0, max_backoff: float = 1800.0) -> None:
+        self.threshold = max(1, threshold)
+        self.base_backoff = max(0.0, base_backoff)
+        self.max_backoff = max(self.base_backoff, max_backoff)
+        self._targets: Dict[str, TargetHealth] = {}
+
+    def get(self, key: str) -> TargetHealth:
+        health = self._targets.get(key)
+        if health is None:
+            health = TargetHealth(key)
+            self._targets[key] = health
+        return health
+
+    def allow(self, key: str) -> bool:
+        health = self.get(key)
+        if health.state == "closed":
+            return True
+        if health.probing:
+            return False
+        if time.monotonic() >= health.next_probe_at:
+            health.state = "half_open"
+            health.probing = True
+            return True
+        return False
+
+    def release(self, key: str) -> None:
+        """Drops the trial probe of ``key`` without a result (it was cancelled or crashed)."""
+        health = self._targets.get(key)
+        if health is not None:
+            health.probing = False
+
+    def record(self, key: str, result: object, failed: bool) -> None:
+        health = self.get(key)
+        now = time.monotonic()
+        health.last_checked = now
+        health.last_result = result
+        health.probing = False
+        if not failed:
+            health.state = "closed"
+            health.failures = 0
+            health.next_probe_at = 0.0
+            return
+        health.failures += 1
+        if health.state == "half_open" or health.failures >= self.threshold:
+            exponent = max(0, health.failures - self.threshold)
+            backoff = min(self.max_backoff, self.base_backoff * (2 ** min(exponent, 16)))
+            health.state = "open"
+            health.next_probe_at = now + backoff
+
+    def reset(self, key: str | None = None) -> None:
+        if key is None:
+            self._targets.clear()
+        else:
+            self._targets.pop(key, None)
+
+    def stats(self) -> Dict[str, dict]:
+        now = time.monotonic()
+        return {key: health.describe(now) for key, health in sorted(self._targets.items()) if health.failures}
+
+
+class ProbeScheduler:
+    """Runs independent probes concurrently, bounded per probe kind.
+
+    Every probe gets the timeout configured for its kind, clipped to whatever
+    is left of the refresh budget set with :meth:`deadline`. A probe that runs
+    out of time is cancelled and replaced by the value built by ``on_timeout``.
+    Probes that name a ``target`` go through the circuit breaker: while the
+    target is open, ``on_open`` builds the answer from its last known result.
+    """
+
+    def __init__(
+        self,
+        limits: Dict[str, int],
+        default_limit: int = 4,
+        timeouts: Optional[Dict[str, float]] = None,
+        default_timeout: float | None = None,
+        breakers: CircuitBreakerRegistry | None = None,
+    ) -> None:
+        self.breakers = breakers or CircuitBreakerRegistry()
+        self.limits = {kind: max(1, int(value)) for kind, value in limits.items()}
+        self.default_limit = max(1, default_limit)
+        self.timeouts = {kind: value for kind, value in (timeouts or {}).items() if value and value > 0}
+        self.default_timeout = default_timeout
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._running: Dict[str, int] = {}
+        self._completed: Dict[str, int] = {}
+        self._timeouts: Dict[str, int] = {}
+
+    @contextmanager
+    def deadline(self, budget: float | None):
+        if not budget or budget <= 0:
+            yield
+            return
+        token = _REFRESH_DEADLINE.set(time.monotonic() + budget)
+        try:
+            yield
+        finally:
+            _REFRESH_DEADLINE.reset(token)
+
+    @staticmethod
+    def remaining() -> float | None:
+        deadline = _REFRESH_DEADLINE.get()
+        if deadline is None:
+            return None
+        return max(0.0, deadline - time.monotonic())
+
+    def _semaphore(self, kind: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(kind)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.limits.get(kind, self.default_limit))
+            self._semaphores[kind] = semaphore
+        return semaphore
+
+    def _probe_timeout(self, kind: str) -> float | None:
+        timeout = self.timeouts.get(kind, self.default_timeout)
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        return remaining if timeout is None else min(timeout, remaining)
+
+    def _timed_out(self, kind: str, on_timeout: Callable[[float], object] | None, elapsed: float):
+        self._timeouts[kind] = self._timeouts.get(kind, 0) + 1
+        if on_timeout is None:
+            raise asyncio.TimeoutError(f"Probe {kind} oltre il tempo massimo")
+        return on_timeout(elapsed)
+
+    async def run(
+        self,
+        kind: str,
+        factory: Callable[[], Awaitable],
+        on_timeout: Callable[[float], object] | None = None,
+        target: str | None = None,
+        is_failure: Callable[[object], bool] | None = None,
+        on_open: Callable[[object, TargetHealth], object] | None = None,
+    ):
+        if target is None:
+            return await self._run(kind, factory, on_timeout)
+        key = f"{kind}:{target}"
+        if not self.breakers.allow(key):
+            health = self.breakers.get(key)
+            return on_open(health.last_result, health) if on_open else health.last_result
+        try:
+            result = await self._run(kind, factory, on_timeout)
+        except asyncio.TimeoutError:
+            self.breakers.record(key, None, failed=True)
+            raise
+        except BaseException:
+            self.breakers.release(key)
+            raise
+        self.breakers.record(key, result, failed=bool(is_failure and is_failure(result)))
+        return result
+
+    async def _run(
+        self,
+        kind: str,
+        factory: Callable[[], Awaitable],
+        on_timeout: Callable[[float], object] | None,
+    ):
+        started = time.monotonic()
+        semaphore = self._semaphore(kind)
+        try:
+            await asyncio.wait_for(semaphore.acquire(), self.remaining())
+        except asyncio.TimeoutError:
+            return self._timed_out(kind, on_timeout, time.monotonic() - started)
+        self._running[kind] = self._running.get(kind, 0) + 1
+        try:
+            timeout = self._probe_timeout(kind)
+            if timeout is not None and timeout <= 0:
+                return self._timed_out(kind, on_timeout, time.monotonic() - started)
+            try:
+                return await asyncio.wait_for(factory(), timeout)
+            except asyncio.TimeoutError:
+                return self._timed_out(kind, on_timeout, time.monotonic() - started)
+        finally:
+            semaphore.release()
+            self._running[kind] -= 1
+            self._completed[kind] = self._completed.get(kind, 0) + 1
+
+    async def map(
+        self,
+        kind: str,
+        items,
+        probe: Callable[..., Awaitable],
+        on_timeout: Callable[[object, float], object] | None = None,
+        target: Callable[[object], str] | None = None,
+        is_failure: Callable[[object], bool] | None = None,
+        on_open: Callable[[object, TargetHealth], object] | None = None,
+    ) -> List:
+        def factory(item):
+            fallback = (lambda elapsed: on_timeout(item, elapsed)) if on_timeout else None
+            return self.run(
+                kind,
+                lambda: probe(item),
+                on_timeout=fallback,
+                target=target(item) if target else None,
+                is_failure=is_failure,
+                on_open=on_open,
+            )
+
+        return list(await asyncio.gather(*(factory(item) for item in items)))
+
+    def stats(self) -> Dict[str, dict]:
+        kinds = set(self.limits) | set(self._running) | set(self._completed)
+        return {
+            kind: {
+                "limit": self.limits.get(kind, self.default_limit),
+                "timeout": self.timeouts.get(kind, self.default_timeout),
+                "running": self._running.get(kind, 0),
+                "completed": self._completed.get(kind, 0),
+                "timeouts": self._timeouts.get(kind, 0),
+            }
+            for kind in sorted(kinds)
+        }
+
+
+class StatusSnapshotEngine:
+    """Keeps the latest status snapshot in memory and refreshes it in background.
+
+    Cards come from independent providers, each with its own TTL, and can be
+    refreshed selectively. Responses for ``/api/status`` and ``/api/overview``
+    are serialised once per refresh, so serving them is a dictionary lookup
+    regardless of the number of viewers. Overview aggregates are built from
+    per-card contributions computed by ``derive`` only when a card changes.
+    """
+
+    def __init__(
+        self,
+        providers: List[StatusProvider],
+        *,
+        aggregate: Callable[[List[CategorySnapshot], Dict[str, List[dict]]], dict],
+        derive: Callable[[dict], dict] | None = None,
+        category_order: Iterable[str] = (),
+        interval: float,
+        ttl: float,
+        scheduler: ProbeScheduler | None = None,
+        budget: float | None = None,
+    ) -> None:
+        self.providers: Dict[str, StatusProvider] = {provider.id: provider for provider in providers}
+        self._card_provider = {card_id: provider.id for provider in providers for card_id in provider.cards}
+        self._aggregate = aggregate
+        self._derive = derive or (lambda card: {})
+        self._order = {card_id: index for index, card_id in enumerate(category_order)}
+        self.interval = interval
+        self.ttl = ttl
+        self.scheduler = scheduler
+        self.budget = budget
+        self.sequence = 0
+        self.last_error: str | None = None
+        self._states: Dict[str, ProviderState] = {}
+        self._categories: Dict[str, CategorySnapshot] = {}
+        self._pending: Dict[str, tuple[dict, int]] = {}
+        self._snapshot: StatusSnapshot | None = None
+        self._task: asyncio.Task | None = None
+        self._background: set[asyncio.Task] = set()
+        self.flight = SingleFlight()
+        self.hub = BroadcastHub()
+
+    @property
+    def snapshot(self) -> StatusSnapshot | None:
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version if self._snapshot else 0
+
+    def resolve(self, names: Iterable[str] | None) -> List[str]:
+        """Maps provider or card ids to provider ids (registry order); ``KeyError`` if unknown."""
+        if not names:
+            return list(self.providers)
+        selected: set[str] = set()
+        for name in names:
+            if name in self.providers:
+                selected.add(name)
+            elif name in self._card_provider:
+                selected.add(self._card_provider[name])
+            else:
+                raise KeyError(name)
+        return [provider_id for provider_id in self.providers if provider_id in selected]
+
+    def card_ids(self, names: Iterable[str]) -> List[str]:
+        ids: List[str] = []
+        for name in names:
+            provider = self.providers.get(name)
+            if provider is None:
+                ids.append(name)
+                continue
+            state = self._states.get(name)
+            if state is not None:
+                ids.extend(card.get("id") for card in state.result.cards)
+            else:
+                ids.extend(provider.cards)
+        return ids
+
+    async def start(self) -> None:
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                # Providers with a longer ttl are only collected when they expire.
+                stale = self.stale_providers()
+                if stale:
+                    await self.refresh(stale)
+            except Exception as exc:  # pragma: no cover - keep the loop alive
+                self.last_error = f"Errore aggiornamento stato: {exc}"
+            await asyncio.sleep(self.interval)
+
+    async def refresh(self, providers: Iterable[str] | None = None) -> StatusSnapshot:
+        selected = self.resolve(providers)
+        key = "*" if len(selected) == len(self.providers) else ",".join(selected)
+        if key != "*" and self.flight.inflight("*") is not None:
+            # A full refresh already covers whatever subset was asked for.
+            key = "*"
+        return await self.flight.run(key, lambda: self._refresh(selected))
+
+    def request_refresh(self, providers: Iterable[str] | None = None) -> None:
+        """Starts (or joins) a refresh without waiting for it."""
+        task = asyncio.ensure_future(self.refresh(providers))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def stale_providers(self, providers: Iterable[str] | None = None) -> List[str]:
+        now = time.monotonic()
+        return [
+            provider_id
+            for provider_id in self.resolve(providers)
+            if provider_id not in self._states or self._states[provider_id].expires_at <= now
+        ]
+
+    async def current(self, force: bool = False, providers: Iterable[str] | None = None) -> StatusSnapshot:
+        selected = self.resolve(providers)
+        stale = selected if force else self.stale_providers(selected)
+        if stale or self._snapshot is None:
+            return await self.refresh(stale or selected)
+        return self._snapshot
+
+    async def _refresh(self, selected: List[str]) -> StatusSnapshot:
+        deadline = self.scheduler.deadline(self.budget) if self.scheduler else nullcontext()
+        with deadline:
+            results = await asyncio.gather(*(self._collect(provider_id) for provider_id in selected))
+        now = time.monotonic()
+        generated_at = datetime.utcnow().isoformat() + "Z"
+        for provider_id, (result, error) in zip(selected, results):
+            ttl = self.providers[provider_id].ttl or self.ttl
+            self._states[provider_id] = ProviderState(result, generated_at, now + ttl, error)
+        errors = [f"{provider_id}: {error}" for provider_id, (_, error) in zip(selected, results) if error]
+        self.last_error = "; ".join(errors) or None
+        return self._publish(generated_at)
+
+    async def _collect(self, provider_id: str) -> tuple[ProviderResult, str | None]:
+        try:
+            return await self.providers[provider_id].collect(self._emit_category), None
+        except Exception as exc:
+            # Keep serving the previous cards of a provider that crashed.
+            previous = self._states.get(provider_id)
+            return (previous.result if previous else ProviderResult([])), f"Errore aggiornamento stato: {exc}"
+
+    def _emit_category(self, card: dict) -> None:
+        card_id = card.get("id") or ""
+        previous = self._categories.get(card_id)
+        pending = self._pending.get(card_id)
+        if (previous is not None and previous.card == card) or (pending is not None and pending[0] == card):
+            return
+        self.sequence += 1
+        self._pending[card_id] = (card, self.sequence)
+        self.hub.publish("category", {**card, "version": self.sequence}, event_id=self.sequence, topic=card_id)
+
+    def _publish(self, generated_at: str) -> StatusSnapshot:
+        categories: List[CategorySnapshot] = []
+        extras: Dict[str, List[dict]] = {}
+        for provider_id, state in ((pid, self._states.get(pid)) for pid in self.providers):
+            if state is None:
+                continue
+            for key, values in state.result.extras.items():
+                extras.setdefault(key, []).extend(values)
+            for card in state.result.cards:
+                card_id = card.get("id") or ""
+                previous = self._categories.get(card_id)
+                if previous is not None and previous.card == card:
+                    # Unchanged cards keep version, encoded body and derived aggregates.
+                    categories.append(replace(previous, generated_at=state.generated_at, expires_at=state.expires_at))
+                    continue
+                pending = self._pending.pop(card_id, None)
+                if pending is not None and pending[0] == card:
+                    version = pending[1]
+                else:
+                    self.sequence += 1
+                    version = self.sequence
+                    self.hub.publish("category", {**card, "version": version}, event_id=version, topic=card_id)
+                categories.append(
+                    CategorySnapshot(
+                        id=card_id,
+                        card=card,
+                        version=version,
+                        provider=provider_id,
+                        generated_at=state.generated_at,
+                        expires_at=state.expires_at,
+                        derived=self._derive(card),
+                        body=_encode({**card, "version": version}),
+                    )
+                )
+        categories.sort(key=lambda item: self._order.get(item.id, len(self._order)))
+        self._categories = {item.id: item for item in categories}
+
+        self.sequence += 1
+        version = self.sequence
+        overview = self._aggregate(categories, extras)
+        overview["generated_at"] = generated_at
+        overview["version"] = version
+        snapshot = StatusSnapshot(
+            version=version,
+            generated_at=generated_at,
+            categories=dict(self._categories),
+            overview=overview,
+        )
+        snapshot.status_body = _status_body(version, generated_at, categories)
+        snapshot.overview_body = _encode(overview)
+        summary = _encode({"version": version, "generated_at": generated_at, "categories": list(self._categories)})
+        self.hub.publish("overview", snapshot.overview_body, event_id=version)
+        self.hub.publish("snapshot", summary, event_id=version)
+        snapshot.stream_body = _stream_body(snapshot, categories)
+        self._snapshot = snapshot
+        return snapshot
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            provider_id: {
+                "generated_at": state.generated_at,
+                "expires_in": round(state.expires_at - now, 1),
+                "error": state.error,
+            }
+            for provider_id, state in self._states.items()
+        }
@@ -0,0 +1,116 @@
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Tuple
+
+# One point: bucket start, number of samples merged into it, averaged values.
+_Point = Tuple[float, int, Dict[str, float]]
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+
+
+class TimeSeriesStore:
+    """In-process time series with fixed resolution and bounded retention.
+
+    Samples falling in the same ``resolution``-second bucket are averaged, so
+    each series holds at most ``retention / resolution`` points however often
+    it is fed. Series that receive nothing for longer than ``retention`` are
+    dropped.
+    """
+
+    def __init__(self, resolution: float = 30.0, retention: float = 3600.0) -> None:
+        self.resolution = max(1.0, resolution)
+        self.retention = max(self.resolution, retention)
+        self._series: Dict[str, Deque[_Point]] = {}
+
+    def add(self, key: str, values: Dict[str, float | None], timestamp: float | None = None) -> None:
+        timestamp = time.time() if timestamp is None else timestamp
+        values = {name: float(value) for name, value in values.items() if value is not None}
+        if not values:
+            return
+        bucket = timestamp - timestamp % self.resolution
+        points = self._series.get(key)
+        if points is None:
+            points = self._series[key] = deque(maxlen=int(self.retention // self.resolution) + 1)
+        if points and points[-1][0] == bucket:
+            _, count, current = points[-1]
+            merged = dict(current)
+            for name, value in values.items():
+                merged[name] = (current[name] * count + value) / (count + 1) if name in current else value
+            points[-1] = (bucket, count + 1, merged)
+        else:
+            points.append((bucket, 1, values))
+        self._expire(timestamp)
+
+    def keys(self, prefix: str = "") -> List[str]:
+        return sorted(key for key in self._series if key.startswith(prefix))
+
+    def latest(self, key: str) -> dict | None:
+        points = self._series.get(key)
+        if not points:
+            return None
+        bucket, _, values = points[-1]
+        return {"date": _iso(bucket), **values}
+
+    def series(self, key: str, since: float | None = None, max_points: int | None = None) -> List[dict]:
+        points = [point for point in self._series.get(key, ()) if since is None or point[0] >= since]
+        if max_points and len(points) > max_points:
+            points = self._downsample(points, max_points)
+        return [{"date": _iso(bucket), **values} for bucket, _, values in points]
+
+    def samples(self, key: str, name: str, since: float | None = None) -> List[Tuple[float, float]]:
+        """``(bucket start, value)`` pairs of one field, for computations on the raw series."""
+        return [
+            (bucket, values[name])
+            for bucket, _, values in self._series.get(key, ())
+            if name in values and (since is None or bucket >= since)
+        ]
+
+    def drop(self, key: str) -> None:
+        self._series.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            "resolution": self.resolution,
+            "retention": self.retention,
+            "series": len(self._series),
+            "points": sum(len(points) for points in self._series.values()),
+        }
+
+    def dump(self) -> Dict[str, List[list]]:
+        return {key: [[bucket, count, values] for bucket, count, values in points] for key, points in self._series.items()}
+
+    def load(self, data: Dict[str, List[list]]) -> None:
+        """Restores what ``dump`` returned (e.g. read back after a restart); points past retention are skipped."""
+        horizon = time.time() - self.retention
+        for key, items in data.items():
+            points = deque(maxlen=int(self.retention // self.resolution) + 1)
+            for bucket, count, values in items:
+                if bucket >= horizon:
+                    points.append((float(bucket), int(count), {name: float(value) for name, value in values.items()}))
+            if points:
+                self._series[key] = points
+
+    @staticmethod
+    def _downsample(points: List[_Point], max_points: int) -> List[_Point]:
+        size = -(-len(points) // max_points)
+        merged: List[_Point] = []
+        for start in range(0, len(points), size):
+            chunk = points[start:start + size]
+            totals: Dict[str, float] = {}
+            counts: Dict[str, int] = {}
+            for _, count, values in chunk:
+                for name, value in values.items():
+                    totals[name] = totals.get(name, 0.0) + value * count
+                    counts[name] = counts.get(name, 0) + count
+            merged.append(
+                (chunk[0][0], sum(count for _, count, _ in chunk), {name: totals[name] / counts[name] for name in totals})
+            )
+        return merged
+
+    def _expire(self, now: float) -> None:
+        horizon = now - self.retention
+        for key in [key for key, points in self._series.items() if points[-1][0] < horizon]:
+            del self._series[key]
@@ -0,0 +1,58 @@
+import asyncio
+import os
+
+import pytest
+
+from app.pg_probe import PROBE_QUERY, PostgresProbePool, redact_url
+
+PG_URL = os.environ.get("STATUS_TEST_PG_URL")
+
+needs_postgres = pytest.mark.skipif(not PG_URL, reason="STATUS_TEST_PG_URL non impostata")
+
+
+def test_probe_maps_the_single_query_row():
+    queries = []
+
+    class Pool(PostgresProbePool):
+        async def fetch(self, url, query):
+            queries.append((url, query))
+            return [{"size_bytes": 8192 * 1000, "row_estimate": None}]
+
+    result = asyncio.run(Pool().probe("postgresql://app:secret@db/app"))
+
+    assert queries == [("postgresql://app:secret@db/app", PROBE_QUERY)]
+    assert result["size_bytes"] == 8192000
+    assert result["row_estimate"] == 0
+    assert result["latency_ms"] >= 0
+
+
+def test_redact_url_masks_the_password():
+    assert redact_url("postgresql://app:secret@db:5432/app") == "postgresql://app:***@db:5432/app"
+    assert redact_url("postgresql://db/app") == "postgresql://db/app"
+
+
+@needs_postgres
+def test_probe_reuses_the_pool_and_retain_closes_it():
+    pytest.importorskip("asyncpg")
+
+    async def scenario():
+        pool = PostgresProbePool(max_size=2)
+        try:
+            first = await pool.probe(PG_URL)
+            second = await pool.probe(PG_URL)
+            kept = pool.stats()
+            await pool.retain([PG_URL])
+            still_kept = pool.stats()
+            await pool.retain([])
+            return first, second, kept, still_kept, pool.stats()
+        finally:
+            await pool.close()
+
+    first, second, kept, still_kept, dropped = asyncio.run(scenario())
+
+    assert first["size_bytes"] > 0 and second["size_bytes"] > 0
+    assert kept["backend"] == "asyncpg"
+    assert kept["connects"] == 1 and kept["queries"] == 2
+    assert list(kept["pools"]) == [redact_url(PG_URL)]
+    assert list(still_kept["pools"]) == [redact_url(PG_URL)]
+    assert dropped["pools"] == {}
@@ -0,0 +1,146 @@
+import asyncio
+
+import pytest
+
+from app.redis_probe import RedisProbeError, RedisProbePool, info_metrics, parse_info, parse_keyspace
+
+INFO = {
+    "memory": "# Memory\r\nused_memory:1048576\r\nused_memory_human:1.00M\r\nmaxmemory:0\r\nmaxmemory_policy:noeviction\r\n",
+    "stats": "# Stats\r\ninstantaneous_ops_per_sec:12\r\nkeyspace_hits:30\r\nkeyspace_misses:10\r\nevicted_keys:0\r\n",
+    "keyspace": "# Keyspace\r\ndb0:keys=12,expires=3,avg_ttl=0\r\ndb2:keys=5,expires=0,avg_ttl=0\r\n",
+}
+
+
+def test_parse_info_skips_headers_and_blank_lines():
+    fields = parse_info(INFO["memory"] + "\r\n# Other\r\nredis_version:7.2.4\r\n")
+
+    assert fields == {
+        "used_memory": "1048576",
+        "used_memory_human": "1.00M",
+        "maxmemory": "0",
+        "maxmemory_policy": "noeviction",
+        "redis_version": "7.2.4",
+    }
+
+
+def test_parse_keyspace_reads_every_database():
+    keyspace = parse_keyspace(parse_info(INFO["keyspace"]))
+
+    assert keyspace == {
+        "db0": {"keys": 12, "expires": 3, "avg_ttl": 0},
+        "db2": {"keys": 5, "expires": 0, "avg_ttl": 0},
+    }
+
+
+def test_info_metrics_hit_ratio_and_unlimited_maxmemory():
+    metrics = info_metrics(*(parse_info(INFO[section]) for section in ("memory", "stats", "keyspace")))
+
+    assert metrics["used_memory"] == 1048576
+    assert metrics["maxmemory"] is None  # 0 means "no limit"
+    assert metrics["hit_ratio"] == 0.75
+    assert metrics["ops_per_sec"] == 12
+    assert metrics["keys"] == 17
+
+
+def test_info_metrics_without_lookups_has_no_hit_ratio():
+    metrics = info_metrics({"maxmemory": "1000"}, {"keyspace_hits": "0", "keyspace_misses": "0"}, {})
+
+    assert metrics["maxmemory"] == 1000
+    assert metrics["hit_ratio"] is None
+    assert metrics["keys"] == 0
+
+
+class _RespStub:
+    """Minimal RESP server answering ``AUTH`` and ``INFO <section>``."""
+
+    def __init__(self, password: str) -> None:
+        self.password = password
+        self.connections = 0
+        self.closed = 0
+        self.commands = []
+        self.server = None
+
+    async def start(self) -> int:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while True:
+                command = await self._command(reader)
+                if command is None:
+                    break
+                self.commands.append(command)
+                if command[0] == "AUTH":
+                    ok = command[-1] == self.password
+                    writer.write(b"+OK\r\n" if ok else b"-WRONGPASS invalid username-password pair\r\n")
+                else:
+                    data = INFO[command[1]].encode("utf-8")
+                    writer.write(b"$%d\r\n%s\r\n" % (len(data), data))
+                await writer.drain()
+        finally:
+            self.closed += 1
+            writer.close()
+
+    @staticmethod
+    async def _command(reader: asyncio.StreamReader):
+        line = await reader.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:-2])):
+            size = int((await reader.readline())[1:-2])
+            args.append((await reader.readexactly(size + 2))[:-2].decode("utf-8"))
+        return args
+
+
+def _with_stub(scenario):
+    async def main():
+        stub = _RespStub("secret")
+        port = await stub.start()
+        pool = RedisProbePool(max_size=2)
+        try:
+            return await scenario(stub, pool, port)
+        finally:
+            await pool.close()
+            await stub.stop()
+
+    return asyncio.run(main())
+
+
+def test_pool_reuses_the_authenticated_connection():
+    async def scenario(stub, pool, port):
+        url = f"redis://:secret@127.0.0.1:{port}/0"
+        first = await pool.probe(url)
+        second = await pool.probe(url)
+        return first, second, stub.connections, [command[0] for command in stub.commands], pool.stats()
+
+    first, second, connections, commands, stats = _with_stub(scenario)
+
+    assert connections == 1
+    assert commands == ["AUTH"] + ["INFO"] * 6
+    assert first["hit_ratio"] == second["hit_ratio"] == 0.75
+    assert stats["connects"] == 1
+    assert stats["probes"] == 2
+
+
+def test_failed_auth_raises_and_closes_the_socket():
+    async def scenario(stub, pool, port):
+        with pytest.raises(RedisProbeError, match="WRONGPASS"):
+            await pool.probe(f"redis://:wrong@127.0.0.1:{port}/0")
+        for _ in range(100):
+            if stub.closed:
+                break
+            await asyncio.sleep(0.01)
+        return stub.closed, pool.stats()
+
+    closed, stats = _with_stub(scenario)
+
+    assert closed == 1
+    assert stats["failures"] == 1
+    assert not any(stats["connections"].values())  # nothing kept for reuse
@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+import httpx
+
+from app.scalingo_api import ScalingoClient
+
+BASE_URL = "https://api.example.test"
+
+
+def _run(handler, scenario, **options):
+    async def main():
+        client = ScalingoClient(transport=httpx.MockTransport(handler), **options)
+        try:
+            return await scenario(client)
+        finally:
+            await client.close()
+
+    return asyncio.run(main())
+
+
+def test_token_bucket_paces_requests_beyond_the_burst():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(time.monotonic())
+        return httpx.Response(200, json={"addons": []})
+
+    async def scenario(client):
+        started = time.monotonic()
+        for index in range(6):
+            await client.get(BASE_URL, "token", f"/v1/apps/app-{index}/addons")
+        return time.monotonic() - started, client.stats()
+
+    elapsed, stats = _run(handler, scenario, rate=20.0, burst=2)
+
+    assert len(requests) == 6
+    # Two requests ride the burst, the other four wait 1/20 s each.
+    assert elapsed >= 0.19
+    assert stats["rate_limit_wait"] >= 0.19
+
+
+def test_429_pauses_for_retry_after_once():
+    answers = [
+        httpx.Response(429, headers={"Retry-After": "0.3"}),
+        httpx.Response(200, json={"apps": [{"name": "web"}]}),
+    ]
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return answers[len(requests) - 1]
+
+    async def scenario(client):
+        started = time.monotonic()
+        payload = await client.get(BASE_URL, "token", "/v1/apps")
+        return payload, time.monotonic() - started, client.stats()
+
+    payload, elapsed, stats = _run(handler, scenario, rate=100.0, burst=5, retries=2)
+
+    assert payload == {"apps": [{"name": "web"}]}
+    assert len(requests) == 2
+    # Retry-After is honoured once, through the token bucket, not twice.
+    assert 0.3 <= elapsed < 0.55
+    assert stats["rate_limit_wait"] >= 0.29
+    assert stats["throttled"] == 1
+    assert stats["retried"] == 1
+
+
+def test_304_reuses_the_cached_etag_body():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        return httpx.Response(200, json={"apps": [{"name": "web"}]}, headers={"ETag": '"v1"'})
+
+    async def scenario(client):
+        first = await client.get(BASE_URL, "token", "/v1/apps")
+        second = await client.get(BASE_URL, "token", "/v1/apps")
+        return first, second, client.stats()
+
+    first, second, stats = _run(handler, scenario)
+
+    assert len(requests) == 2
+    assert "If-None-Match" not in requests[0].headers
+    assert requests[1].headers["If-None-Match"] == '"v1"'
+    assert second == first
+    assert stats["not_modified"] == 1
+    assert stats["cached"] == 1
+
+
+def test_concurrent_callers_share_one_apps_fetch():
+    requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"apps": [{"name": "web"}, {"name": "worker"}]})
+
+    async def scenario(client):
+        results = await asyncio.gather(*(client.apps(BASE_URL, "token") for _ in range(5)))
+        return results, client.stats()
+
+    results, stats = _run(handler, scenario)
+
+    assert len(requests) == 1
+    assert all(apps == [{"name": "web"}, {"name": "worker"}] for apps in results)
+    assert stats["apps_shared"] == 4